@@ -4,6 +4,19 @@ It supports JWT integration.
 """
 
 from .audiencemanager import *
+from .connector import SessionPool
+from .ratelimiter import RateLimiter
+from .cache import ResponseCache
+from .mirror import Mirror
+from .index import TraitIndex, SegmentIndex
+from .foldertree import FolderTree
+from .segmentrule import SegmentRule, TraitMatrix, evaluateSegments
+from .traitrule import TraitRule
+from .dependency import DependencyGraph
+from .plan import Plan
+from .recorder import Recorder, ReplayMiss
+from .metrics import Metrics, PrometheusExporter, OpenTelemetryExporter
+from .asyncaudiencemanager import AsyncAudienceManager
 from .__version__ import __version__
 from audiencemanager import config
 from audiencemanager import connector
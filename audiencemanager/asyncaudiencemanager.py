@@ -0,0 +1,386 @@
+from audiencemanager import config
+from audiencemanager import asyncconnector
+from audiencemanager import outputs
+from audiencemanager import parameters
+
+
+class AsyncAudienceManager:
+    """
+    Asynchronous version of the AudienceManager class, the methods are coroutines that need to be awaited.
+    It allows to keep many requests in flight from a single event loop, bounded by the maxConcurrency parameter.
+    Require the aiohttp module (pip install audiencemanager[async]).
+    Example:
+        async with AsyncAudienceManager() as aam:
+            traits = await asyncio.gather(*[aam.getTrait(traitId) for traitId in traitIds])
+    """
+
+    def __init__(self, config_object: dict = config.config_object, maxConcurrency: int = 100, poolSize: int = 100, session: object = None, codec: object = None, **kwargs)->None:
+        """
+        Instantiate the asynchronous Audience Manager class.
+        Arguments:
+            config_object : OPTIONAL : configuration object to be used (default the one loaded by importConfigFile).
+            maxConcurrency : OPTIONAL : maximum number of requests in flight at the same time (default 100).
+            poolSize : OPTIONAL : maximum number of connections kept open in the pool (default 100).
+            session : OPTIONAL : aiohttp.ClientSession to share the connection pool between several instances.
+            codec : OPTIONAL : JSON codec used for the bodies and the responses: "json", "orjson" or a codec instance (default orjson when installed).
+        kwargs are passed to the connector (see asyncconnector.AsyncAdobeRequest), such as retry, backoffFactor, maxBackoff and rateLimiter.
+        """
+        self.connector = asyncconnector.AsyncAdobeRequest(
+            config_object=config_object, maxConcurrency=maxConcurrency, poolSize=poolSize, session=session, codec=codec, **kwargs)
+        self.config = self.connector.config
+        self.endpoint = "https://aam.adobe.io/v1"
+        self.header = self.connector.header
+
+    async def __aenter__(self)->'AsyncAudienceManager':
+        await self.connector.getSession()
+        return self
+
+    async def __aexit__(self, *args)->None:
+        await self.close()
+
+    async def close(self)->None:
+        """
+        Close the connection pool (only if it has been created by this instance).
+        """
+        await self.connector.close()
+
+    async def getTraits(self, folderId: int = None, includeMetrics: bool = True, integrationCode: str = None, dataSourceIds: list = None, includeDetails: bool = False, format: str = 'df')->object:
+        """
+        Return traits following the parameters provided.
+        Arguments:
+            folderId : OPTIONAL : Only return traits from the selected folder.
+            includeMetrics : OPTIONAL : Include the trait population (default True)
+            integrationCode : OPTIONAL : Returns traits that contain this integration code.
+            dataSourceIds : OPTIONAL : List of dataSourceIds. Returns traits that belong to the selected data sources.
+            includeDetails : OPTIONAL : For True, returns additional details for the traits.
+            format : OPTIONAL : default "df" that returns a dataframe, you can also return the raw format ("raw"). Also "records" (named tuples), "arrow" or "polars", see outputs.
+        """
+        path = "/traits/"
+        params = parameters.traits(folderId=folderId, includeMetrics=includeMetrics, integrationCode=integrationCode,
+                                   dataSourceIds=dataSourceIds, includeDetails=includeDetails)
+        res = await self.connector.getData(self.endpoint+path, params=params, headers=self.header)
+        if format == "raw":
+            return res
+        return outputs.convert(res, format, 'traits')
+
+    async def getTrait(self, traitId: str = None, intCode: str = None)->dict:
+        """
+        Return a trait by its id or by integrationCode. Require one of the following arguments.
+        Arguments:
+            traitId : REQUIRED : Trait ID
+            intCode : REQUIRED : integration code.
+        """
+        if traitId is None and intCode is None:
+            raise Exception("Must provide either traitId or intCode")
+        if intCode is not None:
+            path = f"/traits/ic:{intCode}"
+        else:
+            path = f"/traits/{traitId}"
+        res = await self.connector.getData(self.endpoint+path, headers=self.header)
+        return res
+
+    async def getTraitVersion(self, traitId: str = None)->dict:
+        """
+        See the change history of a trait rule.
+        Arguments:
+            traitId : REQUIRED : Trait ID
+        """
+        if traitId is None:
+            raise Exception("require a traitId to be entered")
+        path = f"/traits/{traitId}/trait-rule/versions"
+        res = await self.connector.getData(self.endpoint+path, headers=self.header)
+        return res
+
+    async def createTrait(self, name: str = None, traitType: str = None, dataSourceId: int = None, folderId: int = None, traitRule: str = None, ttl: int = 120, **kwargs)->dict:
+        """
+        Create Traits based on the information passed. See AudienceManager.createTrait for the possible kwargs.
+        Arguments:
+            name : REQUIRED : name of the Trait.
+            traitType : REQUIRED : Type of trait following possibilities: RULE_BASED_TRAIT, ON_BOARDED_TRAIT, ALGO_TRAIT
+            dataSourceId : REQUIRED : Associates the trait with a specific data provider
+            folderId : REQUIRED : Determines which storage folder the trait belongs to.
+            traitRule : OPTIONAL : rule string for your trait.
+            ttl : OPTIONAL : Trait Expiration in days. Default 120 days.
+        """
+        if name is None or dataSourceId is None or folderId is None or traitType is None:
+            raise Exception(
+                'Require a name, a dataSourceId, a traitType and a folderId')
+        if traitType not in ["RULE_BASED_TRAIT", "ON_BOARDED_TRAIT", "ALGO_TRAIT"]:
+            raise ValueError(
+                "traitType should be one of the following value [RULE_BASED_TRAIT, ON_BOARDED_TRAIT, ALGO_TRAIT]")
+        path = "/traits"
+        obj = {
+            "name": name,
+            "traitType": traitType,
+            "dataSourceId": str(dataSourceId),
+            "folderId": str(folderId),
+            "traitRule": traitRule,
+            "ttl": str(ttl),
+        }
+        for key in kwargs:
+            if kwargs[key] is not None and str(kwargs[key]) != "nan":
+                obj.update({key: str(kwargs[key])})
+        res = await self.connector.postData(self.endpoint + path, data=obj, headers=self.header)
+        return res
+
+    async def updateTrait(self, name: str = None, traitId: str = None, traitType: int = None, folderId: str = None, dataSourceId: int = None, **kwargs)->dict:
+        """
+        Update the trait based on its ID. See AudienceManager.updateTrait for the possible kwargs.
+        Arguments:
+            name : REQUIRED : name of the Trait.
+            traitId : REQUIRED : traitId to be updated.
+            traitType : REQUIRED : Type of trait following possibilities: RULE_BASED_TRAIT, ON_BOARDED_TRAIT, ALGO_TRAIT
+            dataSourceId : REQUIRED : Associates the trait with a specific data provider
+            folderId : REQUIRED : Determines which storage folder the trait belongs to.
+        """
+        if traitId is None:
+            raise Exception("Require a traitId as parameter")
+        path = f"/traits/{traitId}"
+        obj = {
+            "name": name,
+            "traitType": traitType,
+            "dataSourceId": str(dataSourceId),
+            "folderId": str(folderId),
+        }
+        for key in kwargs:
+            if kwargs[key] is not None and str(kwargs[key]) != "nan":
+                obj.update({key: str(kwargs[key])})
+        res = await self.connector.putData(self.endpoint + path, data=obj, headers=self.header)
+        return res
+
+    async def deleteTrait(self, traitId: str = None, intCode: str = None)->dict:
+        """
+        Delete a trait based on its Trait ID or its integration Code.
+        Arguments:
+            traitId : OPTIONAL : Trait ID to be deleted
+            intCode : OPTIONAL : Integraton code of the trait to be deleted.
+        """
+        if traitId is None and intCode is None:
+            raise Exception("traitId or intCode must be specified")
+        if traitId is not None:
+            path = f"/traits/{traitId}"
+        else:
+            path = f"/traits/ic:{intCode}"
+        res = await self.connector.deleteData(self.endpoint+path, headers=self.header)
+        return res
+
+    async def getSegments(self, includeInUseStatus: bool = None, status: str = None, containsTrait: int = None, dataSourceId: int = None, mergeRuleDataSourceId: int = None, includeMetrics: bool = True, includeTraitDataSourceIds: bool = False, includeAddressableAudienceMetrics: bool = False, format: str = 'df')->object:
+        """
+        Returns either a list or a dataframe of segments depending the type of output you select.
+        Arguments:
+            includeInUseStatus : OPTIONAL : include only segment in use (having a destination).
+            status : OPTIONAL : Returns segments that have the selected status. Accepted values are ACTIVE and INACTIVE
+            containsTrait : OPTIONAL : if a trait is set, it will return segments containing a specific trait.
+            dataSourceId : OPTIONAL : if a dataSourceId is set, it return return segments containing that dataSource.
+            mergeRuleDataSourceId : OPTIONAL : Returns segments that follow the selected Profile Merge Rule ID.
+            includeMetrics : OPTIONAL : For true, returns segment population metrics in the API response. (default True)
+            includeTraitDataSourceIds : OPTIONAL : For true, returns the data source IDs of the traits that build up this segment. (default False)
+            includeAddressableAudienceMetrics : OPTIONAL : For true, returns addressable audience metrics in the API response (default False)
+            format : OPTIONAL : by default returns a dataframe ("df"), can return the list by putting "raw". Also "records" (named tuples), "arrow" or "polars", see outputs.
+        """
+        path = "/segments"
+        params = parameters.segments(includeInUseStatus=includeInUseStatus, status=status, containsTrait=containsTrait, dataSourceId=dataSourceId,
+                                     mergeRuleDataSourceId=mergeRuleDataSourceId, includeMetrics=includeMetrics, includeTraitDataSourceIds=includeTraitDataSourceIds,
+                                     includeAddressableAudienceMetrics=includeAddressableAudienceMetrics)
+        res = await self.connector.getData(self.endpoint+path, params=params, headers=self.header)
+        if format == "raw":
+            return res
+        return outputs.convert(res, format, 'segments')
+
+    async def getSegment(self, segId: str = None)->dict:
+        """
+        Retrieve information about a specific segment.
+        Arguments:
+            segId : REQUIRED : Segment ID to be retrieved.
+        """
+        if segId is None:
+            raise Exception("Expected a segment ID to be passed")
+        path = f"/segments/{segId}"
+        res = await self.connector.getData(self.endpoint+path, headers=self.header)
+        return res
+
+    async def createSegment(self, name: str = None, segmentRule: str = None, folderId: int = None, dataSourceId: int = None, mergeRuleDataSourceId: int = None, integrationCode: str = None, **kwargs)->dict:
+        """
+        Create a segment based on the information provided.
+        Arguments:
+            name : REQUIRED : name of the segment
+            segmentRule : REQUIRED : rule of the segment
+            folderId : REQUIRED : Where segment is going to be located.
+            dataSourceId : REQUIRED : DataSource associated with the segment.
+            mergeRuleDataSourceId : REQUIRED : Profile merge rule associated with the segment.
+            integrationCode : OPTIONAL : integration code
+        """
+        if name is None or segmentRule is None or folderId is None or dataSourceId is None or mergeRuleDataSourceId is None:
+            raise Exception(
+                "Some REQUIRED elements were not passed. Refer to the docstring")
+        path = "/segments/"
+        obj = {
+            "name": name,
+            "segmentRule": segmentRule,
+            "folderId": str(folderId),
+            "dataSourceId": str(dataSourceId),
+            "mergeRuleDataSourceId": str(mergeRuleDataSourceId)
+        }
+        if integrationCode is not None:
+            obj["integrationCode"] = str(integrationCode)
+        for kwarg in kwargs:
+            obj[kwarg] = str(kwargs[kwarg])
+        res = await self.connector.postData(self.endpoint+path, data=obj, headers=self.header)
+        return res
+
+    async def updateSegment(self, segId: str = None, name: str = None, segmentRule: str = None, folderId: int = None, dataSourceId: int = None, mergeRuleDataSourceId: int = None, integrationCode: str = None, **kwargs)->dict:
+        """
+        update a segment based on the information provided.
+        Arguments:
+            segId : REQUIRED : segment Id to be updated
+            name : REQUIRED : name of the segment
+            segmentRule : REQUIRED : rule of the segment
+            folderId : REQUIRED : Where segment is going to be located.
+            dataSourceId : REQUIRED : DataSource associated with the segment.
+            mergeRuleDataSourceId : REQUIRED : Profile merge rule associated with the segment.
+            integrationCode : OPTIONAL : integration code
+        """
+        if segId is None:
+            raise Exception("Missing segId as parameter")
+        if name is None or segmentRule is None or folderId is None or dataSourceId is None or mergeRuleDataSourceId is None:
+            raise Exception(
+                "Some REQUIRED elements were not passed. Refer to the docstring")
+        path = f"/segments/{segId}"
+        obj = {
+            "name": name,
+            "segmentRule": segmentRule,
+            "folderId": str(folderId),
+            "dataSourceId": str(dataSourceId),
+            "mergeRuleDataSourceId": str(mergeRuleDataSourceId)
+        }
+        if integrationCode is not None:
+            obj["integrationCode"] = str(integrationCode)
+        for kwarg in kwargs:
+            obj[kwarg] = str(kwargs[kwarg])
+        res = await self.connector.putData(self.endpoint+path, data=obj, headers=self.header)
+        return res
+
+    async def deleteSegment(self, segId: str = None, intCode: str = None)->dict:
+        """
+        Delete the segment based on either segment ID or integration code.
+        Arguments:
+            segId : OPTIONAL : Segment Id to be deleted.
+            intCode : OPTIONAL : integration code of the segment to be deleted.
+        """
+        if segId is None and intCode is None:
+            raise Exception('Expecting a segment Id or an integration code')
+        if segId is not None:
+            path = f"/segments/{segId}"
+        else:
+            path = f"/segments/ic:{intCode}"
+        res = await self.connector.deleteData(self.endpoint+path, headers=self.header)
+        return res
+
+    async def getDataSources(self, inboundOnly: bool = None, outboundOnly: bool = None, integrationCode: str = None, includeThirdParty: bool = None, format: str = 'df')->object:
+        """
+        Returns the datasources for that instances.
+        Arguments:
+            inboundOnly : OPTIONAL : Filter data sources with Inbound = true.
+            outboundOnly : OPTIONAL : Filter data sources with Outbound = true.
+            integrationCode : OPTIONAL : Filter on input integration code.
+            includeThirdParty : OPTIONAL : set to True to include datasources from other companies
+            format : OPTIONAL : return a dataframe by default ("df"), but can return raw response ("raw"). Also "records" (named tuples), "arrow" or "polars", see outputs.
+        """
+        path = "/datasources/"
+        params = parameters.dataSources(inboundOnly=inboundOnly, outboundOnly=outboundOnly, integrationCode=integrationCode, includeThirdParty=includeThirdParty)
+        res = await self.connector.getData(self.endpoint+path, params=params, headers=self.header)
+        if format == "raw":
+            return res
+        return outputs.convert(res, format, 'dataSources')
+
+    async def getDestinations(self, containsSegment: str = None, includeMetrics: bool = True, format: str = 'df')->object:
+        """
+        By default return a dataframe of the different destinations used.
+        Arguments:
+            containsSegment : OPTIONAL : Segment Id that has to be used in the destinations.
+            includeMetrics : OPTIONAL : returns metrics for the destinations (default True)
+            format : OPTIONAL : by default (df) returning a dataframe of the information. Can return raw answer by setting "raw". Also "records" (named tuples), "arrow" or "polars", see outputs.
+        """
+        path = "/destinations"
+        params = parameters.destinations(containsSegment=containsSegment, includeMetrics=includeMetrics)
+        res = await self.connector.getData(self.endpoint + path, params=params, headers=self.header)
+        if format == "raw":
+            return res
+        return outputs.convert(res, format, 'destinations')
+
+    async def getDestination(self, destinationId: str = None)->dict:
+        """
+        Return a destination information based on its ID.
+        Arguments:
+            destinationId : REQUIRED : destination ID to be used.
+        """
+        if destinationId is None:
+            raise Exception("require a destination ID")
+        path = f"/destinations/{destinationId}"
+        res = await self.connector.getData(self.endpoint + path, headers=self.header)
+        return res
+
+    async def getDestinationMappings(self, destinationId: str = None, includeMetrics: bool = True, includeAddressableAudienceMetrics: bool = None, includeDeletedEntities: bool = None)->dict:
+        """
+        Returns all the destination mappings for a specific destination by 'destinationId'.
+        Arguments:
+            destinationId : REQUIRED : destination ID to look for.
+            includeMetrics : OPTIONAL : returns the metrics for the destination. (default True)
+            includeAddressableAudienceMetrics : OPTIONAL : if set to True returns the addressable audience metrics.(default None)
+            includeDeletedEntities : OPTIONAL : if set to True, return the information with deleted entities. (default None)
+        """
+        if destinationId is None:
+            raise Exception("Requires a destinationId parameter")
+        params = parameters.destinationMappings(includeMetrics=includeMetrics, includeAddressableAudienceMetrics=includeAddressableAudienceMetrics,
+                                                includeDeletedEntities=includeDeletedEntities)
+        path = f"/destinations/{destinationId}/mappings/"
+        res = await self.connector.getData(self.endpoint+path, params=params, headers=self.header)
+        return res
+
+    async def getDerivedSignals(self, format: str = 'df')->object:
+        """
+        Get the derived signals associated with this AAM instance.
+        Arguments:
+            format : OPTIONAL : return a dataframe ("df") by default , but can return raw response ("raw"). Also "records" (named tuples), "arrow" or "polars", see outputs.
+        """
+        path = "/signals/derived"
+        res = await self.connector.getData(self.endpoint + path, headers=self.header)
+        if format == "raw":
+            return res
+        return outputs.convert(res, format, 'derivedSignals')
+
+    async def getDerivedSignal(self, signalId: str = None)->dict:
+        """
+        Retrieve a single derived ID.
+        Arguments:
+            signalId : REQUIRED : Derived signal ID to be retrieved.
+        """
+        if signalId is None:
+            raise Exception("signalId argument is required")
+        path = f"/signals/derived/{signalId}"
+        res = await self.connector.getData(self.endpoint + path, headers=self.header)
+        return res
+
+    async def getModel(self, modelId: str = None)->dict:
+        """
+        Return a dictionary of the model details.
+        Arguments:
+            modelId : REQUIRED : the model ID to be retrieved.
+        """
+        if modelId is None:
+            raise Exception("Expected a model ID as parameter")
+        path = f"/models/{modelId}"
+        res = await self.connector.getData(self.endpoint + path, headers=self.header)
+        return res
+
+    async def getModelStats(self, modelId: str = None)->dict:
+        """
+        Returns accuracy and reach values for your algorithmic model.
+        Arguments:
+            modelId : REQUIRED : the model ID to be retrieved
+        """
+        if modelId is None:
+            raise Exception("Expected a model ID as parameter")
+        path = f"/models/{modelId}/runs/latest/stats"
+        res = await self.connector.getData(self.endpoint + path, headers=self.header)
+        return res
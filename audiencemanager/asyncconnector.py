@@ -0,0 +1,214 @@
+from audiencemanager import config
+from audiencemanager import connector
+from audiencemanager.modules import aiohttp
+import asyncio, time
+from typing import Union
+
+
+class AsyncAdobeRequest:
+    """
+    Handle asynchronous request to Audience Manager and taking care that the request have a valid token set each time.
+    Require the aiohttp module (pip install audiencemanager[async]).
+    """
+    RETRY_STATUS = connector.AdobeRequest.RETRY_STATUS
+    IDEMPOTENT_METHODS = connector.AdobeRequest.IDEMPOTENT_METHODS
+
+    def __init__(self, config_object: dict = config.config_object, header: dict = config.header, verbose: bool = False, maxConcurrency: int = 100, poolSize: int = 100, session: object = None, codec: object = None, **kwargs)->None:
+        """
+        Set the asynchronous connector to be used for handling request to AAM.
+        The token is retrieved with the synchronous connector, the retry and rate limiting settings are the ones of the synchronous connector.
+        Arguments:
+            config_object : OPTIONAL : Require the importConfig file to have been used.
+            header : OPTIONAL : header to be used for the requests.
+            verbose : OPTIONAL : print information if set to True.
+            maxConcurrency : OPTIONAL : maximum number of requests in flight at the same time (default 100).
+            poolSize : OPTIONAL : maximum number of connections kept open in the pool (default 100).
+            session : OPTIONAL : aiohttp.ClientSession to be used. Pass the same session to several instances to share the connection pool.
+            codec : OPTIONAL : JSON codec used for the bodies and the responses (see connector.AdobeRequest).
+        kwargs are passed to the synchronous connector (see connector.AdobeRequest), such as:
+            retry : number of retries for throttled (429) and failed (5xx) requests (default 3).
+            backoffFactor : base of the exponential backoff in seconds, when no Retry-After header is returned (default 0.5).
+            maxBackoff : maximum time to wait between 2 retries in seconds (default 60).
+            rateLimiter : RateLimiter instance limiting the requests per second, waited for without blocking the event loop.
+            tokenCache, tokenCachePath, autoRefresh : token cache settings.
+        """
+        if not aiohttp.available:
+            raise ImportError(
+                'The aiohttp module is required for the asynchronous connector. Install it with "pip install audiencemanager[async]"')
+        self.tokenConnector = connector.AdobeRequest(
+            config_object=config_object, header=header, verbose=verbose, codec=codec, **kwargs)
+        self.config = self.tokenConnector.config
+        self.header = self.tokenConnector.header
+        self.codec = self.tokenConnector.codec
+        self.retry = self.tokenConnector.retry
+        self.rateLimiter = self.tokenConnector.rateLimiter
+        self.maxConcurrency = maxConcurrency
+        self.poolSize = poolSize
+        self.session = session
+        self._ownSession = session is None
+        self._semaphore = None
+        self._tokenLock = None
+
+    async def __aenter__(self)->'AsyncAdobeRequest':
+        await self.getSession()
+        return self
+
+    async def __aexit__(self, *args)->None:
+        await self.close()
+
+    async def getSession(self)->object:
+        """
+        Return the aiohttp session used, create it if it does not exist yet.
+        It has to be created within the running event loop.
+        """
+        if self.session is None or self.session.closed:
+            connectorPool = aiohttp.TCPConnector(limit=self.poolSize, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(connector=connectorPool)
+            self._ownSession = True
+        return self.session
+
+    async def close(self)->None:
+        """
+        Close the session if it has been created by this connector.
+        """
+        if self.session is not None and self._ownSession and not self.session.closed:
+            await self.session.close()
+
+    def _getSemaphore(self)->asyncio.Semaphore:
+        """
+        Return the semaphore bounding the number of requests in flight.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.maxConcurrency)
+        return self._semaphore
+
+    async def _checkingDate(self)->None:
+        """
+        Checking if the token is still valid, renew it in a thread if it is not.
+        """
+        if time.time() <= self.config['date_limit']:
+            return
+        if self._tokenLock is None:
+            self._tokenLock = asyncio.Lock()
+        async with self._tokenLock:
+            if time.time() > self.config['date_limit']:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, self.tokenConnector._checkingDate)
+
+    def _renewToken(self, stale: str)->None:
+        """
+        Retrieve a new token after a 401 response, unless another request already did.
+        """
+        token = self.tokenConnector.tokenManager.getToken(stale=stale, metrics=self.tokenConnector.metrics)
+        self.tokenConnector._setToken(token, self.tokenConnector.tokenManager.date_limit)
+
+    def _prepareParams(self, params: dict = None)->list:
+        """
+        Transform the params into a list of tuples accepted by aiohttp.
+        Booleans are passed as strings and lists are passed as repeated parameters.
+        """
+        if params is None:
+            return None
+        list_params = []
+        for key, value in params.items():
+            values = value if type(value) == list else [value]
+            for val in values:
+                if type(val) == bool:
+                    val = str(val)
+                list_params.append((key, val))
+        return list_params
+
+    async def _send(self, method: str, endpoint: str, params: list = None, body: bytes = None, headers: dict = None)->tuple:
+        """
+        Send the request, waiting for the rate limiter if one is set, and return the status code and the content of the response.
+        The retry policy is the one of connector.AdobeRequest: throttled requests (429) are retried for all methods, server errors and
+        connection errors only for the idempotent methods (GET, PUT, DELETE). The Retry-After header is used when provided.
+        """
+        session = await self.getSession()
+        attempt = 0
+        tokenRefreshed = False
+        while True:
+            if self.rateLimiter is not None:
+                await self.rateLimiter.acquireAsync()
+            try:
+                async with self._getSemaphore():
+                    async with session.request(method, endpoint, headers=headers, params=params, data=body) as res:
+                        status_code = res.status
+                        content = await res.read()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.retry or method not in self.IDEMPOTENT_METHODS:
+                    raise
+                await asyncio.sleep(self.tokenConnector._retryDelay(attempt=attempt))
+                attempt += 1
+                continue
+            if status_code == 401 and tokenRefreshed == False:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, self._renewToken, self.tokenConnector.token)
+                if headers is not self.header:
+                    headers = dict(headers, Authorization=self.header['Authorization'])
+                tokenRefreshed = True
+                continue
+            if status_code == 429:
+                if self.rateLimiter is not None:
+                    self.rateLimiter.onThrottle()
+            elif status_code not in self.RETRY_STATUS or method not in self.IDEMPOTENT_METHODS:
+                if self.rateLimiter is not None:
+                    self.rateLimiter.onSuccess()
+                return status_code, content
+            if attempt >= self.retry:
+                return status_code, content
+            await asyncio.sleep(self.tokenConnector._retryDelay(res, attempt))
+            attempt += 1
+
+    async def _request(self, method: str, endpoint: str, params: dict = None, data: Union[dict, list] = None, headers: dict = None, verbose: bool = True)->dict:
+        """
+        Send the request and return the JSON response.
+        """
+        await self._checkingDate()
+        if headers is None:
+            headers = self.header
+        body = None
+        if data is not None:
+            body = self.codec.dumps(data)
+        status_code, content = await self._send(method, endpoint, params=self._prepareParams(params), body=body, headers=headers)
+        try:
+            res_json = self.codec.loads(content)
+        except ValueError:
+            if verbose and method != 'DELETE':
+                print("error")
+                print(content.decode('utf-8', errors='replace'))
+            if method in ['POST', 'DELETE'] and status_code >= 200 and status_code < 300:
+                res_json = {'success': f'no json - status code : {status_code}'}
+            else:
+                res_json = {'error': 'Request Error'}
+        return res_json
+
+    async def getData(self, endpoint: str, params: dict = None, data: dict = None, headers: dict = None, *args, **kwargs)->dict:
+        """
+        Abstraction for getting data
+        """
+        return await self._request('GET', endpoint, params=params, data=data, headers=headers, verbose=kwargs.get('verbose', True))
+
+    async def postData(self, endpoint: str, params: dict = None, data: dict = None, headers: dict = None, *args, **kwargs)->dict:
+        """
+        Abstraction for posting data
+        """
+        return await self._request('POST', endpoint, params=params, data=data, headers=headers, verbose=kwargs.get('verbose', True))
+
+    async def patchData(self, endpoint: str, params: dict = None, data=None, headers: dict = None, *args, **kwargs)->dict:
+        """
+        Abstraction for patching data
+        """
+        return await self._request('PATCH', endpoint, params=params, data=data, headers=headers, verbose=kwargs.get('verbose', True))
+
+    async def putData(self, endpoint: str, params: dict = None, data=None, headers: dict = None, *args, **kwargs)->dict:
+        """
+        Abstraction for putting data
+        """
+        return await self._request('PUT', endpoint, params=params, data=data, headers=headers, verbose=kwargs.get('verbose', True))
+
+    async def deleteData(self, endpoint: str, params: dict = None, headers: dict = None, *args, **kwargs)->dict:
+        """
+        Abstraction for deleting data
+        """
+        return await self._request('DELETE', endpoint, params=params, headers=headers, verbose=kwargs.get('verbose', True))
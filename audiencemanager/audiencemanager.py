@@ -1,8 +1,20 @@
+from __future__ import annotations
 from audiencemanager import config
 from audiencemanager import connector
-from copy import deepcopy
-import json
-import pandas as pd
+from audiencemanager import mirror
+from audiencemanager import index
+from audiencemanager import foldertree
+from audiencemanager import traitrule
+from audiencemanager import dependency
+from audiencemanager import plan
+from audiencemanager import parameters
+from audiencemanager import frames
+from audiencemanager import export
+from audiencemanager import outputs
+from audiencemanager.modules import pd
+from concurrent.futures import ThreadPoolExecutor
+import json, time
+
 
 class AudienceManager:
     """
@@ -10,57 +22,179 @@ class AudienceManager:
     Calling this class will generate automatically a token to request the API later on.
     """
 
-    def __init__(self, config_object: dict = config.config_object)->None:
+    def __init__(self, config_object: dict = config.config_object, typedFrames: bool = False, **kwargs)->None:
         """
         Instantiate the Audience Manager class.
-        """
-        self.config = deepcopy(config_object)
+        Arguments:
+            config_object : OPTIONAL : configuration object to be used (default the one loaded by importConfigFile).
+            typedFrames : OPTIONAL : if set to True, the dataframes of the list methods are typed and compact (see frames.toDataFrame):
+                flattened metrics, smallest integer types, categoricals and parsed timestamps (default False).
+        kwargs are passed to the connector (see connector.AdobeRequest), such as:
+            sessionPool : SessionPool instance to share the HTTP connections between several AudienceManager instances.
+            poolSize : size of the connection pool per host when no sessionPool is passed (default 10).
+            retry : number of retries for throttled (429) and failed (5xx) requests (default 3).
+            rateLimiter : RateLimiter instance limiting the number of requests per second, can be shared between instances.
+            lazy : if set to True, no request is done during the instantiation, the token is retrieved on the first request.
+            prefetchToken : used with lazy, start retrieving the token in a background thread right away.
+            cache : ResponseCache instance (or True for the default one) caching the responses of the read endpoints.
+            codec : JSON codec, "json" or "orjson" (default orjson when it is installed, pip install audiencemanager[fast]).
+            compressThreshold : size in bytes above which the request bodies are sent compressed with gzip (default None).
+            recorder : Recorder instance recording the responses, or replaying them without any network access.
+            metrics : Metrics instance receiving the request, retry, token, decode and output events (see metrics module).
+        """
+        self.config = dict(config_object)
         self.connector = connector.AdobeRequest(
-            config_object=config_object)
+            config_object=config_object, **kwargs)
         self.endpoint = "https://aam.adobe.io/v1"
+        self.legacyEndpoint = "https://api.demdex.com/v1"  # used by deleteBulkTraits
         self.header = self.connector.header
+        self.sessionPool = self.connector.sessionPool
+        self.cache = self.connector.cache
+        self.traitRuleValidations = {}
+        self.typedFrames = typedFrames
 
     def _loop_folders(self, obj: dict, ids: list = None, names=None, parentids: list = None, folderCounts: list = None, paths: list = None)->tuple:
         """Loop function to retrieve id, names, ParentFolderID, FolderID, folderCount, path.
         Returns the tuple containing the elements in that order.
-        """
-        if ids is None:
-            ids = list()
-        else:
-            ids = ids
-        if names is None:
-            names = list()
-        else:
-            names = names
-        if parentids is None:
-            parentids = list()
-        else:
-            parentids = parentids
-        if folderCounts is None:
-            folderCounts = list()
-        else:
-            folderCounts = folderCounts
-        if paths is None:
-            paths = list()
-        else:
-            paths = paths
-        if type(obj) == list:
-            for o in obj:
-                self._loop_folders(o, ids=ids, names=names, parentids=parentids,
-                                   folderCounts=folderCounts, paths=paths)  # recursive loop
-        if type(obj) == dict:
-            if 'folderId' in obj.keys():
-                ids.append(obj['folderId'])
-                names.append(obj['name'])
-                parentids.append(obj['parentFolderId'])
-                folderCounts.append(obj.get('folderCount', 0))
-                paths.append(obj.get('path', ''))
-            if 'subFolders' in obj.keys():
-                self._loop_folders(obj['subFolders'], ids=ids, names=names,
-                                   parentids=parentids, folderCounts=folderCounts, paths=paths)  # recursion
+        Kept for compatibility, use the foldertree.FolderTree class instead.
+        """
+        ids = list() if ids is None else ids
+        names = list() if names is None else names
+        parentids = list() if parentids is None else parentids
+        folderCounts = list() if folderCounts is None else folderCounts
+        paths = list() if paths is None else paths
+        tree = foldertree.FolderTree(obj)
+        ids.extend(tree.ids.tolist())
+        names.extend(tree.names.tolist())
+        parentids.extend(tree.parentIds.tolist())
+        folderCounts.extend(tree.folderCounts.tolist())
+        paths.extend(tree.apiPaths.tolist())
         return ids, names, parentids, folderCounts, paths
 
-    def getTraits(self, folderId: int = None, includeMetrics:bool=True,integrationCode: str = None, dataSourceIds: list = None, includeDetails: bool = False, format: str = 'df',save:bool=False)->object:
+    def _getList(self, path: str, params: dict = None, pageSize: int = None, prefetch: int = 0)->object:
+        """
+        Request a list endpoint. If a pageSize is passed, all of the pages are requested and concatenated.
+        Arguments:
+            path : REQUIRED : path of the endpoint.
+            params : OPTIONAL : parameters of the request.
+            pageSize : OPTIONAL : number of elements per page. The response is not paginated if not set.
+            prefetch : OPTIONAL : number of next pages requested in parallel while the current one is processed.
+        """
+        if pageSize is None:
+            return self.connector.getData(self.endpoint + path, params=params, headers=self.header)
+        res = []
+        for elements in self.connector.getPages(self.endpoint + path, params=params, headers=self.header, pageSize=pageSize, prefetch=prefetch):
+            res += elements
+        return res
+
+    def _toDataFrame(self, res: list, kind: str)->pd.DataFrame:
+        """
+        Return the dataframe of a list response, typed with the schema of that kind when typedFrames is set.
+        """
+        return self._output(res, 'df', kind)
+
+    def _output(self, res: list, format: str, kind: str = None)->object:
+        """
+        Return a list response in the format requested, one of the outputs.OUTPUTS formats (df, raw, records, arrow, polars).
+        """
+        metrics = self.connector.metrics
+        if metrics is None or format == 'raw':
+            return outputs.convert(res, format, kind, typed=self.typedFrames)
+        start = time.perf_counter()
+        output = outputs.convert(res, format, kind, typed=self.typedFrames)
+        metrics.emit('output', kind=kind, format=format, rows=len(res) if type(res) == list else None, seconds=time.perf_counter() - start)
+        return output
+
+    def _fanOut(self, func: callable, ids: list = None, max_workers: int = 10, format: str = 'raw', idName: str = 'id')->object:
+        """
+        Call the function passed for each of the ids in parallel over a pool of threads.
+        The results are returned in the same order than the ids. An exception raised for an id does not stop the other requests,
+        it is returned as a dictionary with an "error" key in place of the result.
+        Arguments:
+            func : REQUIRED : function to call with the id as single argument.
+            ids : REQUIRED : list of ids to be requested.
+            max_workers : OPTIONAL : number of threads used (default 10). Should not be higher than the connection pool size.
+            format : OPTIONAL : "raw" returns the list of results (default), "df" returns a dataframe with one row per id (or another outputs format).
+            idName : OPTIONAL : name of the column containing the requested id in the dataframe.
+        """
+        if ids is None or type(ids) != list:
+            raise Exception("Require a list of ids")
+
+        def safeCall(elementId):
+            try:
+                return func(elementId)
+            except Exception as e:
+                return {'error': str(e), idName: elementId}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(safeCall, ids))
+        if format != "raw":
+            records = []
+            for elementId, result in zip(ids, results):
+                if type(result) == dict:
+                    record = dict(result)
+                else:
+                    record = {'result': result}
+                record[idName] = elementId
+                records.append(record)
+            return outputs.convert(records, format)
+        return results
+
+    def _bulkDelete(self, endpoint: str, ids: list, listIds: callable, chunkSize: int = 100, max_workers: int = 5, retry: int = 1, verbose: bool = False)->pd.DataFrame:
+        """
+        Delete the ids by chunks sent in parallel, then list the remaining objects to verify which ids have been deleted,
+        and send the ids not deleted again (only those). The ids that do not exist before the deletion are not sent.
+        Returns a dataframe with one row per id: id, status, deleted, attempts, response (response of the last chunk containing the id).
+        The status is "deleted", "notFound" (did not exist before the deletion), "notDeleted" (still exists after the retries)
+        or "unverified" (the listing of the objects failed after the ids have been sent).
+        Arguments:
+            endpoint : REQUIRED : URL of the bulk-delete endpoint.
+            ids : REQUIRED : list of ids to delete.
+            listIds : REQUIRED : function returning the ids that currently exist.
+            chunkSize : OPTIONAL : number of ids per request (default 100).
+            max_workers : OPTIONAL : number of parallel requests (default 5).
+            retry : OPTIONAL : number of times the ids not deleted are sent again (default 1).
+            verbose : OPTIONAL : print information if set to True.
+        """
+        results = {elementId: {'id': elementId, 'status': 'notDeleted', 'deleted': False, 'attempts': 0, 'response': None} for elementId in ids}
+        existing = {str(elementId) for elementId in listIds()}  # nothing has been sent yet, an error can be raised
+        for elementId in results:
+            if str(elementId) not in existing:
+                results[elementId]['status'] = 'notFound'
+        remaining = [elementId for elementId in results if results[elementId]['status'] == 'notDeleted']
+        if verbose and len(remaining) < len(results):
+            print(f"{len(results) - len(remaining)} ids not found")
+        for attempt in range(retry + 1):
+            if len(remaining) == 0:
+                break
+            chunks = [remaining[start:start + chunkSize] for start in range(0, len(remaining), chunkSize)]
+            if verbose:
+                print(f"Deleting {len(remaining)} ids in {len(chunks)} requests")
+            responses = self._fanOut(lambda chunk: self.connector.postData(endpoint, data=chunk, headers=self.header, verbose=verbose),
+                                     chunks, max_workers=max_workers)
+            for chunk, response in zip(chunks, responses):
+                for elementId in chunk:
+                    results[elementId]['attempts'] += 1
+                    results[elementId]['response'] = response
+            try:
+                existing = {str(elementId) for elementId in listIds()}
+            except Exception as e:
+                if verbose:
+                    print(f"The deletion of {len(remaining)} ids could not be verified: {e}")
+                for elementId in remaining:
+                    results[elementId]['status'] = 'unverified'
+                break
+            for elementId in remaining:
+                if str(elementId) not in existing:
+                    results[elementId]['status'] = 'deleted'
+                    results[elementId]['deleted'] = True
+            remaining = [elementId for elementId in remaining if results[elementId]['status'] == 'notDeleted']
+            if verbose and len(remaining) > 0:
+                print(f"{len(remaining)} ids not deleted")
+        df = pd.DataFrame(list(results.values()), columns=['id', 'status', 'deleted', 'attempts', 'response'])
+        return df
+
+    def getTraits(self, folderId: int = None, includeMetrics:bool=True,integrationCode: str = None, dataSourceIds: list = None, includeDetails: bool = False, format: str = 'df',save:bool=False, pageSize: int = None, prefetch: int = 0, saveFormat: str = None, savePath: str = None, partitionBy: str = None)->object:
         """
         Return traits following the parameters provided.
         Can return 2 type of result, a dataframe or a list. 
@@ -70,38 +204,51 @@ class AudienceManager:
             integrationCode : OPTIONAL : Returns traits that contain this integration code.
             dataSourceId : OPTIONAL : List of dataSourceIds. Returns traits that belong to the selected data sources.  
             includeDetails : OPTIONAL : For True, returns additional details for the traits. Additional returned values include ttl,integrationCode, comments, traitRule, traitRuleVersion, and type.
-            format : OPTIONAL : default "df" that returns a dataframe, you can also return the raw format ("raw")
+            format : OPTIONAL : default "df" that returns a dataframe, you can also return the raw format ("raw"). Also "records" (named tuples), "arrow" or "polars", see outputs.
             save : OPTIONAL : if set to true, create a file to save the data.
+            saveFormat : OPTIONAL : used with save, write the data in parquet, feather, ndjson (gzipped), csv or json (see export.save).
+                By default a csv file is written for the dataframe and a json file for the raw format.
+            savePath : OPTIONAL : used with saveFormat, path of the file (default: traits + extension in the working directory).
+            partitionBy : OPTIONAL : used with saveFormat, column used to write one file per value (ex: "folderId", "dataSourceId").
+            pageSize : OPTIONAL : if set, the elements are requested by pages of that size and all of the pages are returned.
+            prefetch : OPTIONAL : used with pageSize, number of next pages requested in parallel (default 0).
         """
         path = "/traits/"
-        params = {}
-        if includeMetrics:
-            params["includeMetrics"] = includeMetrics
-        if folderId is not None:
-            params["folderId"] = folderId
-        if integrationCode is not None:
-            params["integrationCode"] = integrationCode
-        if includeDetails:
-            params["includeDetails"] = True
-        if type(dataSourceIds) == list:
-            if len(dataSourceIds) == 1:
-                params["dataSourceId"] = dataSourceIds[0]
-            else:
-                list_dsids = [str(dsid) for dsid in dataSourceIds]
-                string = "&dataSourceId=".join(list_dsids)
-                params["dataSourceId"] = string
-        res = self.connector.getData(
-            self.endpoint+path, params=params, headers=self.header)
+        params = parameters.traits(folderId=folderId, includeMetrics=includeMetrics, integrationCode=integrationCode,
+                                   dataSourceIds=dataSourceIds, includeDetails=includeDetails)
+        res = self._getList(path, params=params, pageSize=pageSize, prefetch=prefetch)
+        if save and saveFormat is not None:
+            export.save(res, 'traits', saveFormat=saveFormat, savePath=savePath, partitionBy=partitionBy)
+            save = False  # already saved
         if format == "raw":
             if save:
                 with open('traits.json', "w") as f:
                     f.write(json.dumps(res,indent=2))
             return res
         elif format == "df":
-            df = pd.DataFrame(res)
+            df = self._toDataFrame(res, 'traits')
             if save:
                 df.to_csv('traits.csv',index=False)
             return df
+        else:
+            return self._output(res, format, 'traits')
+
+    def iterTraits(self, folderId: int = None, includeMetrics: bool = True, integrationCode: str = None, dataSourceIds: list = None, includeDetails: bool = False, chunkSize: int = 65536)->object:
+        """
+        Iterate over the traits following the parameters provided.
+        The traits are yielded one by one while the response is downloaded, so memory stays flat whatever the number of traits.
+        Arguments:
+            folderId : OPTIONAL : Only return traits from the selected folder.
+            includeMetrics : OPTIONAL : Include the trait population (default True)
+            integrationCode : OPTIONAL : Returns traits that contain this integration code.
+            dataSourceIds : OPTIONAL : List of dataSourceIds. Returns traits that belong to the selected data sources.
+            includeDetails : OPTIONAL : For True, returns additional details for the traits.
+            chunkSize : OPTIONAL : size of the chunks read from the network (default 64kB).
+        """
+        path = "/traits/"
+        params = parameters.traits(folderId=folderId, includeMetrics=includeMetrics, integrationCode=integrationCode,
+                                   dataSourceIds=dataSourceIds, includeDetails=includeDetails)
+        return self.connector.streamData(self.endpoint+path, params=params, headers=self.header, chunkSize=chunkSize)
 
     def getTrait(self, traitId: str = None, intCode: str = None)->dict:
         """
@@ -123,6 +270,17 @@ class AudienceManager:
                 self.endpoint+path, headers=self.header)
             return res
 
+    def getTraitsByIds(self, traitIds: list = None, max_workers: int = 10, format: str = 'raw')->object:
+        """
+        Return the traits for a list of trait IDs, requested in parallel.
+        Results are returned in the same order than the traitIds, errors are returned per trait.
+        Arguments:
+            traitIds : REQUIRED : list of trait IDs
+            max_workers : OPTIONAL : number of parallel requests (default 10)
+            format : OPTIONAL : "raw" returns a list (default), "df" returns a dataframe (or "records", "arrow", "polars", see outputs).
+        """
+        return self._fanOut(lambda traitId: self.getTrait(traitId=traitId), traitIds, max_workers=max_workers, format=format, idName='traitId')
+
     def deleteTrait(self, traitId: str = None, intCode: str = None)->str:
         """
         Delete a trait based on its Trait ID or its integration Code.
@@ -140,24 +298,33 @@ class AudienceManager:
         res = self.connector.deleteData(self.endpoint+path, headers=self.header)
         return res
 
-    def deleteBulkTraits(self, traitIds: list = None, verbose:bool=False) -> str:
+    def deleteBulkTraits(self, traitIds: list = None, verbose:bool=False, chunkSize: int = None, max_workers: int = 5, retry: int = 1) -> str:
         """
         Delete the traits passed in the traitIds list parameter.
-        Careful old endpoint used here and inconsistent result returned.
+        Careful old endpoint used here (legacyEndpoint attribute) and inconsistent result returned.
         Error can be return but the job has been processed.
+        Use the chunkSize parameter to know which traits have actually been deleted.
         Arguments:
             traitIds : REQUIRED : list of trait Ids to be deleted
             verbose : OPTIONAL : print information if set to true. 
+            chunkSize : OPTIONAL : if set, the ids are sent by chunks of that size in parallel, the traits are listed afterwards
+                to verify which ones have been deleted and the others are sent again.
+                Returns a dataframe with one row per id (id, status, deleted, attempts, response).
+            max_workers : OPTIONAL : used with chunkSize, number of parallel requests (default 5).
+            retry : OPTIONAL : used with chunkSize, number of times the traits not deleted are sent again (default 1).
         """
         path = "/traits/bulk-delete"
         if traitIds is None or type(traitIds) != list:
             raise Exception(
                 'Require a list of ids to be deleted in traitIds parameter')
         data = [el for el in traitIds]
+        if chunkSize is not None:
+            listIds = lambda: [trait['sid'] for trait in self.iterTraits(includeMetrics=False)]
+            return self._bulkDelete(f"{self.legacyEndpoint}{path}", data, listIds, chunkSize=chunkSize, max_workers=max_workers, retry=retry, verbose=verbose)
         if verbose:
             print(f"Deleting {len(data)} traits")
         res = self.connector.postData(
-            f"https://api.demdex.com/v1{path}", data=data, headers=self.header,verbose=verbose)
+            f"{self.legacyEndpoint}{path}", data=data, headers=self.header,verbose=verbose)
         return res
 
     def getTraitLimit(self)->dict:
@@ -178,6 +345,17 @@ class AudienceManager:
         res = self.connector.getData(self.endpoint+path, headers=self.header)
         return res
 
+    def getTraitVersionsByIds(self, traitIds: list = None, max_workers: int = 10, format: str = 'raw')->object:
+        """
+        Return the change history of the trait rules for a list of trait IDs, requested in parallel.
+        Results are returned in the same order than the traitIds, errors are returned per trait.
+        Arguments:
+            traitIds : REQUIRED : list of trait IDs
+            max_workers : OPTIONAL : number of parallel requests (default 10)
+            format : OPTIONAL : "raw" returns a list (default), "df" returns a dataframe (or "records", "arrow", "polars", see outputs).
+        """
+        return self._fanOut(self.getTraitVersion, traitIds, max_workers=max_workers, format=format, idName='traitId')
+
     def validateTraitRule(self, rule: str = None)->dict:
         """
         Validate a rule logic.
@@ -192,6 +370,61 @@ class AudienceManager:
             self.endpoint+path, data=obj, headers=self.header)
         return res
 
+    def validateTraitRules(self, rules: list = None, max_workers: int = 10, format: str = 'raw')->object:
+        """
+        Validate a list of rule logics. The rules are parsed locally first, only the valid ones that have not been validated before
+        are sent to the API, in parallel. The API responses are kept in the traitRuleValidations attribute, keyed on the hash of the rule.
+        Results are returned in the same order than the rules, a rule rejected locally or failing to be requested is returned as
+        a dictionary with an "error" key.
+        Arguments:
+            rules : REQUIRED : list of strings representing your trait rules
+            max_workers : OPTIONAL : number of parallel requests (default 10)
+            format : OPTIONAL : "raw" returns a list (default), "df" returns a dataframe (or "records", "arrow", "polars", see outputs).
+        """
+        if rules is None or type(rules) != list:
+            raise Exception("Require a list of rules")
+        hashes = []
+        toValidate = {}
+        for rule in rules:
+            try:
+                parsed = traitrule.TraitRule(rule)
+            except ValueError as e:
+                hashes.append({'error': str(e), 'rule': rule, 'local': True})
+                continue
+            hashes.append(parsed.hash)
+            if parsed.hash not in self.traitRuleValidations and parsed.hash not in toValidate:
+                toValidate[parsed.hash] = rule
+
+        def validate(ruleHash):
+            try:
+                return True, self.validateTraitRule(toValidate[ruleHash])
+            except Exception as e:
+                return False, {'error': str(e), 'rule': toValidate[ruleHash]}
+
+        failed = {}
+        if len(toValidate) > 0:
+            for ruleHash, (success, result) in zip(toValidate, self._fanOut(validate, list(toValidate), max_workers=max_workers)):
+                if success:
+                    self.traitRuleValidations[ruleHash] = result
+                else:
+                    failed[ruleHash] = result
+        results = []
+        for ruleHash in hashes:
+            if type(ruleHash) == dict:
+                results.append(ruleHash)
+            elif ruleHash in failed:
+                results.append(failed[ruleHash])
+            else:
+                results.append(self.traitRuleValidations[ruleHash])
+        if format != "raw":
+            records = []
+            for rule, result in zip(rules, results):
+                record = dict(result) if type(result) == dict else {'result': result}
+                record['rule'] = rule
+                records.append(record)
+            return outputs.convert(records, format)
+        return results
+
     def createTrait(self, name: str = None, traitType: str = None, dataSourceId: int = None, folderId: int = None, traitRule: str = None, ttl: int = 120, **kwargs)->dict:
         """
         Create Traits based on the information passed.
@@ -220,7 +453,7 @@ class AudienceManager:
         if traitType not in ["RULE_BASED_TRAIT", "ON_BOARDED_TRAIT", "ALGO_TRAIT"]:
             raise ValueError(
                 "traitType should be one of the following value [RULE_BASED_TRAIT, ON_BOARDED_TRAIT, ALGO_TRAIT]")
-        path = "​/traits​"
+        path = "/traits"
         obj = {
             "name": name,
             "traitType": traitType,
@@ -236,6 +469,81 @@ class AudienceManager:
             self.endpoint + path, data=obj, headers=self.header)
         return res
 
+    def createTraitsBulk(self, traits: object = None, max_workers: int = 10, batch_size: int = 1000, skipExisting: bool = False, verbose: bool = False)->pd.DataFrame:
+        """
+        Create many traits in parallel. The rows are validated before any request is sent.
+        Returns a dataframe aligned with the input (one row per trait, same order) with the columns:
+            name, integrationCode, status (created, skipped, invalid, error), sid, error.
+        The requests follow the retry and rateLimiter settings of the instance.
+        Arguments:
+            traits : REQUIRED : dataframe or iterable of dictionaries, with the createTrait arguments as columns / keys
+                (name, traitType, dataSourceId, folderId, traitRule, ttl, integrationCode, description, ...).
+            max_workers : OPTIONAL : number of parallel requests (default 10). Should not be higher than the connection pool size.
+            batch_size : OPTIONAL : number of traits sent per batch (default 1000), the progress is printed after each batch with verbose.
+            skipExisting : OPTIONAL : do not create the traits whose integration code already exists (default False).
+                The sid of the existing trait is returned.
+            verbose : OPTIONAL : print information if set to True.
+        """
+        if traits is None:
+            raise Exception("Require a dataframe or a list of traits")
+        if hasattr(traits, 'to_dict'):
+            traits = traits.to_dict(orient='records')
+        rows = []
+        for trait in traits:
+            row = {key: frames.cellValue(value) for key, value in trait.items()}
+            rows.append({key: value for key, value in row.items() if value is not None})
+        results = [{'name': row.get('name'), 'integrationCode': row.get('integrationCode'), 'status': None, 'sid': None, 'error': None}
+                   for row in rows]
+        existing = {}
+        if skipExisting:
+            for trait in self.iterTraits(includeMetrics=False, includeDetails=True):
+                if trait.get('integrationCode'):
+                    existing[trait['integrationCode']] = trait['sid']
+        seenCodes = set()
+        toCreate = []
+        for position, (row, result) in enumerate(zip(rows, results)):
+            error = None
+            if any(row.get(key) is None for key in ['name', 'traitType', 'dataSourceId', 'folderId']):
+                error = 'Require a name, a dataSourceId, a traitType and a folderId'
+            elif row['traitType'] not in ["RULE_BASED_TRAIT", "ON_BOARDED_TRAIT", "ALGO_TRAIT"]:
+                error = "traitType should be one of the following value [RULE_BASED_TRAIT, ON_BOARDED_TRAIT, ALGO_TRAIT]"
+            elif row['traitType'] == 'RULE_BASED_TRAIT' and not row.get('traitRule'):
+                error = 'Require a traitRule for a RULE_BASED_TRAIT'
+            elif row['traitType'] == 'RULE_BASED_TRAIT':
+                try:
+                    traitrule.TraitRule(row['traitRule'])
+                except ValueError as e:
+                    error = str(e)
+            integrationCode = row.get('integrationCode')
+            if error is None and integrationCode is not None:
+                if integrationCode in existing:
+                    result['status'], result['sid'] = 'skipped', existing[integrationCode]
+                    continue
+                if integrationCode in seenCodes:
+                    error = f"Duplicated integrationCode in the input: {integrationCode}"
+                seenCodes.add(integrationCode)
+            if error is not None:
+                result['status'], result['error'] = 'invalid', error
+                continue
+            toCreate.append(position)
+
+        def create(position):
+            return self.createTrait(**rows[position])
+
+        for start in range(0, len(toCreate), batch_size):
+            batch = toCreate[start:start + batch_size]
+            for position, res in zip(batch, self._fanOut(create, batch, max_workers=max_workers)):
+                result = results[position]
+                if type(res) == dict and res.get('sid') is not None:
+                    result['status'], result['sid'] = 'created', res['sid']
+                else:
+                    result['status'], result['error'] = 'error', res.get('error', json.dumps(res)) if type(res) == dict else str(res)
+            if verbose:
+                print(f"{min(start + batch_size, len(toCreate))} / {len(toCreate)} traits sent")
+        df = pd.DataFrame(results, columns=['name', 'integrationCode', 'status', 'sid', 'error'])
+        df['sid'] = df['sid'].astype('Int64')
+        return df
+
     def updateTrait(self, name: str = None, traitId: str = None, traitType: int = None, folderId: str = None, dataSourceId: int = None, ** kwargs):
         """
         Update the trait based on its ID.
@@ -290,18 +598,17 @@ class AudienceManager:
         if format == "raw":
             return res
         elif format == "df":
-            ids, names, parentids, folderCounts, paths = self._loop_folders(
-                res)
-            dict_folders = {
-                'folderId': ids,
-                'name': names,
-                'parentFolderId': parentids,
-                'path': paths,
-                'folderCounts': folderCounts
-            }
-            df = pd.DataFrame(dict_folders)
+            df = foldertree.FolderTree(res).toDataFrame()
             return df
 
+    def getTraitFolderTree(self, includeThirdParty: bool = None)->foldertree.FolderTree:
+        """
+        Returns the Trait folders as a FolderTree, for parent, ancestor, descendant and path lookups.
+        Arguments:
+            includeThirdParty : OPTIONAL : For True, returns folders that store third-party traits.
+        """
+        return foldertree.FolderTree(self.getTraitFolders(includeThirdParty=includeThirdParty, format='raw'))
+
     def createTraitFolder(self, name: str = None, parentFolderId: int = 0)->dict:
         """
         Create a Folder Trait.
@@ -356,7 +663,7 @@ class AudienceManager:
             self.endpoint+path, data=obj, headers=self.header)
         return res
 
-    def getSegments(self, includeInUseStatus: bool = None, status: str = None, containsTrait: int = None, dataSourceId: int = None, mergeRuleDataSourceId: int = None, includeMetrics: bool = True, includeTraitDataSourceIds: bool = False, includeAddressableAudienceMetrics: bool = False, format: str = 'df',save:bool=False)->object:
+    def getSegments(self, includeInUseStatus: bool = None, status: str = None, containsTrait: int = None, dataSourceId: int = None, mergeRuleDataSourceId: int = None, includeMetrics: bool = True, includeTraitDataSourceIds: bool = False, includeAddressableAudienceMetrics: bool = False, format: str = 'df',save:bool=False, pageSize: int = None, prefetch: int = 0, saveFormat: str = None, savePath: str = None, partitionBy: str = None)->object:
         """
         Returns either a list or a dataframe of segments depending the type of output you select.
         Arguments:
@@ -368,38 +675,48 @@ class AudienceManager:
             includeMetrics : OPTIONAL : For true, returns segment population metrics in the API response. (default True)
             includeTraitDataSourceIds : OPTIONAL : For true, returns the data source IDs of the traits that build up this segment. (default False)
             includeAddressableAudienceMetrics : OPTIONAL : For true, returns addressable audience metrics in the API response (default False)
-            format : OPTIONAL : by default returns a dataframe ("df"), can return the list by putting "raw"
+            format : OPTIONAL : by default returns a dataframe ("df"), can return the list by putting "raw". Also "records" (named tuples), "arrow" or "polars", see outputs.
             save : OPTIONAL : if set to True will save the data in a file.
+            saveFormat : OPTIONAL : used with save, write the data in parquet, feather, ndjson (gzipped), csv or json (see export.save).
+                By default a csv file is written for the dataframe and a json file for the raw format.
+            savePath : OPTIONAL : used with saveFormat, path of the file (default: segments + extension in the working directory).
+            partitionBy : OPTIONAL : used with saveFormat, column used to write one file per value (ex: "folderId", "dataSourceId").
+            pageSize : OPTIONAL : if set, the elements are requested by pages of that size and all of the pages are returned.
+            prefetch : OPTIONAL : used with pageSize, number of next pages requested in parallel (default 0).
         """
         path = "/segments"
-        params = {}
-        if includeMetrics:
-            params['includeMetrics'] = True
-        if includeTraitDataSourceIds:
-            params['includeTraitDataSourceIds'] = True
-        if includeAddressableAudienceMetrics:
-            params['includeAddressableAudienceMetrics'] = True
-        if status is None:
-            if status == "ACTIVE" or status == "INACTIVE":
-                params['status'] = status
-        if includeInUseStatus:
-            params['includeInUseStatus'] = True
-        if containsTrait is not None:
-            params['containsTrait'] = containsTrait
-        if mergeRuleDataSourceId is not None:
-            params["mergeRuleDataSourceId"] = mergeRuleDataSourceId
-        res = self.connector.getData(
-            self.endpoint+path, params=params, headers=self.header)
+        params = parameters.segments(includeInUseStatus=includeInUseStatus, status=status, containsTrait=containsTrait, dataSourceId=dataSourceId,
+                                     mergeRuleDataSourceId=mergeRuleDataSourceId, includeMetrics=includeMetrics, includeTraitDataSourceIds=includeTraitDataSourceIds,
+                                     includeAddressableAudienceMetrics=includeAddressableAudienceMetrics)
+        res = self._getList(path, params=params, pageSize=pageSize, prefetch=prefetch)
+        if save and saveFormat is not None:
+            export.save(res, 'segments', saveFormat=saveFormat, savePath=savePath, partitionBy=partitionBy)
+            save = False  # already saved
         if format == "raw":
             if save:
                 with open("segment.json", 'w') as f:
                     f.write(json.dumps(res,indent=2))
             return res
         elif format == "df":
-            df = pd.DataFrame(res)
+            df = self._toDataFrame(res, 'segments')
             if save:
                 df.to_csv('segments.csv',index=False)
             return df
+        else:
+            return self._output(res, format, 'segments')
+
+    def iterSegments(self, includeInUseStatus: bool = None, status: str = None, containsTrait: int = None, dataSourceId: int = None, mergeRuleDataSourceId: int = None, includeMetrics: bool = True, includeTraitDataSourceIds: bool = False, includeAddressableAudienceMetrics: bool = False, chunkSize: int = 65536)->object:
+        """
+        Iterate over the segments following the parameters provided.
+        The segments are yielded one by one while the response is downloaded, see getSegments for the arguments.
+        Arguments:
+            chunkSize : OPTIONAL : size of the chunks read from the network (default 64kB).
+        """
+        path = "/segments"
+        params = parameters.segments(includeInUseStatus=includeInUseStatus, status=status, containsTrait=containsTrait, dataSourceId=dataSourceId,
+                                     mergeRuleDataSourceId=mergeRuleDataSourceId, includeMetrics=includeMetrics, includeTraitDataSourceIds=includeTraitDataSourceIds,
+                                     includeAddressableAudienceMetrics=includeAddressableAudienceMetrics)
+        return self.connector.streamData(self.endpoint+path, params=params, headers=self.header, chunkSize=chunkSize)
 
     def getSegment(self, segId: str)->dict:
         """
@@ -409,10 +726,21 @@ class AudienceManager:
         """
         if segId is None:
             raise Exception("Expected a segment ID to be passed")
-        path = f"segments/{segId}"
+        path = f"/segments/{segId}"
         res = self.connector.getData(self.endpoint+path, headers=self.header)
         return res
 
+    def getSegmentsByIds(self, segIds: list = None, max_workers: int = 10, format: str = 'raw')->object:
+        """
+        Return the segments for a list of segment IDs, requested in parallel.
+        Results are returned in the same order than the segIds, errors are returned per segment.
+        Arguments:
+            segIds : REQUIRED : list of segment IDs
+            max_workers : OPTIONAL : number of parallel requests (default 10)
+            format : OPTIONAL : "raw" returns a list (default), "df" returns a dataframe (or "records", "arrow", "polars", see outputs).
+        """
+        return self._fanOut(self.getSegment, segIds, max_workers=max_workers, format=format, idName='segId')
+
     def getSegmentLimits(self)->dict:
         """
         Get Segement limitation
@@ -441,18 +769,26 @@ class AudienceManager:
                 self.endpoint+path, headers=self.header)
             return res
 
-    def deleteBulkSegments(self, segmentIds: list = None,verbose:bool=False):
+    def deleteBulkSegments(self, segmentIds: list = None,verbose:bool=False, chunkSize: int = None, max_workers: int = 5, retry: int = 1):
         """
         Delete the list of segments passed in the parameter.
         Arguments:
             segmentIds : REQUIRED : list of the segment id to be deleted.
             verbose : OPTIONAL : Prn information if set to True.
+            chunkSize : OPTIONAL : if set, the ids are sent by chunks of that size in parallel, the segments are listed afterwards
+                to verify which ones have been deleted and the others are sent again.
+                Returns a dataframe with one row per id (id, status, deleted, attempts, response).
+            max_workers : OPTIONAL : used with chunkSize, number of parallel requests (default 5).
+            retry : OPTIONAL : used with chunkSize, number of times the segments not deleted are sent again (default 1).
         """
         path = "/segments/bulk-delete"
         if segmentIds is None or type(segmentIds) != list:
             raise Exception(
                 'Require a list of ids to be deleted in traitIds parameter')
         data = [el for el in segmentIds]
+        if chunkSize is not None:
+            listIds = lambda: [segment['sid'] for segment in self.iterSegments(includeMetrics=False)]
+            return self._bulkDelete(self.endpoint + path, data, listIds, chunkSize=chunkSize, max_workers=max_workers, retry=retry, verbose=verbose)
         if verbose:
             print(f"Deleting {len(data)} Segments")
         res = self.connector.postData(
@@ -553,18 +889,15 @@ class AudienceManager:
         if format == "raw":
             return res
         elif format == "df":
-            ids, names, parentids, folderCounts, paths = self._loop_folders(
-                res)
-            dict_folders = {
-                'folderId': ids,
-                'name': names,
-                'parentFolderId': parentids,
-                'path': paths,
-                'folderCounts': folderCounts
-            }
-            df = pd.DataFrame(dict_folders)
+            df = foldertree.FolderTree(res).toDataFrame()
             return df
 
+    def getSegmentFolderTree(self)->foldertree.FolderTree:
+        """
+        Returns the Segment folders as a FolderTree, for parent, ancestor, descendant and path lookups.
+        """
+        return foldertree.FolderTree(self.getSegmentFolders(format='raw'))
+
     def createSegmentFolder(self, name: str = None, parentFolderId: int = 0)->dict:
         """
         Create a Folder Segment.
@@ -620,7 +953,7 @@ class AudienceManager:
         return res
 
     def getDataSources(self, inboundOnly: bool = None, outboundOnly: bool = None, integrationCode: str = None, includeThirdParty: bool = None, modelingEnabled: bool = None,
-                       availableForContainersOnly: bool = None, excludeReportSuites: bool = None, format: str = 'df',save:bool=False)->dict:
+                       availableForContainersOnly: bool = None, excludeReportSuites: bool = None, format: str = 'df',save:bool=False, saveFormat: str = None, savePath: str = None)->dict:
         """ 
         Returns the datasources for that instances.
         Arguments:
@@ -631,37 +964,45 @@ class AudienceManager:
             modelingEnabled : OPTIONAL : set to True to only return datasources with modeling enabled.
             availableForContainersOnly : OPTIONAL : Filter data sources that is available for creating containers.
             excludeReportSuites : OPTIONAL : Exclude Report Suite DataSources in the result.
-            format : OPTIONAL : return a dataframe by default ("df"), but can return raw response ("raw")
+            format : OPTIONAL : return a dataframe by default ("df"), but can return raw response ("raw"). Also "records" (named tuples), "arrow" or "polars", see outputs.
             save : OPTIONAL : if set to True, save in a file.(default False)
+            saveFormat : OPTIONAL : used with save, write the data in parquet, feather, ndjson (gzipped), csv or json (see export.save).
+                By default a csv file is written for the dataframe and a json file for the raw format.
+            savePath : OPTIONAL : used with saveFormat, path of the file (default: datasources + extension in the working directory).
         """
         path = "/datasources/"
-        params = {}
-        if inboundOnly:
-            params["inboundOnly"] = inboundOnly
-        if outboundOnly:
-            params["outboundOnly"] = outboundOnly
-        if integrationCode is not None:
-            params["integrationCode"] = integrationCode
-        if includeThirdParty:
-            params["includeThirdParty"] = includeThirdParty
-        if modelingEnabled:
-            params["modelingEnabled"] = modelingEnabled
-        if availableForContainersOnly:
-            params["availableForContainersOnly"] = availableForContainersOnly
-        if excludeReportSuites:
-            params["excludeReportSuites"] = excludeReportSuites
+        params = parameters.dataSources(inboundOnly=inboundOnly, outboundOnly=outboundOnly, integrationCode=integrationCode, includeThirdParty=includeThirdParty,
+                                        modelingEnabled=modelingEnabled, availableForContainersOnly=availableForContainersOnly, excludeReportSuites=excludeReportSuites)
         res = self.connector.getData(
             self.endpoint+path, params=params, headers=self.header)
+        if save and saveFormat is not None:
+            export.save(res, 'datasources', saveFormat=saveFormat, savePath=savePath)
+            save = False  # already saved
         if format == "raw":
             if save: 
                 with open('datasources.json', 'w') as f:
                     f.write(json.dumps(res))
             return res
         elif format == "df":
-            df = pd.DataFrame(res)
+            df = self._toDataFrame(res, 'dataSources')
             if save:
                 df.to_csv('datasources.csv',index=False)
             return df
+        else:
+            return self._output(res, format, 'dataSources')
+
+    def iterDataSources(self, inboundOnly: bool = None, outboundOnly: bool = None, integrationCode: str = None, includeThirdParty: bool = None, modelingEnabled: bool = None,
+                        availableForContainersOnly: bool = None, excludeReportSuites: bool = None, chunkSize: int = 65536)->object:
+        """
+        Iterate over the data sources following the parameters provided.
+        The data sources are yielded one by one while the response is downloaded, see getDataSources for the arguments.
+        Arguments:
+            chunkSize : OPTIONAL : size of the chunks read from the network (default 64kB).
+        """
+        path = "/datasources/"
+        params = parameters.dataSources(inboundOnly=inboundOnly, outboundOnly=outboundOnly, integrationCode=integrationCode, includeThirdParty=includeThirdParty,
+                                        modelingEnabled=modelingEnabled, availableForContainersOnly=availableForContainersOnly, excludeReportSuites=excludeReportSuites)
+        return self.connector.streamData(self.endpoint+path, params=params, headers=self.header, chunkSize=chunkSize)
 
     def deleteDataSource(self, dataSourceId: str = None)->str:
         """
@@ -676,15 +1017,24 @@ class AudienceManager:
             self.endpoint+path, headers=self.header)
         return res
 
-    def deleteDataSourceBulk(self, dataSourceIds: list = None)->str:
+    def deleteDataSourceBulk(self, dataSourceIds: list = None, chunkSize: int = None, max_workers: int = 5, retry: int = 1, verbose: bool = False)->str:
         """
         Delete several data sources based on id passed. 
         Arguments:
             dataSourceIds : REQUIRED : list of dataSource ID to be deleted
+            chunkSize : OPTIONAL : if set, the ids are sent by chunks of that size in parallel, the data sources are listed afterwards
+                to verify which ones have been deleted and the others are sent again.
+                Returns a dataframe with one row per id (id, status, deleted, attempts, response).
+            max_workers : OPTIONAL : used with chunkSize, number of parallel requests (default 5).
+            retry : OPTIONAL : used with chunkSize, number of times the data sources not deleted are sent again (default 1).
+            verbose : OPTIONAL : used with chunkSize, print information if set to True.
         """
         if dataSourceIds is None or type(dataSourceIds) is not list:
             raise Exception("require a list of Data Source ID as a parameter")
         path = "/datasources/bulk-delete"
+        if chunkSize is not None:
+            listIds = lambda: [dataSource['dataSourceId'] for dataSource in self.iterDataSources()]
+            return self._bulkDelete(self.endpoint + path, dataSourceIds, listIds, chunkSize=chunkSize, max_workers=max_workers, retry=retry, verbose=verbose)
         res = self.connector.postData(
             self.endpoint+path, data=dataSourceIds, headers=self.header)
         return res
@@ -731,7 +1081,7 @@ class AudienceManager:
             self.endpoint+path, params=params, headers=self.header)
         return res
 
-    def getMostChangedTraits(self, interval: str = "1D", cutOff: int = 0, restrictType: str = None, format: str = 'raw',save:bool=False)->dict:
+    def getMostChangedTraits(self, interval: str = "1D", cutOff: int = 0, restrictType: str = None, format: str = 'raw',save:bool=False, pageSize: int = None, prefetch: int = 0, saveFormat: str = None, savePath: str = None)->dict:
         """
         returns information about the most changed traits for a given interval. 
         The response include compacted trait information, along with the trait metrics and deltas. 
@@ -741,28 +1091,37 @@ class AudienceManager:
             cutOff : OPTIONAL : specifies cutOff for total uniques needed in order for the trait to be qualified for consideration. Default is set to 0
             restrictType : OPTIONAL : The trait type this list should be restricted to. Valid values are RULE_BASED_TRAIT, ON_BOARDED_TRAIT, and ALGO_TRAIT.
             By default, the response would be computed over all trait types.
-            format : OPTIONAL : return raw response by default ("raw"), but can return a dataframe ("df")
+            format : OPTIONAL : return raw response by default ("raw"), but can return a dataframe ("df"). Also "records" (named tuples), "arrow" or "polars", see outputs.
             save : OPTIONAL : If set to True, will save the data in a file. (default False)
+            saveFormat : OPTIONAL : used with save, write the data in parquet, feather, ndjson (gzipped), csv or json (see export.save).
+                By default a csv file is written for the dataframe and a json file for the raw format.
+            savePath : OPTIONAL : used with saveFormat, path of the file (default: mostChangedTraits + extension in the working directory).
+            pageSize : OPTIONAL : if set, the elements are requested by pages of that size and all of the pages are returned.
+            prefetch : OPTIONAL : used with pageSize, number of next pages requested in parallel (default 0).
         """
         path = "/reports/most-changed-traits"
-        params = {'interval': interval, "cutOff": 0}
+        params = {'interval': interval, "cutOff": cutOff}
         if restrictType is not None:
             if restrictType in ["RULE_BASED_TRAIT", "ON_BOARDED_TRAIT", "ALGO_TRAIT"]:
                 params['restrictType'] = restrictType
-        res = self.connector.getData(
-            self.endpoint+path, params=params, headers=self.header)
+        res = self._getList(path, params=params, pageSize=pageSize, prefetch=prefetch)
+        if save and saveFormat is not None:
+            export.save(res, 'mostChangedTraits', saveFormat=saveFormat, savePath=savePath)
+            save = False  # already saved
         if format == "raw":
             if save:
                 with open('mostChangedTraits.json', 'w') as f:
                     f.write(json.dumps(res,indent=2))
             return res
         elif format == "df":
-            df = pd.DataFrame(res)
+            df = self._toDataFrame(res, 'reports')
             if save:
                 df.to_csv('mostChangedTraits.csv')
             return df
+        else:
+            return self._output(res, format, 'reports')
 
-    def getMostChangedSegments(self, interval: str = "1D", cutOff: int = 0, format: str = 'raw',save:bool=False)->dict:
+    def getMostChangedSegments(self, interval: str = "1D", cutOff: int = 0, format: str = 'raw',save:bool=False, pageSize: int = None, prefetch: int = 0, saveFormat: str = None, savePath: str = None)->dict:
         """
         returns information about the most changed segments for a given interval. 
         The response include segments, along with the segment metrics and deltas. Pagination, and Sorting supported. 
@@ -770,25 +1129,34 @@ class AudienceManager:
         Arguments:
             interval : OPTIONAL : Interval for which most changed segments are computed. Valid values are (1D/7D/14D/30D/60D). Default value set to 1D.
             cutOff : OPTIONAL : specifies cutOff for total uniques needed in order for the segment to be qualified for consideration. Default is set to 0
-            format : OPTIONAL : return raw response by default ("raw"), but can return a dataframe ("df")
+            format : OPTIONAL : return raw response by default ("raw"), but can return a dataframe ("df"). Also "records" (named tuples), "arrow" or "polars", see outputs.
             save : OPTIONAL : If set to True, will save the data in a file. (default False)
-        """
-        path = "/reports//most-changed-segments"
-        params = {'interval': interval, "cutOff": 0}
-        res = self.connector.getData(
-            self.endpoint+path, params=params, headers=self.header)
+            saveFormat : OPTIONAL : used with save, write the data in parquet, feather, ndjson (gzipped), csv or json (see export.save).
+                By default a csv file is written for the dataframe and a json file for the raw format.
+            savePath : OPTIONAL : used with saveFormat, path of the file (default: mostChangedSegments + extension in the working directory).
+            pageSize : OPTIONAL : if set, the elements are requested by pages of that size and all of the pages are returned.
+            prefetch : OPTIONAL : used with pageSize, number of next pages requested in parallel (default 0).
+        """
+        path = "/reports/most-changed-segments"
+        params = {'interval': interval, "cutOff": cutOff}
+        res = self._getList(path, params=params, pageSize=pageSize, prefetch=prefetch)
+        if save and saveFormat is not None:
+            export.save(res, 'mostChangedSegments', saveFormat=saveFormat, savePath=savePath)
+            save = False  # already saved
         if format == "raw":
             if save:
                 with open('mostChangedSegments.json', 'w') as f:
                     f.write(json.dumps(res,indent=2))
             return res
         elif format == "df":
-            df = pd.DataFrame(res)
+            df = self._toDataFrame(res, 'reports')
             if save:
                 df.to_csv('mostChangedSegments.csv')
             return df
+        else:
+            return self._output(res, format, 'reports')
 
-    def getLargestTraits(self, interval: str = "1D", cutOff: int = 0, restrictType: str = None, format: str = 'raw',save:bool=False)->dict:
+    def getLargestTraits(self, interval: str = "1D", cutOff: int = 0, restrictType: str = None, format: str = 'raw',save:bool=False, pageSize: int = None, prefetch: int = 0, saveFormat: str = None, savePath: str = None)->dict:
         """
         Returns information about the largest traits for a given interval. The response include compacted trait information, along with the trait metrics. 
         Pagination, and Sorting supported. 
@@ -798,28 +1166,37 @@ class AudienceManager:
             cutOff : OPTIONAL : specifies cutOff for total uniques needed in order for the trait to be qualified for consideration. Default is set to 0
             restrictType : OPTIONAL : The trait type this list should be restricted to. Valid values are RULE_BASED_TRAIT, ON_BOARDED_TRAIT, and ALGO_TRAIT.
             By default, the response would be computed over all trait types.
-            format : OPTIONAL : return raw response by default ("raw"), but can return a dataframe ("df")
+            format : OPTIONAL : return raw response by default ("raw"), but can return a dataframe ("df"). Also "records" (named tuples), "arrow" or "polars", see outputs.
             save : OPTIONAL : If set to True, will save the data in a file. (default False)
+            saveFormat : OPTIONAL : used with save, write the data in parquet, feather, ndjson (gzipped), csv or json (see export.save).
+                By default a csv file is written for the dataframe and a json file for the raw format.
+            savePath : OPTIONAL : used with saveFormat, path of the file (default: LargestTraits + extension in the working directory).
+            pageSize : OPTIONAL : if set, the elements are requested by pages of that size and all of the pages are returned.
+            prefetch : OPTIONAL : used with pageSize, number of next pages requested in parallel (default 0).
         """
         path = "/reports/largest-traits"
-        params = {'interval': interval, "cutOff": 0}
+        params = {'interval': interval, "cutOff": cutOff}
         if restrictType is not None:
             if restrictType in ["RULE_BASED_TRAIT", "ON_BOARDED_TRAIT", "ALGO_TRAIT"]:
                 params['restrictType'] = restrictType
-        res = self.connector.getData(
-            self.endpoint+path, params=params, headers=self.header)
+        res = self._getList(path, params=params, pageSize=pageSize, prefetch=prefetch)
+        if save and saveFormat is not None:
+            export.save(res, 'LargestTraits', saveFormat=saveFormat, savePath=savePath)
+            save = False  # already saved
         if format == "raw":
             if save:
                 with open('LargestTraits.json', 'w') as f:
                     f.write(json.dumps(res,indent=2))
             return res
         elif format == "df":
-            df = pd.DataFrame(res)
+            df = self._toDataFrame(res, 'reports')
             if save:
                 df.to_csv('LargestTraits.csv')
             return df
+        else:
+            return self._output(res, format, 'reports')
 
-    def getLargestSegments(self, interval: str = "1D", cutOff: int = 0, format: str = 'raw',save:bool=False)->dict:
+    def getLargestSegments(self, interval: str = "1D", cutOff: int = 0, format: str = 'raw',save:bool=False, pageSize: int = None, prefetch: int = 0, saveFormat: str = None, savePath: str = None)->dict:
         """
         Returns information about the largest segments for a given interval. The response include segments, along with the segment metrics and deltas. 
         Pagination, and Sorting supported. 
@@ -829,25 +1206,34 @@ class AudienceManager:
             cutOff : OPTIONAL : specifies cutOff for total uniques needed in order for the trait to be qualified for consideration. Default is set to 0
             restrictType : OPTIONAL : The trait type this list should be restricted to. Valid values are RULE_BASED_TRAIT, ON_BOARDED_TRAIT, and ALGO_TRAIT.
             By default, the response would be computed over all trait types.
-            format : OPTIONAL : return raw response by default ("raw"), but can return a dataframe ("df")
+            format : OPTIONAL : return raw response by default ("raw"), but can return a dataframe ("df"). Also "records" (named tuples), "arrow" or "polars", see outputs.
             save : OPTIONAL : If set to True, will save the data in a file. (default False)
+            saveFormat : OPTIONAL : used with save, write the data in parquet, feather, ndjson (gzipped), csv or json (see export.save).
+                By default a csv file is written for the dataframe and a json file for the raw format.
+            savePath : OPTIONAL : used with saveFormat, path of the file (default: LargestSegments + extension in the working directory).
+            pageSize : OPTIONAL : if set, the elements are requested by pages of that size and all of the pages are returned.
+            prefetch : OPTIONAL : used with pageSize, number of next pages requested in parallel (default 0).
         """
         path = "/reports/largest-segments"
-        params = {'interval': interval, "cutOff": 0}
-        res = self.connector.getData(
-            self.endpoint+path, params=params, headers=self.header)
+        params = {'interval': interval, "cutOff": cutOff}
+        res = self._getList(path, params=params, pageSize=pageSize, prefetch=prefetch)
+        if save and saveFormat is not None:
+            export.save(res, 'LargestSegments', saveFormat=saveFormat, savePath=savePath)
+            save = False  # already saved
         if format == "raw":
             if save:
                 with open('LargestSegments.json', 'w') as f:
                     f.write(json.dumps(res,indent=2))
             return res
         elif format == "df":
-            df = pd.DataFrame(res)
+            df = self._toDataFrame(res, 'reports')
             if save:
                 df.to_csv('LargestSegments.csv')
             return df
+        else:
+            return self._output(res, format, 'reports')
 
-    def getDestinations(self,containsSegment:str=None,includeMasterDataSourceIdType:bool=None,includeMetrics:bool=True,includeAddressableAudienceMetrics:bool=False,format:str='df',save:bool=False) -> object:
+    def getDestinations(self,containsSegment:str=None,includeMasterDataSourceIdType:bool=None,includeMetrics:bool=True,includeAddressableAudienceMetrics:bool=False,format:str='df',save:bool=False, pageSize: int = None, prefetch: int = 0, saveFormat: str = None, savePath: str = None) -> object:
         """
         By default return a dataframe of the different destinations used.
         Arguments:
@@ -855,31 +1241,46 @@ class AudienceManager:
             includeMasterDataSourceIdType : OPTIONAL : If set to true, it includes the Master Data Source ID
             includeMetrics : OPTIONAL : returns metrics for the destinations (default True)
             includeAddressableAudienceMetrics : OPTIONAL : returns the addressable audience information (default False)
-            format : OPTIONAL : by default (df) returning a dataframe of the information. Can return raw answer by setting "raw".
+            format : OPTIONAL : by default (df) returning a dataframe of the information. Can return raw answer by setting "raw". Also "records" (named tuples), "arrow" or "polars", see outputs.
             save : OPTIONAL : If set to True, will save the data in a file. (default False)
+            saveFormat : OPTIONAL : used with save, write the data in parquet, feather, ndjson (gzipped), csv or json (see export.save).
+                By default a csv file is written for the dataframe and a json file for the raw format.
+            savePath : OPTIONAL : used with saveFormat, path of the file (default: destinations + extension in the working directory).
+            pageSize : OPTIONAL : if set, the elements are requested by pages of that size and all of the pages are returned.
+            prefetch : OPTIONAL : used with pageSize, number of next pages requested in parallel (default 0).
         """
         path = "/destinations"
-        params = {}
-        if includeMasterDataSourceIdType:
-            params["includeMasterDataSourceIdType"] = includeMasterDataSourceIdType
-        if includeMetrics:
-            params["includeMetrics"] = includeMetrics
-        if includeAddressableAudienceMetrics:
-            params["includeAddressableAudienceMetrics"] = includeAddressableAudienceMetrics
-        if containsSegment is not None:
-            params["containsSegment"] = containsSegment
-        res = self.connector.getData(self.endpoint + path, params=params, headers=self.header)
+        params = parameters.destinations(containsSegment=containsSegment, includeMasterDataSourceIdType=includeMasterDataSourceIdType,
+                                         includeMetrics=includeMetrics, includeAddressableAudienceMetrics=includeAddressableAudienceMetrics)
+        res = self._getList(path, params=params, pageSize=pageSize, prefetch=prefetch)
+        if save and saveFormat is not None:
+            export.save(res, 'destinations', saveFormat=saveFormat, savePath=savePath)
+            save = False  # already saved
         if format == "raw":
             if save:
                 with open('destinations.json', 'w') as f:
                     f.write(json.dumps(res,indent=2))
             return res
         elif format == "df":
-            df = pd.DataFrame(res)
+            df = self._toDataFrame(res, 'destinations')
             if save:
                 df.to_csv('destinations.csv')
             return df
+        else:
+            return self._output(res, format, 'destinations')
     
+    def iterDestinations(self, containsSegment: str = None, includeMasterDataSourceIdType: bool = None, includeMetrics: bool = True, includeAddressableAudienceMetrics: bool = False, chunkSize: int = 65536)->object:
+        """
+        Iterate over the destinations following the parameters provided.
+        The destinations are yielded one by one while the response is downloaded, see getDestinations for the arguments.
+        Arguments:
+            chunkSize : OPTIONAL : size of the chunks read from the network (default 64kB).
+        """
+        path = "/destinations"
+        params = parameters.destinations(containsSegment=containsSegment, includeMasterDataSourceIdType=includeMasterDataSourceIdType,
+                                         includeMetrics=includeMetrics, includeAddressableAudienceMetrics=includeAddressableAudienceMetrics)
+        return self.connector.streamData(self.endpoint + path, params=params, headers=self.header, chunkSize=chunkSize)
+
     def getDestinationsLimits(self)->dict:
         """
         Return the limit of the destination.
@@ -912,6 +1313,17 @@ class AudienceManager:
         res = self.connector.getData(self.endpoint + path, headers=self.header)
         return res
 
+    def getDestinationsByIds(self, destinationIds: list = None, max_workers: int = 10, format: str = 'raw')->object:
+        """
+        Return the destinations for a list of destination IDs, requested in parallel.
+        Results are returned in the same order than the destinationIds, errors are returned per destination.
+        Arguments:
+            destinationIds : REQUIRED : list of destination IDs
+            max_workers : OPTIONAL : number of parallel requests (default 10)
+            format : OPTIONAL : "raw" returns a list (default), "df" returns a dataframe (or "records", "arrow", "polars", see outputs).
+        """
+        return self._fanOut(self.getDestination, destinationIds, max_workers=max_workers, format=format, idName='destinationId')
+
     def deleteDestination(self, destinationId: str = None)->str:
         """
         Delete a destination based on its ID.
@@ -966,13 +1378,8 @@ class AudienceManager:
         """
         if destinationId is None:
             raise Exception("Requires a destinationId parameter")
-        params = {}
-        if includeMetrics:
-            params["includeMetrics"] = includeMetrics
-        if includeAddressableAudienceMetrics:
-            params["includeAddressableAudienceMetrics"] = includeAddressableAudienceMetrics
-        if includeDeletedEntities:
-            params["includeDeletedEntities"] = includeDeletedEntities
+        params = parameters.destinationMappings(includeMetrics=includeMetrics, includeAddressableAudienceMetrics=includeAddressableAudienceMetrics,
+                                                includeDeletedEntities=includeDeletedEntities)
         path = f"/destinations/{destinationId}/mappings/"
         res = self.connector.getData(self.endpoint+path, params=params, headers=self.header)
         return res
@@ -1022,26 +1429,39 @@ class AudienceManager:
         res = self.connector.getData(self.endpoint + path, params=params, headers=self.header)
         return res
 
-    def getDerivedSignals(self,format:str='df',save:bool=False)->object:
+    def getDerivedSignals(self,format:str='df',save:bool=False, pageSize: int = None, prefetch: int = 0)->object:
         """
         Get the derived signals associated with this AAM instance.
         Arguments:
-            format : OPTIONAL : return a dataframe ("df") by default , but can return raw response ("raw")
+            format : OPTIONAL : return a dataframe ("df") by default , but can return raw response ("raw"). Also "records" (named tuples), "arrow" or "polars", see outputs.
             save : OPTIONAL : if set to True, save the data in a file (default False)
+            pageSize : OPTIONAL : if set, the elements are requested by pages of that size and all of the pages are returned.
+            prefetch : OPTIONAL : used with pageSize, number of next pages requested in parallel (default 0).
         """
         path = "/signals/derived"
-        res = self.connector.getData(self.endpoint + path, headers=self.header)
+        res = self._getList(path, pageSize=pageSize, prefetch=prefetch)
         if format == "raw":
             if save:
                 with open('derivedSignals.json', 'w') as f:
                     f.write(json.dumps(res,indent=2))
             return res
         elif format == "df":
-            df = pd.DataFrame(res)
+            df = self._toDataFrame(res, 'derivedSignals')
             if save:
                 df.to_csv('derivedSignals.csv',index=False)
             return df
+        else:
+            return self._output(res, format, 'derivedSignals')
     
+    def iterDerivedSignals(self, chunkSize: int = 65536)->object:
+        """
+        Iterate over the derived signals, yielded one by one while the response is downloaded.
+        Arguments:
+            chunkSize : OPTIONAL : size of the chunks read from the network (default 64kB).
+        """
+        path = "/signals/derived"
+        return self.connector.streamData(self.endpoint + path, headers=self.header, chunkSize=chunkSize)
+
     def getDerivedSignal(self, signalId: str = None) -> dict:
         """
         Retrieve a single derived ID.
@@ -1053,6 +1473,17 @@ class AudienceManager:
         path = f"/signals/derived/{signalId}"
         res = self.connector.getData(self.endpoint + path, headers=self.header)
         return res
+
+    def getDerivedSignalsByIds(self, signalIds: list = None, max_workers: int = 10, format: str = 'raw')->object:
+        """
+        Return the derived signals for a list of signal IDs, requested in parallel.
+        Results are returned in the same order than the signalIds, errors are returned per signal.
+        Arguments:
+            signalIds : REQUIRED : list of derived signal IDs
+            max_workers : OPTIONAL : number of parallel requests (default 10)
+            format : OPTIONAL : "raw" returns a list (default), "df" returns a dataframe (or "records", "arrow", "polars", see outputs).
+        """
+        return self._fanOut(self.getDerivedSignal, signalIds, max_workers=max_workers, format=format, idName='signalId')
     
     def deleteDerivedSignal(self, signalId: str = None) -> str:
         """
@@ -1119,7 +1550,7 @@ class AudienceManager:
         res = self.connector.putData(self.endpoint + path, data=obj, headers=self.header)
         return res
     
-    def getModels(self, search: str = None,includeDataSources:bool=False,usesDataSource:bool=False,containsSeedFromDataSource:bool=False,save:bool=False,**kwargs)->object:
+    def getModels(self, search: str = None,includeDataSources:bool=False,usesDataSource:bool=False,containsSeedFromDataSource:bool=False,save:bool=False,saveFormat: str = None, savePath: str = None, format: str = 'df',**kwargs)->object:
         """
         This returns the algorithmic traits and their summary.
         Arguments:
@@ -1128,9 +1559,16 @@ class AudienceManager:
             usesDataSource : OPTIONAL : Returns models that use this data source ID.
             containsSeedFromDataSource : OPTIONAL : Returns information about the models that uses a trait or segment from this data source ID as a baseline seed.
             save : OPTIONAL : if set to True, create a file to save the result.
+            saveFormat : OPTIONAL : used with save, write the data in parquet, feather, ndjson (gzipped), csv or json (see export.save).
+                By default a csv file is written for the dataframe and a json file for the raw format.
+            savePath : OPTIONAL : used with saveFormat, path of the file (default: models + extension in the working directory).
+            format : OPTIONAL : by default returns a dataframe ("df"), can return the list ("raw"), "records" (named tuples), "arrow" or "polars", see outputs.
+        possible kwargs:
+            pageSize : number of models requested per page (default 100), all of the pages are returned.
+            prefetch : number of next pages requested in parallel (default 0).
         """
         path = "/models"
-        params = {"pageSize":kwargs.get("pageSize",100)}
+        params = {}
         if search:
             params["search"] = search
         if includeDataSources:
@@ -1139,8 +1577,18 @@ class AudienceManager:
             params["usesDataSource"] = usesDataSource
         if containsSeedFromDataSource:
             params["containsSeedFromDataSource"] = containsSeedFromDataSource
-        res = self.connector.getData(self.endpoint + path, headers=self.header, params=params)
-        df = pd.DataFrame(res)
+        res = self._getList(path, params=params, pageSize=kwargs.get("pageSize", 100), prefetch=kwargs.get("prefetch", 0))
+        if save and saveFormat is not None:
+            export.save(res, 'models', saveFormat=saveFormat, savePath=savePath)
+            save = False  # already saved
+        if format == "raw":
+            if save:
+                with open('models.json', 'w') as f:
+                    f.write(json.dumps(res,indent=2))
+            return res
+        elif format != "df":
+            return self._output(res, format, 'models')
+        df = self._toDataFrame(res, 'models')
         if save:
             df.to_csv('models.csv',index=False)
         return df
@@ -1168,13 +1616,24 @@ class AudienceManager:
         path = f"/models/{modelId}"
         res = self.connector.getData(self.endpoint + path, headers=self.header)
         return res
+
+    def getModelsByIds(self, modelIds: list = None, max_workers: int = 10, format: str = 'raw')->object:
+        """
+        Return the model details for a list of model IDs, requested in parallel.
+        Results are returned in the same order than the modelIds, errors are returned per model.
+        Arguments:
+            modelIds : REQUIRED : list of model IDs
+            max_workers : OPTIONAL : number of parallel requests (default 10)
+            format : OPTIONAL : "raw" returns a list (default), "df" returns a dataframe (or "records", "arrow", "polars", see outputs).
+        """
+        return self._fanOut(self.getModel, modelIds, max_workers=max_workers, format=format, idName='modelId')
     
     def getModelTraits(self, modelId: str = None, format:str='df') -> object:
         """
         Returns the most influencial traits used in a specific models.
         Arguments:
             modelId : REQUIRE : the model ID to be retrieved
-            format : OPTIONAL : by default returns a dataframe ("df"), can return the default list "raw".
+            format : OPTIONAL : by default returns a dataframe ("df"), can return the default list "raw". Also "records" (named tuples), "arrow" or "polars", see outputs.
         """
         if modelId is None:
             raise Exception("Expected a model ID as parameter")
@@ -1183,8 +1642,10 @@ class AudienceManager:
         if format == "raw":
             return res
         elif format == "df":
-            df = pd.DataFrame(res)
+            df = self._toDataFrame(res, 'modelTraits')
             return df
+        else:
+            return self._output(res, format, 'modelTraits')
 
     def getModelStats(self, modelId: str = None) -> dict:
         """
@@ -1196,4 +1657,116 @@ class AudienceManager:
             raise Exception("Expected a model ID as parameter")
         path = f"/models/{modelId}/runs/latest/stats"
         res = self.connector.getData(self.endpoint + path, headers=self.header)
-        return res
\ No newline at end of file
+        return res
+
+    def getModelStatsByIds(self, modelIds: list = None, max_workers: int = 10, format: str = 'raw')->object:
+        """
+        Return the accuracy and reach values for a list of model IDs, requested in parallel.
+        Results are returned in the same order than the modelIds, errors are returned per model.
+        Arguments:
+            modelIds : REQUIRED : list of model IDs
+            max_workers : OPTIONAL : number of parallel requests (default 10)
+            format : OPTIONAL : "raw" returns a list (default), "df" returns a dataframe (or "records", "arrow", "polars", see outputs).
+        """
+        return self._fanOut(self.getModelStats, modelIds, max_workers=max_workers, format=format, idName='modelId')
+
+    def sync(self, db_path: str = 'aam_mirror.db', objects: list = None, max_workers: int = 5, verbose: bool = False)->mirror.Mirror:
+        """
+        Synchronize a local SQLite mirror of the traits, segments, folders, destinations and destination mappings.
+        After the first full load, only the changed objects are written and the deleted ones are flagged.
+        Returns the Mirror instance that can be used to query the objects locally (see mirror.Mirror).
+        Arguments:
+            db_path : OPTIONAL : path of the SQLite file (default "aam_mirror.db").
+            objects : OPTIONAL : list of object types to synchronize (default all): traits, segments, traitFolders, segmentFolders, destinations, destinationMappings.
+            max_workers : OPTIONAL : number of parallel requests for the destination mappings (default 5).
+            verbose : OPTIONAL : print information if set to True.
+        """
+        localMirror = mirror.Mirror(db_path)
+        localMirror.sync(self, objects=objects, max_workers=max_workers, verbose=verbose)
+        return localMirror
+
+    def getTraitIndex(self, **kwargs)->index.TraitIndex:
+        """
+        Return a TraitIndex built from a single getTraits request, for fast lookups by sid, integration code, name, data source and folder.
+        kwargs are passed to the getTraits method (ex: folderId, dataSourceIds, pageSize).
+        """
+        kwargs['format'] = 'raw'
+        kwargs.setdefault('includeDetails', True)
+        return index.TraitIndex(self.getTraits(**kwargs))
+
+    def getSegmentIndex(self, **kwargs)->index.SegmentIndex:
+        """
+        Return a SegmentIndex built from a single getSegments request, for fast lookups by sid, integration code, name, data source and folder.
+        kwargs are passed to the getSegments method (ex: dataSourceId, pageSize).
+        """
+        kwargs['format'] = 'raw'
+        return index.SegmentIndex(self.getSegments(**kwargs))
+
+    def getDependencyGraph(self, graph: dependency.DependencyGraph = None, max_workers: int = 5, verbose: bool = False)->dependency.DependencyGraph:
+        """
+        Return a DependencyGraph between the data sources, traits, segments and destinations, to find the objects impacted by a change
+        without requesting the API per object (see dependency.DependencyGraph).
+        Arguments:
+            graph : OPTIONAL : graph returned by a previous call, only the objects that changed are updated.
+            max_workers : OPTIONAL : number of parallel requests for the destination mappings (default 5).
+            verbose : OPTIONAL : print information if set to True.
+        """
+        if graph is None:
+            graph = dependency.DependencyGraph()
+        graph.refresh(self, max_workers=max_workers, verbose=verbose)
+        return graph
+
+    def planTraits(self, desired: object = None, current: list = None, fields: list = None)->plan.Plan:
+        """
+        Compare the desired traits with the current ones and return the Plan of the traits to update (see plan.makePlan).
+        Arguments:
+            desired : REQUIRED : dataframe or list of dictionaries of the desired traits, identified by sid or integrationCode.
+            current : OPTIONAL : current traits, requested when not provided.
+            fields : OPTIONAL : list of the fields compared (default all of the updatable fields).
+        """
+        if desired is None:
+            raise Exception("Require the desired traits")
+        if current is None:
+            current = list(self.iterTraits(includeMetrics=False, includeDetails=True))
+        return plan.makePlan('traits', desired, current, fields=fields)
+
+    def planSegments(self, desired: object = None, current: list = None, fields: list = None)->plan.Plan:
+        """
+        Compare the desired segments with the current ones and return the Plan of the segments to update (see plan.makePlan).
+        Arguments:
+            desired : REQUIRED : dataframe or list of dictionaries of the desired segments, identified by sid or integrationCode.
+            current : OPTIONAL : current segments, requested when not provided.
+            fields : OPTIONAL : list of the fields compared (default all of the updatable fields).
+        """
+        if desired is None:
+            raise Exception("Require the desired segments")
+        if current is None:
+            current = list(self.iterSegments(includeMetrics=False))
+        return plan.makePlan('segments', desired, current, fields=fields)
+
+    def applyPlan(self, changes: plan.Plan = None, max_workers: int = 10, verbose: bool = False)->pd.DataFrame:
+        """
+        Send the updates of a Plan in parallel. Only the changed objects are updated.
+        Returns a dataframe with one row per updated object: id, status (updated, error), fields (changed fields), error.
+        Arguments:
+            changes : REQUIRED : Plan returned by planTraits or planSegments.
+            max_workers : OPTIONAL : number of parallel requests (default 10).
+            verbose : OPTIONAL : print information if set to True.
+        """
+        if changes is None:
+            raise Exception("Require a Plan")
+        if changes.objectType == 'traits':
+            update = lambda change: self.updateTrait(traitId=change['id'], **change['payload'])
+        else:
+            update = lambda change: self.updateSegment(segId=change['id'], **change['payload'])
+        results = self._fanOut(update, list(changes.changes), max_workers=max_workers)
+        records = []
+        for change, res in zip(changes.changes, results):
+            record = {'id': change['id'], 'status': 'updated', 'fields': list(change['fields'].keys()), 'error': None}
+            if type(res) != dict or 'error' in res.keys() or ('code' in res.keys() and 'message' in res.keys()):
+                record['status'], record['error'] = 'error', res.get('error', json.dumps(res)) if type(res) == dict else str(res)
+            records.append(record)
+        if verbose:
+            print(f"{sum(record['status'] == 'updated' for record in records)} / {len(records)} {changes.objectType} updated")
+        df = pd.DataFrame(records, columns=['id', 'status', 'fields', 'error'])
+        return df
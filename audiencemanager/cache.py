@@ -0,0 +1,189 @@
+from audiencemanager.codec import getCodec
+from collections import OrderedDict
+from contextlib import closing
+from urllib.parse import urlparse
+import hashlib, json, sqlite3, time, zlib
+import threading
+
+
+class ResponseCache:
+    """
+    Cache of the GET responses, keyed on the endpoint and the parameters, with a time to live per endpoint.
+    The entries are kept in memory (LRU bounded) and optionally on disk in a SQLite file, so that they survive the process.
+    When a create, update or delete request is sent, the entries of the impacted endpoints are invalidated.
+    """
+    # Time to live in seconds per path (after the API version). A path matches the entries with the same segments, "*" matching any
+    # single segment (ex: an ID), the entry with the most literal segments is used. The paths matching no entry are not cached.
+    DEFAULT_TTL = {
+        '/reports/*': 86400,
+        '/folders/traits': 3600,
+        '/folders/traits/*': 3600,
+        '/folders/segments': 3600,
+        '/folders/segments/*': 3600,
+        '/datasources': 3600,
+        '/datasources/*': 3600,
+        '/datasources/*/history/inbound': 0,  # history of the inbound files, changes with every file received
+        '/datasources/configurations/available-id-types': 86400,
+        '/traits/limits': 3600,
+        '/segments/limits': 3600,
+        '/destinations/limits': 3600,
+        '/destinations/*/history/outbound': 0,
+    }
+    # Families of endpoints invalidated when a write request is done on a family.
+    INVALIDATION = {
+        'traits': ['traits', 'folders', 'reports', 'segments'],
+        'segments': ['segments', 'folders', 'reports', 'destinations'],
+        'folders': ['folders', 'traits', 'segments'],
+        'datasources': ['datasources', 'traits', 'segments'],
+        'destinations': ['destinations'],
+        'signals': ['signals'],
+        'models': ['models', 'traits'],
+    }
+
+    def __init__(self, ttl: dict = None, defaultTtl: int = 0, maxSize: int = 256, diskPath: str = None, codec: object = None)->None:
+        """
+        Instantiate the cache.
+        Arguments:
+            ttl : OPTIONAL : dictionary of path (ex: "/traits" for the list, "/traits/*" for a single trait) and time to live in seconds.
+                Updates the DEFAULT_TTL. Set a path to 0 to not cache it.
+            defaultTtl : OPTIONAL : time to live of the endpoints not matching any path (default 0 : not cached).
+            maxSize : OPTIONAL : maximum number of responses kept in memory (default 256).
+            diskPath : OPTIONAL : path of a SQLite file used as second tier of the cache.
+            codec : OPTIONAL : JSON codec used to store the responses (see codec.getCodec), by default the one of the connector using the cache.
+        """
+        self.ttl = dict(self.DEFAULT_TTL)
+        if ttl is not None:
+            self.ttl.update(ttl)
+        self.defaultTtl = defaultTtl
+        self.maxSize = maxSize
+        self.diskPath = diskPath
+        self.codec = None if codec is None else getCodec(codec)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if diskPath is not None:
+            self._execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, family TEXT, expiresAt REAL, body BLOB)")
+
+    def _execute(self, sql: str, params: tuple = ())->tuple:
+        """
+        Execute the statement on the disk tier and return the first row.
+        """
+        with closing(sqlite3.connect(self.diskPath, timeout=30)) as conn:
+            with conn:
+                return conn.execute(sql, params).fetchone()
+
+    def _path(self, endpoint: str)->str:
+        """
+        Return the path of the endpoint without the API version and trailing slash.
+        """
+        path = urlparse(endpoint).path
+        if path.startswith('/v1/'):
+            path = path[3:]
+        return path.rstrip('/')
+
+    def _family(self, path: str)->str:
+        return path.lstrip('/').split('/')[0]
+
+    def _codec(self)->object:
+        if self.codec is None:
+            self.codec = getCodec()
+        return self.codec
+
+    def getTtl(self, endpoint: str)->int:
+        """
+        Return the time to live of the endpoint in seconds, 0 when it is not cached.
+        """
+        segments = self._path(endpoint).split('/')
+        ttl = self.defaultTtl
+        literals = -1
+        for pattern, value in self.ttl.items():
+            patternSegments = pattern.rstrip('/').split('/')
+            if len(patternSegments) != len(segments):
+                continue
+            if all(expected == '*' or expected == segment for expected, segment in zip(patternSegments, segments)):
+                count = sum(expected != '*' for expected in patternSegments)
+                if count > literals:
+                    ttl, literals = value, count
+        return ttl
+
+    def key(self, endpoint: str, params: dict = None, namespace: str = '')->str:
+        """
+        Return the key of the request. The namespace (organization ID) separates the responses of different organizations.
+        """
+        identity = json.dumps([namespace, self._path(endpoint), params or {}], sort_keys=True, default=str)
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    def get(self, endpoint: str, params: dict = None, namespace: str = '')->tuple:
+        """
+        Return a tuple (found, response) for the request.
+        """
+        if self.getTtl(endpoint) <= 0:
+            return False, None
+        key = self.key(endpoint, params, namespace)
+        now = time.time()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return True, self._codec().loads(entry[2])
+                del self.entries[key]
+        if self.diskPath is not None:
+            row = self._execute("SELECT family, expiresAt, body FROM responses WHERE key = ? AND expiresAt > ?", (key, now))
+            if row is not None:
+                body = zlib.decompress(row[2])
+                self._setMemory(key, (row[1], row[0], body))
+                with self._lock:
+                    self.hits += 1
+                return True, self._codec().loads(body)
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def _setMemory(self, key: str, entry: tuple)->None:
+        with self._lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+
+    def set(self, endpoint: str, params: dict = None, response: object = None, namespace: str = '')->None:
+        """
+        Store the response of the request, if the endpoint has a time to live.
+        """
+        ttl = self.getTtl(endpoint)
+        if ttl <= 0:
+            return
+        key = self.key(endpoint, params, namespace)
+        family = self._family(self._path(endpoint))
+        expiresAt = time.time() + ttl
+        body = self._codec().dumps(response)
+        self._setMemory(key, (expiresAt, family, body))
+        if self.diskPath is not None:
+            self._execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, family, expiresAt, zlib.compress(body)))
+
+    def invalidate(self, endpoint: str)->None:
+        """
+        Remove the entries impacted by a write request on that endpoint, for all of the organizations.
+        """
+        path = self._path(endpoint)
+        if path.endswith('/validate'):
+            return
+        family = self._family(path)
+        families = self.INVALIDATION.get(family, [family])
+        with self._lock:
+            for key in [key for key, entry in self.entries.items() if entry[1] in families]:
+                del self.entries[key]
+        if self.diskPath is not None:
+            self._execute(f"DELETE FROM responses WHERE family IN ({','.join('?' * len(families))})", tuple(families))
+
+    def clear(self)->None:
+        """
+        Remove all of the entries.
+        """
+        with self._lock:
+            self.entries.clear()
+        if self.diskPath is not None:
+            self._execute("DELETE FROM responses")
@@ -0,0 +1,82 @@
+"""
+JSON codecs used by the connectors to encode the request bodies and decode the responses.
+A codec has a dumps method returning bytes and a loads method accepting bytes, so that no intermediate string is created.
+The orjson module is used when it is installed (pip install audiencemanager[fast]), the standard json module otherwise.
+"""
+import gzip, json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec:
+    """
+    Codec based on the standard json module.
+    """
+    name = 'json'
+
+    def dumps(self, obj: object)->bytes:
+        return json.dumps(obj, default=_default).encode('utf-8')
+
+    def loads(self, content: bytes)->object:
+        return json.loads(content)  # the encoding (utf-8/16/32) is detected from the bytes
+
+
+class OrjsonCodec:
+    """
+    Codec based on the orjson module, several times faster to decode the large list responses.
+    numpy values are serialized natively, the keys that are not strings are converted.
+    """
+    name = 'orjson'
+
+    def __init__(self)->None:
+        if orjson is None:
+            raise ImportError("The orjson module is required: pip install audiencemanager[fast]")
+        self.options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: object)->bytes:
+        return orjson.dumps(obj, default=_default, option=self.options)
+
+    def loads(self, content: bytes)->object:
+        return orjson.loads(content)
+
+
+def _default(obj: object)->object:
+    """
+    Serialize the values not supported natively: numpy and pandas scalars, sets.
+    """
+    if hasattr(obj, 'item'):
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+CODECS = {'json': JsonCodec, 'orjson': OrjsonCodec}
+
+
+def getCodec(codec: object = None)->object:
+    """
+    Return a codec instance.
+    Arguments:
+        codec : OPTIONAL : "json", "orjson", a codec instance (any object with dumps and loads methods),
+            or None for orjson when it is installed and json otherwise.
+    """
+    if codec is None:
+        return OrjsonCodec() if orjson is not None else JsonCodec()
+    if type(codec) == str:
+        if codec not in CODECS.keys():
+            raise ValueError(f"codec should be part of the following values {list(CODECS.keys())}")
+        return CODECS[codec]()
+    if not hasattr(codec, 'dumps') or not hasattr(codec, 'loads'):
+        raise TypeError("codec should have a dumps and a loads method")
+    return codec
+
+
+def compress(body: bytes, level: int = 5)->bytes:
+    """
+    Return the body compressed with gzip, to be sent with the header "Content-Encoding: gzip".
+    """
+    return gzip.compress(body, compresslevel=level)
@@ -1,34 +1,278 @@
 from audiencemanager import config
-from copy import deepcopy
 from pathlib import Path
-import time, jwt, json, requests
+from functools import lru_cache
+from audiencemanager.ratelimiter import RateLimiter
+from audiencemanager import tokenmanager
+from audiencemanager import streaming
+from audiencemanager.cache import ResponseCache
+from audiencemanager.codec import getCodec, compress
+from audiencemanager.recorder import Recorder, ReplayMiss
+from audiencemanager.metrics import Metrics
+from audiencemanager.modules import jwt
+import time, requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib.parse import urlparse
+from email.utils import parsedate_to_datetime
 from typing import Dict, Union, Optional
-import os
+import os, random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+_privateKeys = {}
+# gzip and deflate, plus br when the brotli module is installed (pip install audiencemanager[fast]), as urllib3 can decode them
+ACCEPT_ENCODING = make_headers(accept_encoding=True)['accept-encoding']
+
+
+@lru_cache(maxsize=8)
+def _loadPrivateKey(private_key: str)->object:
+    """
+    Parse the PEM private key once per process. The parsed key object can be passed directly to jwt.encode.
+    Return the key string unchanged if it cannot be parsed with cryptography.
+    """
+    try:
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key
+        return load_pem_private_key(private_key.encode('utf-8'), password=None)
+    except Exception:
+        return private_key
+
+
+class SessionPool:
+    """
+    Keep one requests.Session per host so that the TCP / TLS connections are kept alive and re-used between the calls.
+    The same pool can be shared between several AdobeRequest (and therefore AudienceManager) instances.
+    """
+
+    def __init__(self, poolSize: int = 10, keepAlive: bool = True, poolBlock: bool = False)->None:
+        """
+        Instantiate the pool of sessions.
+        Arguments:
+            poolSize : OPTIONAL : Maximum number of connections kept open per host (default 10).
+                Should be at least the number of threads you are using to send requests.
+            keepAlive : OPTIONAL : Keep the connections open between the requests (default True).
+            poolBlock : OPTIONAL : If set to True, wait for a free connection instead of opening a new one when the pool is full. (default False)
+        """
+        self.poolSize = poolSize
+        self.keepAlive = keepAlive
+        self.poolBlock = poolBlock
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def _createSession(self)->requests.Session:
+        """
+        Create a session with a connection pool adapter mounted for http and https.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.poolSize, pool_block=self.poolBlock)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        if self.keepAlive == False:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def getSession(self, endpoint: str)->requests.Session:
+        """
+        Return the session attached to the host of the endpoint, create it if it does not exist yet.
+        Arguments:
+            endpoint : REQUIRED : URL that is going to be requested.
+        """
+        host = urlparse(endpoint).netloc
+        session = self.sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self.sessions.get(host)
+                if session is None:
+                    session = self._createSession()
+                    self.sessions[host] = session
+        return session
+
+    def close(self)->None:
+        """
+        Close all of the sessions and their connections.
+        """
+        with self._lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+
+
+def findPath(path: str) -> Optional[Path]:
+    """
+    Return the Path of the file, trying the absolute path as a relative one when it does not exist. Return None if the file is not found.
+    """
+    if Path(path).exists():
+        return Path(path)
+    elif path.startswith('/') and Path('.' + path).exists():
+        return Path('.' + path)
+    elif path.startswith('\\') and Path('.' + path).exists():
+        return Path('.' + path)
+    else:
+        return None
+
+
+def getPrivateKey(config: dict) -> str:
+    """
+    Returns the private key directly or read a file to return the private key.
+    The file is read once per process.
+    """
+    private_key = config.get('private_key')
+    if private_key is not None:
+        return private_key
+    private_key = _privateKeys.get(config['pathToKey'])
+    if private_key is not None:
+        return private_key
+    private_key_path = findPath(config['pathToKey'])
+    if private_key_path is None:
+        raise FileNotFoundError(f'Unable to find the private key under path `{config["pathToKey"]}`.')
+    with open(Path(private_key_path), 'r') as f:
+        private_key = f.read()
+    _privateKeys[config['pathToKey']] = private_key
+    return private_key
+
+
+def _encodeJwt(payload: dict, private_key: str) -> str:
+    """
+    Ensure that jwt enconding return the same type (str) as versions < 2.0.0 returned bytes and >2.0.0 return strings. 
+    """
+    token: Union[str, bytes] = jwt.encode(payload, _loadPrivateKey(private_key), algorithm='RS256')
+    if isinstance(token, bytes):
+        return token.decode('utf-8')
+    return token
+
+
+def fetchToken(config: dict, verbose: bool = False, save: bool = False, metrics: Metrics = None, *args, **kwargs) -> Dict[str, str]:
+    """
+    Retrieve a token from IMS for a configuration. This is the fetcher of the TokenManager, it does not depend on a connector
+    so that the managers shared in the process do not keep any connector alive.
+    Arguments:
+        config : REQUIRED : configuration imported with importConfigFile.
+        verbose : OPTIONAL : Default False. If set to True, print information.
+        save : OPTIONAL : Default False. If set to True, save the token in a token.txt file.
+        metrics : OPTIONAL : Metrics instance receiving the token event.
+    """
+    private_key = getPrivateKey(config)
+    header_jwt = {
+        'cache-control': 'no-cache',
+        'content-type': 'application/x-www-form-urlencoded'
+    }
+    now_plus_24h = int(time.time()) + 24 * 60 * 60
+    jwt_payload = {
+        'exp': now_plus_24h,
+        'iss': config['org_id'],
+        'sub': config['tech_id'],
+        'https://ims-na1.adobelogin.com/s/ent_audiencemanagerplatform_sdk': True,
+        'aud': f'https://ims-na1.adobelogin.com/c/{config["client_id"]}'
+    }
+    encoded_jwt = _encodeJwt(payload=jwt_payload, private_key=private_key)
+
+    payload = {
+        'client_id': config['client_id'],
+        'client_secret': config['secret'],
+        'jwt_token': encoded_jwt
+    }
+    start = time.perf_counter()
+    response = _tokenSessions.getSession(config['tokenEndpoint']).post(config['tokenEndpoint'], headers=header_jwt, data=payload)
+    if metrics is not None:
+        metrics.emit('token', seconds=time.perf_counter() - start, status=response.status_code)
+    json_response = response.json()
+    try:
+        token = json_response['access_token']
+    except KeyError:
+        print('Issue retrieving token')
+        print(json_response)
+        raise Exception(f"Issue retrieving token: {json_response}")
+    expiry = json_response['expires_in']
+    if save:
+        with open('token.txt', 'w') as f:
+            f.write(token)
+        print(f'token has been saved here: {os.getcwd()}{os.sep}token.txt')
+    if verbose:
+        print('token valid till : ' + time.ctime(time.time() + expiry / 1000))
+    return {'token': token, 'expiry': expiry}
+
+
+# sessions used to request the tokens, shared by all of the token managers of the process
+_tokenSessions = SessionPool(poolSize=2)
+
 
 class AdobeRequest:
     """
     Handle request to Audience Manager and taking care that the request have a valid token set each time.
     """
+    RETRY_STATUS = [429, 500, 502, 503, 504]
+    IDEMPOTENT_METHODS = ['GET', 'PUT', 'DELETE']
 
-    def __init__(self, config_object: dict = config.config_object, header: dict = config.header, verbose: bool = False)->None:
+    def __init__(self, config_object: dict = config.config_object, header: dict = config.header, verbose: bool = False, sessionPool: SessionPool = None, poolSize: int = 10,
+                 retry: int = 3, backoffFactor: float = 0.5, maxBackoff: float = 60, rateLimiter: RateLimiter = None,
+                 tokenCache: bool = True, tokenCachePath: str = None, autoRefresh: bool = True, lazy: bool = False, prefetchToken: bool = False,
+                 cache: Union[bool, ResponseCache] = None, codec: object = None, compressThreshold: int = None,
+                 recorder: Recorder = None, metrics: Metrics = None)->None:
         """
         Set the connector to be used for handling request to AAM
         Arguments:
             config_object : OPTIONAL : Require the importConfig file to have been used.
-            config_object : OPTIONAL : Require the importConfig file to have been used.
+            header : OPTIONAL : header to be used for the requests.
+            verbose : OPTIONAL : print information if set to True.
+            sessionPool : OPTIONAL : SessionPool instance to be used. Pass the same pool to several instances to share the connections.
+            poolSize : OPTIONAL : if no sessionPool is passed, size of the connection pool per host created (default 10).
+            retry : OPTIONAL : number of retries for throttled (429) and failed (5xx) requests (default 3).
+            backoffFactor : OPTIONAL : base of the exponential backoff in seconds, when no Retry-After header is returned (default 0.5).
+            maxBackoff : OPTIONAL : maximum time to wait between 2 retries in seconds (default 60).
+            rateLimiter : OPTIONAL : RateLimiter instance limiting the requests per second. Can be shared between instances.
+            tokenCache : OPTIONAL : cache the token on disk so that other processes can re-use it (default True).
+            tokenCachePath : OPTIONAL : folder used for the token cache (default ~/.audiencemanager/tokens).
+            autoRefresh : OPTIONAL : refresh the token in a background thread before it expires (default True).
+            lazy : OPTIONAL : if set to True, no request is done during the instantiation, the token is retrieved on the first request (default False).
+            prefetchToken : OPTIONAL : used with lazy, start retrieving the token in a background thread right away (default False).
+            cache : OPTIONAL : ResponseCache instance caching the GET responses, or True to use a ResponseCache with the default settings.
+            codec : OPTIONAL : JSON codec used for the bodies and the responses: "json", "orjson" or an object with dumps (to bytes) and loads (from bytes) methods.
+                By default orjson is used when it is installed (see codec.getCodec).
+            compressThreshold : OPTIONAL : size in bytes above which the request bodies are sent compressed with gzip (default None, never compressed).
+            recorder : OPTIONAL : Recorder instance storing the responses ("record" mode) or serving them without network access ("replay" mode).
+            metrics : OPTIONAL : Metrics instance receiving an event per request, retry, token retrieval and decoding (default None, nothing is measured).
         """
-        if config_object['org_id'] == "":
+        if config_object['org_id'] == "" and (recorder is None or recorder.replaying == False):
             raise Exception(
                 'You have to upload the configuration file with importConfigFile method.')
-        self.config = deepcopy(config_object)
-        self.header = deepcopy(header)
-        token_and_expiry = self.get_token_and_expiry_for_config(config=self.config, verbose=verbose)
-        token = token_and_expiry['token']
-        expiry = token_and_expiry['expiry']
+        self.config = dict(config_object)
+        self.header = dict(header)
+        if sessionPool is None:
+            sessionPool = SessionPool(poolSize=poolSize)
+        self.sessionPool = sessionPool
+        self.retry = retry
+        self.backoffFactor = backoffFactor
+        self.maxBackoff = maxBackoff
+        self.rateLimiter = rateLimiter
+        if cache == True:
+            cache = ResponseCache()
+        self.cache = cache or None
+        self.codec = getCodec(codec)
+        if self.cache is not None and self.cache.codec is None:
+            self.cache.codec = self.codec  # the cached responses are decoded as the ones of the API
+        self.compressThreshold = compressThreshold
+        self.recorder = recorder
+        self.metrics = metrics
+        self.tokenManager = tokenmanager.getTokenManager(
+            self.config, fetcher=fetchToken, cachePath=tokenCachePath, diskCache=tokenCache, autoRefresh=autoRefresh, verbose=verbose)
+        self.tokenManager.subscribe(self._setToken)
+        self.token = None
+        self.config['date_limit'] = 0
+        if lazy == False:
+            self._checkingDate()
+        elif prefetchToken:
+            threading.Thread(target=self._checkingDate, name="aam-token-prefetch", daemon=True).start()
+
+    def _setToken(self, token: str, date_limit: float)->None:
+        """
+        Set the token to be used. The Authorization header is replaced in a single assignment, so that the threads
+        preparing a request either use the old or the new token.
+        """
         self.token = token
         self.config['token'] = token
-        self.config['date_limit'] = time.time() + expiry / 1000 - 500
-        self.header.update({'Authorization': f'Bearer {token}'})
+        self.config['date_limit'] = date_limit
+        self.header['Authorization'] = f'Bearer {token}'
     
     def find_path(self, path: str) -> Optional[Path]:
         """Checks if the file denoted by the specified `path` exists and returns the Path object
@@ -39,28 +283,14 @@ class AdobeRequest:
 
         If the file does not exist with either the absolute and the relative path, returns `None`.
         """
-        if Path(path).exists():
-            return Path(path)
-        elif path.startswith('/') and Path('.' + path).exists():
-            return Path('.' + path)
-        elif path.startswith('\\') and Path('.' + path).exists():
-            return Path('.' + path)
-        else:
-            return None
+        return findPath(path)
     
     def get_private_key_from_config(self, config: dict=config.config_object) -> str:
         """
         Returns the private key directly or read a file to return the private key.
+        The file is read once per process.
         """
-        private_key = config.get('private_key')
-        if private_key is not None:
-            return private_key
-        private_key_path = self.find_path(config['pathToKey'])
-        if private_key_path is None:
-            raise FileNotFoundError(f'Unable to find the private key under path `{config["pathToKey"]}`.')
-        with open(Path(private_key_path), 'r') as f:
-            private_key = f.read()
-        return private_key
+        return getPrivateKey(config)
 
     def get_token_and_expiry_for_config(self, config: dict, verbose: bool = False, save: bool = False, *args, **kwargs) -> Dict[str, str]:
         """
@@ -69,88 +299,255 @@ class AdobeRequest:
             verbose : OPTIONAL : Default False. If set to True, print information.
             save : OPTIONAL : Default False. If set to True, save the toke in the .
         """
-        private_key = self.get_private_key_from_config(config)
-        header_jwt = {
-            'cache-control': 'no-cache',
-            'content-type': 'application/x-www-form-urlencoded'
-        }
-        now_plus_24h = int(time.time()) + 24 * 60 * 60
-        jwt_payload = {
-            'exp': now_plus_24h,
-            'iss': config['org_id'],
-            'sub': config['tech_id'],
-            'https://ims-na1.adobelogin.com/s/ent_audiencemanagerplatform_sdk': True,
-            'aud': f'https://ims-na1.adobelogin.com/c/{config["client_id"]}'
-        }
-        encoded_jwt = self._get_jwt(payload=jwt_payload, private_key=private_key)
-
-        payload = {
-            'client_id': config['client_id'],
-            'client_secret': config['secret'],
-            'jwt_token': encoded_jwt
-        }
-        response = requests.post(config['tokenEndpoint'], headers=header_jwt, data=payload)
-        json_response = response.json()
-        try:
-            token = json_response['access_token']
-        except KeyError:
-            print('Issue retrieving token')
-            print(json_response)
-        expiry = json_response['expires_in']
-        if save:
-            with open('token.txt', 'w') as f:
-                f.write(token)
-            print(f'token has been saved here: {os.getcwd()}{os.sep}token.txt')
-        if verbose:
-            print('token valid till : ' + time.ctime(time.time() + expiry / 1000))
-        return {'token': token, 'expiry': expiry}
-
+        return fetchToken(config, verbose=verbose, save=save, metrics=kwargs.get('metrics', self.metrics))
 
     def _get_jwt(self, payload: dict, private_key: str) -> str:
         """
         Ensure that jwt enconding return the same type (str) as versions < 2.0.0 returned bytes and >2.0.0 return strings. 
         """
-        token: Union[str, bytes] = jwt.encode(payload, private_key, algorithm='RS256')
-        if isinstance(token, bytes):
-            return token.decode('utf-8')
-        return token
+        return _encodeJwt(payload, private_key)
+
+    def _getSession(self, endpoint: str)->requests.Session:
+        """
+        Return the pooled session to be used for that endpoint.
+        """
+        return self.sessionPool.getSession(endpoint)
 
     def _checkingDate(self)->None:
         """
         Checking if the token is still valid
         """
+        if self.recorder is not None and self.recorder.replaying:
+            return  # no token needed to replay the responses
         now = time.time()
         if now > self.config['date_limit']:
-            self.retrieveToken()
+            token = self.tokenManager.getToken(metrics=self.metrics)
+            self._setToken(token, self.tokenManager.date_limit)
+
+    def _retryDelay(self, res: requests.Response = None, attempt: int = 0)->float:
+        """
+        Return the time to wait before retrying.
+        The Retry-After header is used when provided, otherwise an exponential backoff with full jitter is used.
+        """
+        if res is not None:
+            retry_after = res.headers.get('Retry-After')
+            if retry_after is not None:
+                try:
+                    return max(0, float(retry_after))
+                except ValueError:
+                    try:
+                        return max(0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                    except (TypeError, ValueError):
+                        pass
+        return random.uniform(0, min(self.maxBackoff, self.backoffFactor * 2 ** attempt))
+
+    def _request(self, method: str, endpoint: str, headers: dict = None, params: dict = None, data: object = None, stream: bool = False)->requests.Response:
+        """
+        Return the response of the request, from the recorder when one is set in replay or auto mode, from the API otherwise.
+        """
+        if self.recorder is None:
+            return self._send(method, endpoint, headers=headers, params=params, data=data, stream=stream)
+        if self.recorder.mode != 'record':
+            res = self.recorder.replay(method, endpoint, params, data)
+            if res is not None:
+                return res
+            if self.recorder.replaying:
+                raise ReplayMiss(f"No recorded response for {method} {endpoint} {params or ''}")
+        res = self._send(method, endpoint, headers=headers, params=params, data=data, stream=stream)
+        self.recorder.record(method, endpoint, params, data, res)
+        return res
+
+    def _send(self, method: str, endpoint: str, headers: dict = None, params: dict = None, data: object = None, stream: bool = False)->requests.Response:
+        """
+        Send the request through the pooled session, waiting for the rate limiter if one is set.
+        Throttled requests (429) are retried for all methods. Server errors and connection errors are retried
+        only for the idempotent methods (GET, PUT, DELETE), as the request may have been processed.
+        """
+        attempt = 0
+        tokenRefreshed = False
+        while True:
+            if self.rateLimiter is not None:
+                self.rateLimiter.acquire()
+            start = time.perf_counter()
+            try:
+                res = self._getSession(endpoint).request(
+                    method, endpoint, headers=headers, params=params, data=data, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if self.metrics is not None:
+                    self._observe(method, endpoint, data, start, attempt, error=e)
+                if attempt >= self.retry or method not in self.IDEMPOTENT_METHODS:
+                    raise
+                delay = self._retryDelay(attempt=attempt)
+                if self.metrics is not None:
+                    self.metrics.emit('retry', method=method, endpoint=endpoint, attempt=attempt, reason=type(e).__name__, delay=delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            if self.metrics is not None:
+                self._observe(method, endpoint, data, start, attempt, res=res, stream=stream)
+            if res.status_code == 401 and tokenRefreshed == False:
+                if self.metrics is not None:
+                    self.metrics.emit('retry', method=method, endpoint=endpoint, attempt=attempt, reason='unauthorized', delay=0)
+                token = self.tokenManager.getToken(stale=self.token, metrics=self.metrics)
+                self._setToken(token, self.tokenManager.date_limit)
+                if headers is not self.header:
+                    headers = dict(headers, Authorization=f'Bearer {token}')
+                tokenRefreshed = True
+                res.close()
+                continue
+            if res.status_code == 429:
+                if self.rateLimiter is not None:
+                    self.rateLimiter.onThrottle()
+            elif res.status_code not in self.RETRY_STATUS or method not in self.IDEMPOTENT_METHODS:
+                if self.rateLimiter is not None:
+                    self.rateLimiter.onSuccess()
+                return res
+            if attempt >= self.retry:
+                return res
+            res.close()
+            delay = self._retryDelay(res, attempt)
+            if self.metrics is not None:
+                self.metrics.emit('retry', method=method, endpoint=endpoint, attempt=attempt, reason=str(res.status_code), delay=delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def _observe(self, method: str, endpoint: str, data: object, start: float, attempt: int, res: requests.Response = None,
+                 error: Exception = None, stream: bool = False)->None:
+        """
+        Send the request event to the metrics. The bytes received are the ones sent on the network (compressed),
+        known from the Content-Length header, or from the body when it has already been downloaded.
+        """
+        received = None
+        if res is not None:
+            length = res.headers.get('Content-Length')
+            if length is not None and length.isdigit():
+                received = int(length)
+            elif stream == False:
+                received = len(res.content)
+        self.metrics.emit('request', method=method, endpoint=endpoint, status=None if res is None else res.status_code,
+                          error=None if error is None else type(error).__name__, attempt=attempt, seconds=time.perf_counter() - start,
+                          bytesSent=len(data) if isinstance(data, (bytes, str)) else None, bytesReceived=received)
+
+    def _encode(self, data: object, headers: dict)->tuple:
+        """
+        Return the JSON body as bytes and the headers to send with it.
+        The body is compressed with gzip when it is larger than compressThreshold.
+        """
+        if data is None:
+            return None, headers
+        body = self.codec.dumps(data)
+        if self.compressThreshold is not None and len(body) >= self.compressThreshold:
+            body = compress(body)
+            headers = dict(headers, **{'Content-Encoding': 'gzip'})
+        return body, headers
+
+    def _decode(self, res: requests.Response)->object:
+        """
+        Return the JSON response, decoded from the bytes received (already decompressed).
+        """
+        if self.metrics is None:
+            return self.codec.loads(res.content)
+        start = time.perf_counter()
+        decoded = self.codec.loads(res.content)
+        self.metrics.emit('decode', endpoint=res.url, seconds=time.perf_counter() - start, bytes=len(res.content))
+        return decoded
 
     def getData(self, endpoint: str, params: dict = None, data: dict = None, headers: dict = None, *args, **kwargs):
         """
         Abstraction for getting data
         """
+        useCache = self.cache is not None and data is None
+        if useCache:
+            found, res_json = self.cache.get(endpoint, params, namespace=self.config['org_id'])
+            if found:
+                return res_json
         self._checkingDate()
         if headers is None:
             headers = self.header
-        if params == None and data == None:
-            res = requests.get(
-                endpoint, headers=headers)
-        elif params != None and data == None:
-            res = requests.get(
-                endpoint, headers=headers, params=params)
-        elif params == None and data != None:
-            res = requests.get(
-                endpoint, headers=headers, data=data)
-        elif params != None and data != None:
-            res = requests.get(endpoint, headers=headers,
-                                                       params=params, data=data)
+        res = self._request('GET', endpoint, headers=headers, params=params, data=data)
         try:
-            res_json = res.json()
+            res_json = self._decode(res)
         except:
             if kwargs.get('verbose', True):
                 print("error")
                 print(res.text)
             res_json = {'error': 'Request Error'}
+            useCache = False
+        if useCache and res.status_code < 300:
+            self.cache.set(endpoint, params, res_json, namespace=self.config['org_id'])
         return res_json
 
+    def streamData(self, endpoint: str, params: dict = None, headers: dict = None, chunkSize: int = 65536, *args, **kwargs):
+        """
+        Abstraction for getting a list of elements, yielded one by one while the response is downloaded.
+        The complete response is never loaded in memory.
+        Arguments:
+            chunkSize : OPTIONAL : size of the chunks read from the network (default 64kB).
+        """
+        self._checkingDate()
+        if headers is None:
+            headers = self.header
+        res = self._request('GET', endpoint, headers=headers, params=params, stream=True)
+        try:
+            if res.status_code >= 400:
+                raise Exception(f"Request Error - status code {res.status_code} : {res.text}")
+            for element in streaming.iterResponseRecords(res, chunkSize=chunkSize):
+                yield element
+        finally:
+            res.close()
+
+    def _extractPage(self, res: object, page: int)->tuple:
+        """
+        Return the list of elements and the total number of elements (None if unknown) of a page.
+        The API returns either a list or a dictionary with the list of elements and the total.
+        """
+        if type(res) == list:
+            return res, None
+        if type(res) == dict and type(res.get('list')) == list:
+            return res['list'], res.get('total')
+        raise Exception(f"Request Error on page {page} : {res}")
+
+    def getPages(self, endpoint: str, params: dict = None, headers: dict = None, pageSize: int = 100, prefetch: int = 0, *args, **kwargs):
+        """
+        Abstraction for getting all of the pages of a list endpoint. Yield the list of elements of each page.
+        Arguments:
+            pageSize : OPTIONAL : number of elements per page (default 100).
+            prefetch : OPTIONAL : number of next pages requested in parallel while the current one is consumed (default 0).
+        """
+        params = dict(params or {})
+
+        def fetch(page):
+            page_params = dict(params, page=page, pageSize=pageSize)
+            return self._extractPage(self.getData(endpoint, params=page_params, headers=headers, **kwargs), page)
+
+        def isLast(page, elements, total):
+            if total is not None:
+                return (page + 1) * pageSize >= total
+            return len(elements) < pageSize
+
+        if prefetch <= 0:
+            page = 0
+            while True:
+                elements, total = fetch(page)
+                yield elements
+                if isLast(page, elements, total):
+                    return
+                page += 1
+        with ThreadPoolExecutor(max_workers=prefetch) as executor:
+            futures = deque()
+            for next_page in range(prefetch + 1):
+                futures.append((next_page, executor.submit(fetch, next_page)))
+            while len(futures) > 0:
+                page, future = futures.popleft()
+                elements, total = future.result()
+                yield elements
+                if isLast(page, elements, total):
+                    for _, pending in futures:
+                        pending.cancel()
+                    return
+                futures.append((next_page + 1, executor.submit(fetch, next_page + 1)))
+                next_page += 1
+
     def postData(self, endpoint: str, params: dict = None, data: dict = None, headers: dict = None, * args, **kwargs):
         """
         Abstraction for posting data
@@ -158,25 +555,17 @@ class AdobeRequest:
         self._checkingDate()
         if headers is None:
             headers = self.header
-        if params == None and data == None:
-            res = requests.post(
-                endpoint, headers=headers)
-        elif params != None and data == None:
-            res = requests.post(
-                endpoint, headers=headers, params=params)
-        elif params == None and data != None:
-            res = requests.post(endpoint, headers=headers,
-                                                        data=json.dumps(data))
-        elif params != None and data != None:
-            res = requests.post(endpoint, headers=headers,
-                                                        params=params, data=json.dumps(data))
+        body, headers = self._encode(data, headers)
+        res = self._request('POST', endpoint, headers=headers, params=params, data=body)
+        if self.cache is not None:
+            self.cache.invalidate(endpoint)
         try:
-            res_json = res.json()
+            res_json = self._decode(res)
         except:
             if kwargs.get('verbose', True):
                 print("error")
                 print(res.text)
-            if res.status_code >=200 & res.status_code <300:
+            if res.status_code >= 200 and res.status_code < 300:
                 res_json = {'success': f'no json - status code : {res.status_code}'}
             else:
                 res_json = {'error': 'Request Error'}
@@ -184,44 +573,34 @@ class AdobeRequest:
 
     def patchData(self, endpoint: str, params: dict = None, data=None, headers: dict = None, *args, **kwargs):
         """
-        Abstraction for deleting data
+        Abstraction for patching data
         """
         self._checkingDate()
         if headers is None:
             headers = self.header
-        if params != None and data == None:
-            res = requests.patch(
-                endpoint, headers=headers, params=params)
-        elif params == None and data != None:
-            res = requests.patch(endpoint, headers=headers,
-                                                         data=json.dumps(data))
-        elif params != None and data != None:
-            res = requests.patch(endpoint, headers=headers,
-                                                         params=params, data=json.dumps(data=data))
+        body, headers = self._encode(data, headers)
+        res = self._request('PATCH', endpoint, headers=headers, params=params, data=body)
+        if self.cache is not None:
+            self.cache.invalidate(endpoint)
         try:
-            status_code = res.json()
+            status_code = self._decode(res)
         except:
             status_code = {'error': 'Request Error'}
         return status_code
 
     def putData(self, endpoint: str, params: dict = None, data=None, headers: dict = None, *args, **kwargs):
         """
-        Abstraction for deleting data
+        Abstraction for putting data
         """
         self._checkingDate()
         if headers is None:
             headers = self.header
-        if params != None and data == None:
-            res = requests.put(
-                endpoint, headers=headers, params=params)
-        elif params == None and data != None:
-            res = requests.put(endpoint, headers=headers,
-                                                       data=json.dumps(data))
-        elif params != None and data != None:
-            res = requests.put(endpoint, headers=headers,
-                                                       params=params, data=json.dumps(data=data))
+        body, headers = self._encode(data, headers)
+        res = self._request('PUT', endpoint, headers=headers, params=params, data=body)
+        if self.cache is not None:
+            self.cache.invalidate(endpoint)
         try:
-            status_code = res.json()
+            status_code = self._decode(res)
         except:
             status_code = {'error': 'Request Error'}
         return status_code
@@ -233,14 +612,11 @@ class AdobeRequest:
         self._checkingDate()
         if headers is None:
             headers = self.header
-        if params == None:
-            resultDelete = requests.delete(
-                endpoint, headers=headers)
-        elif params != None:
-            resultDelete = requests.delete(
-                endpoint, headers=headers, params=params)
+        resultDelete = self._request('DELETE', endpoint, headers=headers, params=params)
+        if self.cache is not None:
+            self.cache.invalidate(endpoint)
         try:
-            res = resultDelete.json()
+            res = self._decode(resultDelete)
         except Exception as e:
             print(e)
             res = {'error': 'Request Error'}
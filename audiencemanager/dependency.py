@@ -0,0 +1,251 @@
+from __future__ import annotations
+from audiencemanager import segmentrule
+from audiencemanager.modules import np
+import re
+
+_TRAIT_IDS = re.compile(r"\b(\d+)[Tt]\b")
+
+# node types, in the order of the dependencies : a data source feeds traits, traits feed segments, segments are mapped to destinations.
+TYPES = ['dataSource', 'trait', 'segment', 'destination']
+
+
+class DependencyGraph:
+    """
+    Dependency graph between the data sources, traits, segments and destinations.
+    The edges are stored per node (the inputs of an object) so that a changed object only replaces its own edges,
+    and compiled in CSR arrays (forward and reverse) to answer the reachability queries for many IDs at once.
+    Build it with the refresh method (or AudienceManager.getDependencyGraph), a later refresh only parses the objects that changed.
+    """
+
+    def __init__(self)->None:
+        self.nodes = {}  # (type, id) : node index
+        self.nodeTypes = []
+        self.nodeIds = []
+        self.inputs = {}  # node index : set of input node indexes
+        self.versions = {}  # node index : updateTime of the object when its inputs were computed
+        self.errors = {}  # (type, id) : reason why the inputs could not be computed
+        self._csr = None
+        self.types = None
+        self.ids = None
+        self.active = None
+
+    def __len__(self)->int:
+        return len(self.nodes)
+
+    def _node(self, nodeType: str, nodeId: int)->int:
+        if nodeType not in TYPES:
+            raise ValueError(f"nodeType should be part of the following values {TYPES}")
+        key = (nodeType, int(nodeId))
+        node = self.nodes.get(key)
+        if node is None:
+            node = len(self.nodeTypes)
+            self.nodes[key] = node
+            self.nodeTypes.append(TYPES.index(nodeType))
+            self.nodeIds.append(int(nodeId))
+        return node
+
+    def setInputs(self, nodeType: str, nodeId: int, inputs: list, version: object = None)->None:
+        """
+        Replace the inputs of an object.
+        Arguments:
+            nodeType : REQUIRED : type of the object (dataSource, trait, segment, destination).
+            nodeId : REQUIRED : ID of the object.
+            inputs : REQUIRED : list of tuples (type, ID) of the objects it depends on.
+            version : OPTIONAL : updateTime of the object, used to skip it in the next refresh if it has not changed.
+        """
+        node = self._node(nodeType, nodeId)
+        self.inputs[node] = {self._node(inputType, inputId) for inputType, inputId in inputs}
+        self.versions[node] = version
+        self._csr = None
+
+    def remove(self, nodeType: str, nodeId: int)->None:
+        """
+        Remove an object and the edges with its inputs.
+        The objects still referencing it (ex: a segment rule using a deleted trait) keep their edge.
+        """
+        node = self.nodes.get((nodeType, int(nodeId)))
+        if node is None:
+            return
+        self.inputs.pop(node, None)
+        self.versions.pop(node, None)
+        self._csr = None
+
+    def _compile(self)->tuple:
+        """
+        Return the forward (input to output) and reverse CSR arrays (indptr, indices), built when the edges have changed.
+        """
+        if self._csr is not None:
+            return self._csr
+        size = len(self.nodeTypes)
+        count = sum(len(inputs) for inputs in self.inputs.values())
+        sources = np.empty(count, dtype=np.int64)
+        targets = np.empty(count, dtype=np.int64)
+        position = 0
+        for target, inputs in self.inputs.items():
+            length = len(inputs)
+            sources[position:position + length] = list(inputs)
+            targets[position:position + length] = target
+            position += length
+        self._csr = (self._toCsr(sources, targets, size), self._toCsr(targets, sources, size))
+        self.types = np.array(self.nodeTypes, dtype=np.int8)
+        self.ids = np.array(self.nodeIds, dtype=np.int64)
+        self.active = np.zeros(size, dtype=bool)
+        self.active[list(self.inputs.keys())] = True
+        self.active[sources] = True
+        return self._csr
+
+    def _toCsr(self, rows: np.ndarray, columns: np.ndarray, size: int)->tuple:
+        order = np.argsort(rows, kind='stable')
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+        return indptr, columns[order]
+
+    def _reach(self, csr: tuple, nodeType: str, ids: list, types: list)->dict:
+        indptr, indices = csr
+        starts = [self.nodes[(nodeType, int(nodeId))] for nodeId in ids if (nodeType, int(nodeId)) in self.nodes]
+        visited = np.zeros(len(indptr) - 1, dtype=bool)
+        frontier = np.unique(np.array(starts, dtype=np.int64))
+        visited[frontier] = True
+        while len(frontier) > 0:
+            begins, ends = indptr[frontier], indptr[frontier + 1]
+            lengths = ends - begins
+            total = lengths.sum()
+            if total == 0:
+                break
+            # positions of all of the neighbours of the frontier, without a python loop
+            offsets = np.repeat(begins - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+            neighbours = np.unique(indices[offsets])
+            frontier = neighbours[~visited[neighbours]]
+            visited[frontier] = True
+        visited[starts] = False
+        visited &= self.active
+        result = {}
+        for resultType in (types or TYPES):
+            mask = visited & (self.types == TYPES.index(resultType))
+            result[resultType] = np.sort(self.ids[mask]).tolist()
+        return result
+
+    def impacted(self, nodeType: str, ids: list, types: list = None)->dict:
+        """
+        Return the objects depending (directly or not) on the objects passed, per type.
+        Ex: the segments and destinations impacted by the deletion of traits.
+        Arguments:
+            nodeType : REQUIRED : type of the objects passed (dataSource, trait, segment, destination).
+            ids : REQUIRED : list of IDs.
+            types : OPTIONAL : list of the types to return (default all).
+        """
+        forward, _ = self._compile()
+        return self._reach(forward, nodeType, ids, types)
+
+    def dependencies(self, nodeType: str, ids: list, types: list = None)->dict:
+        """
+        Return the objects the objects passed depend on (directly or not), per type.
+        Ex: the traits and data sources used by the segments of a destination.
+        Arguments:
+            nodeType : REQUIRED : type of the objects passed (dataSource, trait, segment, destination).
+            ids : REQUIRED : list of IDs.
+            types : OPTIONAL : list of the types to return (default all).
+        """
+        _, reverse = self._compile()
+        return self._reach(reverse, nodeType, ids, types)
+
+    def _refreshType(self, nodeType: str, records: list, idKey: str, getInputs: callable, fallback: callable = None)->dict:
+        """
+        Replace the inputs of the objects that changed and remove the objects not returned anymore.
+        When getInputs raises a ValueError, the inputs returned by fallback are used, the object is counted as failed,
+        listed in the errors of the summary and computed again in the next refresh.
+        """
+        summary = {'updated': 0, 'unchanged': 0, 'removed': 0, 'failed': 0, 'errors': []}
+        seen = set()
+        for record in records:
+            nodeId = int(record[idKey])
+            seen.add(nodeId)
+            node = self.nodes.get((nodeType, nodeId))
+            version = record.get('updateTime')
+            if node is not None and node in self.inputs and version is not None and self.versions.get(node) == version:
+                summary['unchanged'] += 1
+                continue
+            try:
+                inputs = getInputs(record)
+                self.errors.pop((nodeType, nodeId), None)
+            except ValueError as e:
+                self.errors[(nodeType, nodeId)] = str(e)
+                self.setInputs(nodeType, nodeId, fallback(record) if fallback is not None else [], None)
+                summary['failed'] += 1
+                summary['errors'].append(nodeId)
+                continue
+            if inputs is None:  # inputs not available, the current ones are kept and the object is computed again in the next refresh
+                if node is not None:
+                    self.versions[node] = None
+                summary['failed'] += 1
+                continue
+            self.setInputs(nodeType, nodeId, inputs, version)
+            summary['updated'] += 1
+        for (existingType, nodeId), node in list(self.nodes.items()):
+            if existingType == nodeType and nodeId not in seen and node in self.inputs:
+                self.remove(nodeType, nodeId)
+                self.errors.pop((nodeType, nodeId), None)
+                summary['removed'] += 1
+        return summary
+
+    def refresh(self, aam: object, max_workers: int = 5, verbose: bool = False)->dict:
+        """
+        Request the traits, segments, destinations and destination mappings, and update the graph. Return a summary per type.
+        The errors of a type list the IDs whose inputs could not be computed (ex: segment rules that cannot be parsed,
+        their inputs are then the data source and the trait IDs found in the rule), the reasons are in the errors attribute.
+        Only the segments whose updateTime changed are parsed again, and only the mappings of the destinations whose updateTime changed are requested.
+        Arguments:
+            aam : REQUIRED : AudienceManager instance used to request the API.
+            max_workers : OPTIONAL : number of parallel requests for the destination mappings (default 5).
+            verbose : OPTIONAL : print information if set to True.
+        """
+        summary = {}
+
+        def traitInputs(trait):
+            if trait.get('dataSourceId') is None:
+                return []
+            return [('dataSource', trait['dataSourceId'])]
+
+        def segmentInputs(segment, traitIds=None):
+            if traitIds is None:
+                traitIds = segmentrule.SegmentRule(segment.get('segmentRule') or '').traits
+            inputs = [('trait', sid) for sid in traitIds]
+            if segment.get('dataSourceId') is not None:
+                inputs.append(('dataSource', segment['dataSourceId']))
+            return inputs
+
+        def segmentFallback(segment):
+            # the rule could not be parsed, the traits it references are still extracted so that impacted() does not miss it
+            return segmentInputs(segment, {int(sid) for sid in _TRAIT_IDS.findall(segment.get('segmentRule') or '')})
+
+        summary['traits'] = self._refreshType('trait', aam.iterTraits(includeMetrics=False), 'sid', traitInputs)
+        summary['segments'] = self._refreshType('segment', aam.iterSegments(includeMetrics=False), 'sid', segmentInputs,
+                                               segmentFallback)
+        destinations = list(aam.iterDestinations(includeMetrics=False))
+        toRequest = []
+        for destination in destinations:
+            node = self.nodes.get(('destination', int(destination['destinationId'])))
+            version = destination.get('updateTime')
+            if node is None or node not in self.inputs or version is None or self.versions.get(node) != version:
+                toRequest.append(destination['destinationId'])
+        mappings = {}
+        if len(toRequest) > 0:
+            results = aam._fanOut(lambda destinationId: aam.getDestinationMappings(destinationId, includeMetrics=False),
+                                  toRequest, max_workers=max_workers)
+            for destinationId, destinationMappings in zip(toRequest, results):
+                if type(destinationMappings) == list:
+                    mappings[destinationId] = destinationMappings
+                elif verbose:
+                    print(f"Issue retrieving the mappings of destination {destinationId}: {destinationMappings}")
+
+        def destinationInputs(destination):
+            destinationMappings = mappings.get(destination['destinationId'])
+            if destinationMappings is None:
+                return None
+            return [('segment', mapping.get('sid', mapping.get('segmentId'))) for mapping in destinationMappings
+                    if mapping.get('sid', mapping.get('segmentId')) is not None]
+
+        summary['destinations'] = self._refreshType('destination', destinations, 'destinationId', destinationInputs)
+        if verbose:
+            print(summary)
+        return summary
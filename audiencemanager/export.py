@@ -0,0 +1,184 @@
+from __future__ import annotations
+from audiencemanager.modules import pd, pa, pq, ipc, isDataFrame
+from itertools import islice
+from pathlib import Path
+import gzip, json, re
+
+FORMATS = {'csv': '.csv', 'json': '.json', 'parquet': '.parquet', 'feather': '.feather', 'ndjson': '.ndjson.gz'}
+
+
+def _requireArrow(saveFormat: str)->None:
+    if not pa.available:
+        raise ImportError(f"The {saveFormat} format requires the pyarrow module: pip install audiencemanager[arrow]")
+
+
+def _chunks(records: object, chunkSize: int)->object:
+    """
+    Yield the records by lists of chunkSize elements, whatever the input (list, iterator or dataframe).
+    """
+    if isDataFrame(records):
+        for start in range(0, len(records), chunkSize):
+            yield records.iloc[start:start + chunkSize]
+        return
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunkSize))
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+def _frame(chunk: object)->pd.DataFrame:
+    """
+    Return the chunk as a dataframe, with the dictionary columns (ex: metrics) flattened in "column.key" columns.
+    """
+    df = chunk if isDataFrame(chunk) else pd.DataFrame(chunk)
+    for column in list(df.columns):
+        if df[column].dtype == object and df[column].map(type).eq(dict).any():
+            nested = pd.DataFrame([value if type(value) == dict else {} for value in df[column].tolist()], index=df.index)
+            nested.columns = [f"{column}.{key}" for key in nested.columns]
+            df = pd.concat([df.drop(columns=[column]), nested], axis=1)
+    return df
+
+
+def _writeArrow(records: object, path: Path, saveFormat: str, chunkSize: int)->None:
+    """
+    Write the records by chunks in a parquet or feather (arrow IPC) file. The first chunk defines the schema.
+    """
+    writer = None
+    schema = None
+    try:
+        for chunk in _chunks(records, chunkSize):
+            df = _frame(chunk)
+            if schema is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                # columns only containing missing values in the first chunk are stored as strings
+                schema = pa.schema([pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field for field in table.schema])
+                table = table.cast(schema)
+                if saveFormat == 'parquet':
+                    writer = pq.ParquetWriter(str(path), schema)
+                else:
+                    writer = ipc.new_file(str(path), schema)
+            else:
+                df = df.reindex(columns=schema.names)
+                try:
+                    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+                except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                    raise ValueError(f"The types of a chunk differ from the first one ({e}), use a bigger chunkSize")
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:  # no record
+        if saveFormat == 'parquet':
+            pd.DataFrame().to_parquet(path)
+        else:
+            pd.DataFrame().to_feather(path)
+
+
+def _writeNdjson(records: object, path: Path)->None:
+    if isDataFrame(records):
+        records = records.to_dict(orient='records')
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, default=str))
+            f.write('\n')
+
+
+def _writeFile(records: object, path: Path, saveFormat: str, chunkSize: int)->None:
+    if saveFormat in ['parquet', 'feather']:
+        _writeArrow(records, path, saveFormat, chunkSize)
+    elif saveFormat == 'ndjson':
+        _writeNdjson(records, path)
+    elif saveFormat == 'csv':
+        df = records if isDataFrame(records) else pd.DataFrame(list(records))
+        df.to_csv(path, index=False)
+    else:
+        with open(path, 'w') as f:
+            f.write(json.dumps(records.to_dict(orient='records') if isDataFrame(records) else list(records), indent=2, default=str))
+
+
+def save(records: object, name: str, saveFormat: str = 'parquet', savePath: str = None, partitionBy: str = None, chunkSize: int = 50000)->str:
+    """
+    Write the records in a file (or a folder when partitioned) and return its path.
+    Arguments:
+        records : REQUIRED : list or iterator of dictionaries (ex: iterTraits()), or dataframe.
+        name : REQUIRED : name used for the default path (ex: "traits").
+        saveFormat : OPTIONAL : parquet (default), feather, ndjson (gzipped JSON, one record per line), csv or json.
+            parquet and feather require the pyarrow module.
+        savePath : OPTIONAL : path of the file, or of the folder when partitioned (default: name + extension in the working directory).
+        partitionBy : OPTIONAL : column used to split the records in one file per value (ex: "folderId", "dataSourceId"),
+            written as savePath/column=value/part-0 + extension.
+        chunkSize : OPTIONAL : number of records converted and written at once for parquet and feather (default 50000).
+    """
+    if saveFormat not in FORMATS.keys():
+        raise ValueError(f"saveFormat should be part of the following values {list(FORMATS.keys())}")
+    if saveFormat in ['parquet', 'feather']:
+        _requireArrow(saveFormat)
+    extension = FORMATS[saveFormat]
+    if partitionBy is None:
+        path = Path(savePath) if savePath is not None else Path(f"{name}{extension}")
+        if path.parent != Path('.'):
+            path.parent.mkdir(parents=True, exist_ok=True)
+        _writeFile(records, path, saveFormat, chunkSize)
+        return str(path)
+    path = Path(savePath) if savePath is not None else Path(name)
+    if isDataFrame(records):
+        groups = {value: group for value, group in records.groupby(partitionBy, dropna=False)}
+    else:
+        groups = {}
+        for record in records:
+            groups.setdefault(record.get(partitionBy), []).append(record)
+    for value, group in groups.items():
+        folder = path / f"{partitionBy}={value}"
+        folder.mkdir(parents=True, exist_ok=True)
+        _writeFile(group, folder / f"part-0{extension}", saveFormat, chunkSize)
+    return str(path)
+
+
+def _formatOf(path: Path)->str:
+    for saveFormat, extension in FORMATS.items():
+        if path.name.endswith(extension):
+            return saveFormat
+    raise ValueError(f"Unknown format for {path}, pass the saveFormat argument")
+
+
+def _readFile(path: Path, saveFormat: str)->pd.DataFrame:
+    if saveFormat == 'parquet':
+        return pd.read_parquet(path)
+    if saveFormat == 'feather':
+        return pd.read_feather(path)
+    if saveFormat == 'ndjson':
+        return pd.read_json(path, lines=True, compression='gzip')
+    if saveFormat == 'csv':
+        return pd.read_csv(path)
+    return pd.DataFrame(json.loads(Path(path).read_text()))
+
+
+def load(path: str, saveFormat: str = None)->pd.DataFrame:
+    """
+    Load a file (or a partitioned folder) written by the save function in a dataframe.
+    For a partitioned folder, the partition column is added back from the folder names.
+    Arguments:
+        path : REQUIRED : path of the file or folder.
+        saveFormat : OPTIONAL : format of the files, deduced from the extension when not provided.
+    """
+    path = Path(path)
+    if path.is_file():
+        saveFormat = saveFormat or _formatOf(path)
+        if saveFormat in ['parquet', 'feather']:
+            _requireArrow(saveFormat)
+        return _readFile(path, saveFormat)
+    frames = []
+    for file in sorted(path.glob('*=*/part-*')):
+        fileFormat = saveFormat or _formatOf(file)
+        if fileFormat in ['parquet', 'feather']:
+            _requireArrow(fileFormat)
+        df = _readFile(file, fileFormat)
+        column, value = file.parent.name.split('=', 1)
+        if column not in df.columns:
+            df[column] = pd.to_numeric(value) if re.fullmatch(r"-?\d+", value) else value
+        frames.append(df)
+    if len(frames) == 0:
+        raise FileNotFoundError(f"No file found under {path}")
+    return pd.concat(frames, ignore_index=True)
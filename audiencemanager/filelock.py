@@ -0,0 +1,74 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Exclusive lock on a file, shared between threads and processes.
+    Used as a context manager:
+        with FileLock('path/to/file.lock'):
+            ...
+    """
+
+    def __init__(self, path: str)->None:
+        """
+        Arguments:
+            path : REQUIRED : path to the lock file, created if it does not exist.
+        """
+        self.path = path
+        self._threadLock = threading.Lock()
+        self._fd = None
+
+    def acquire(self)->None:
+        """
+        Block until the lock is acquired.
+        """
+        self._threadLock.acquire()
+        try:
+            folder = os.path.dirname(self.path)
+            if folder != "":
+                os.makedirs(folder, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK gives up after 10 seconds
+                        continue
+            self._fd = fd
+        except Exception:
+            self._threadLock.release()
+            raise
+
+    def release(self)->None:
+        """
+        Release the lock.
+        """
+        fd = self._fd
+        self._fd = None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            os.close(fd)
+        finally:
+            self._threadLock.release()
+
+    def __enter__(self)->'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *args)->None:
+        self.release()
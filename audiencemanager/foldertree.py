@@ -0,0 +1,166 @@
+from __future__ import annotations
+from audiencemanager.modules import np, pd
+
+
+class FolderTree:
+    """
+    Folder hierarchy (traits or segments) stored in arrays, in pre-order.
+    The position of a folder is its pre-order index, its descendants are the positions following it up to the size of its subtree,
+    so that parent lookups are O(1) and ancestor / descendant queries do not walk the tree.
+    Build it from the raw response of getTraitFolders or getSegmentFolders.
+    """
+
+    def __init__(self, folders: object = None, sep: str = '/')->None:
+        """
+        Build the tree with an iterative traversal of the nested subFolders.
+        Arguments:
+            folders : REQUIRED : raw response of the folder endpoint (list or dict of nested folders).
+            sep : OPTIONAL : separator used in the folder paths (default "/").
+        """
+        self.sep = sep
+        ids, names, parentIds, folderCounts, apiPaths, parents, depths = [], [], [], [], [], [], []
+        stack = [(folders, -1, 0)]
+        while len(stack) > 0:
+            element, parent, depth = stack.pop()
+            if type(element) == list:
+                stack.extend((child, parent, depth) for child in reversed(element))
+            elif type(element) == dict:
+                if 'folderId' in element.keys():
+                    ids.append(element['folderId'])
+                    names.append(element.get('name', ''))
+                    parentIds.append(element.get('parentFolderId', 0))
+                    folderCounts.append(element.get('folderCount', 0))
+                    apiPaths.append(element.get('path', ''))
+                    parents.append(parent)
+                    depths.append(depth)
+                    parent, depth = len(ids) - 1, depth + 1
+                if 'subFolders' in element.keys():
+                    stack.append((element['subFolders'], parent, depth))
+        size = len(ids)
+        self.ids = np.array(ids, dtype=np.int64)
+        self.names = np.array(names, dtype=object)
+        self.parentIds = np.array(parentIds, dtype=np.int64)
+        self.folderCounts = np.array(folderCounts, dtype=np.int64)
+        self.apiPaths = np.array(apiPaths, dtype=object)
+        self.parents = np.array(parents, dtype=np.int64)
+        self.depths = np.array(depths, dtype=np.int64)
+        self.sizes = np.ones(size, dtype=np.int64)
+        paths = [None] * size
+        for position in range(size):  # parents are always before their children in pre-order
+            parent = parents[position]
+            paths[position] = names[position] if parent < 0 else paths[parent] + sep + names[position]
+        for position in range(size - 1, 0, -1):  # children are always after their parents
+            if parents[position] >= 0:
+                self.sizes[parents[position]] += self.sizes[position]
+        self.paths = np.array(paths, dtype=object)
+        self.pre = np.arange(size, dtype=np.int64)
+        self.post = self.pre + self.sizes - 1 - self.depths
+        self.positions = {folderId: position for position, folderId in enumerate(ids)}
+        self.pathPositions = {path: position for position, path in enumerate(paths)}
+
+    def __len__(self)->int:
+        return len(self.ids)
+
+    def __contains__(self, folderId: int)->bool:
+        return folderId in self.positions
+
+    def _position(self, folderId: int)->int:
+        position = self.positions.get(int(folderId))
+        if position is None:
+            raise KeyError(f"Unknown folder: {folderId}")
+        return position
+
+    def parent(self, folderId: int)->int:
+        """
+        Return the ID of the parent folder, None for a root folder.
+        """
+        parent = self.parents[self._position(folderId)]
+        if parent < 0:
+            return None
+        return int(self.ids[parent])
+
+    def children(self, folderId: int)->list:
+        """
+        Return the IDs of the direct sub folders.
+        """
+        position = self._position(folderId)
+        start, end = position + 1, position + self.sizes[position]
+        return self.ids[start:end][self.parents[start:end] == position].tolist()
+
+    def ancestors(self, folderId: int)->list:
+        """
+        Return the IDs of the ancestors, from the parent folder to the root folder.
+        """
+        result = []
+        parent = self.parents[self._position(folderId)]
+        while parent >= 0:
+            result.append(int(self.ids[parent]))
+            parent = self.parents[parent]
+        return result
+
+    def descendants(self, folderId: int, includeSelf: bool = False)->np.ndarray:
+        """
+        Return the IDs of all of the folders of the subtree, in pre-order.
+        Arguments:
+            folderId : REQUIRED : ID of the folder.
+            includeSelf : OPTIONAL : include the folder itself (default False).
+        """
+        position = self._position(folderId)
+        start = position if includeSelf else position + 1
+        return self.ids[start:position + self.sizes[position]]
+
+    def isAncestor(self, ancestorId: int, folderId: int)->bool:
+        """
+        Return True if ancestorId is an ancestor of folderId.
+        """
+        ancestor, position = self._position(ancestorId), self._position(folderId)
+        return bool(self.pre[ancestor] < self.pre[position] and self.post[position] < self.post[ancestor])
+
+    def depth(self, folderId: int)->int:
+        """
+        Return the depth of the folder (0 for a root folder).
+        """
+        return int(self.depths[self._position(folderId)])
+
+    def path(self, folderId: int)->str:
+        """
+        Return the path of the folder, made of the names of its ancestors and its own name.
+        """
+        return self.paths[self._position(folderId)]
+
+    def resolve(self, path: str)->int:
+        """
+        Return the ID of the folder with that path, None if there is none.
+        """
+        position = self.pathPositions.get(path.strip(self.sep))
+        if position is None:
+            return None
+        return int(self.ids[position])
+
+    def joinPaths(self, df: pd.DataFrame, folderColumn: str = 'folderId', pathColumn: str = 'folderPath')->pd.DataFrame:
+        """
+        Return a copy of the dataframe with the path of the folders added as a new column.
+        Arguments:
+            df : REQUIRED : dataframe with a folder ID column (ex: getTraits or getSegments result).
+            folderColumn : OPTIONAL : name of the folder ID column (default "folderId").
+            pathColumn : OPTIONAL : name of the column added (default "folderPath").
+        """
+        df = df.copy()
+        positions = pd.Index(self.ids).get_indexer(pd.to_numeric(df[folderColumn], errors='coerce'))
+        paths = np.full(len(positions), None, dtype=object)
+        found = positions >= 0  # -1 for the unknown folders, every position when the tree is empty
+        paths[found] = self.paths[positions[found]]
+        df[pathColumn] = pd.Series(paths, index=df.index, dtype=object)  # keep None for the unknown folders
+        return df
+
+    def toDataFrame(self)->pd.DataFrame:
+        """
+        Return the folders as a dataframe, in pre-order.
+        """
+        return pd.DataFrame({
+            'folderId': self.ids,
+            'name': self.names,
+            'parentFolderId': self.parentIds,
+            'path': self.apiPaths,
+            'folderCounts': self.folderCounts,
+        })
@@ -0,0 +1,169 @@
+from __future__ import annotations
+from audiencemanager.modules import np, pd
+import sys
+
+# Per endpoint schema:
+#   ids : identifiers and counters, downcast to the smallest integer type.
+#   categories : low cardinality columns, stored as categoricals.
+#   strings : repeated strings, interned so that identical values are stored once.
+#   timestamps : epoch in milliseconds, parsed as datetime (UTC).
+#   flatten : columns containing a dictionary, flattened in "column.key" columns.
+_COMMON_IDS = ['pid', 'crUID', 'upUID', 'folderId', 'dataSourceId']
+SCHEMAS = {
+    'traits': {
+        'ids': ['sid', 'categoryId', 'algoModelId', 'traitRuleVersion', 'ttl', 'thresholdValue'] + _COMMON_IDS,
+        'categories': ['traitType', 'status', 'type'],
+        'strings': ['name', 'description', 'integrationCode', 'comments', 'traitRule'],
+        'timestamps': ['createTime', 'updateTime'],
+        'flatten': ['metrics'],
+    },
+    'segments': {
+        'ids': ['sid', 'mergeRuleDataSourceId', 'version'] + _COMMON_IDS,
+        'categories': ['status', 'inUseStatus'],
+        'strings': ['name', 'description', 'integrationCode', 'segmentRule'],
+        'timestamps': ['createTime', 'updateTime'],
+        'flatten': ['metrics'],
+    },
+    'dataSources': {
+        'ids': ['dataSourceId', 'pid', 'masterDataSourceIdProviderId'],
+        'categories': ['idType', 'type', 'status'],
+        'strings': ['name', 'description', 'integrationCode'],
+        'timestamps': ['createTime', 'updateTime'],
+        'flatten': [],
+    },
+    'reports': {
+        'ids': ['sid', 'folderId', 'dataSourceId', 'pid'],
+        'categories': ['traitType', 'status', 'type'],
+        'strings': ['name', 'integrationCode'],
+        'timestamps': ['createTime', 'updateTime'],
+        'flatten': ['metrics'],
+    },
+    'destinations': {
+        'ids': ['destinationId', 'pid', 'dataSourceId', 'masterDataSourceId'],
+        'categories': ['destinationType', 'status'],
+        'strings': ['name', 'description'],
+        'timestamps': ['createTime', 'updateTime'],
+        'flatten': ['metrics'],
+    },
+    'derivedSignals': {
+        'ids': ['signalId', 'pid', 'crUID', 'upUID'],
+        'categories': ['sourceKey', 'targetKey'],
+        'strings': ['sourceValue', 'targetValue', 'integrationCode'],
+        'timestamps': ['createTime', 'updateTime'],
+        'flatten': [],
+    },
+    'models': {
+        'ids': ['algoModelId', 'pid', 'crUID', 'upUID', 'lookBackPeriod'],
+        'categories': ['status', 'algoType'],
+        'strings': ['name', 'description'],
+        'timestamps': ['createTime', 'updateTime', 'lastProcessTime'],
+        'flatten': [],
+    },
+    'modelTraits': {
+        'ids': ['sid', 'algoModelId', 'folderId', 'dataSourceId'],
+        'categories': ['traitType', 'status'],
+        'strings': ['name'],
+        'timestamps': ['createTime', 'updateTime'],
+        'flatten': ['metrics'],
+    },
+}
+
+_INTEGER_TYPES = [('int8', 'Int8'), ('int16', 'Int16'), ('int32', 'Int32'), ('int64', 'Int64')]
+
+
+def cellValue(value: object)->object:
+    """
+    Return the value of a dataframe cell as a python value: None for the missing values (None, NaN, NaT, pd.NA)
+    and int for the integral floats (an integer column with a missing value becomes float64 in a dataframe).
+    Used to read the rows passed to the write methods (createTraitsBulk, makePlan).
+    """
+    if value is None:
+        return None
+    if hasattr(value, 'item') and not hasattr(value, '__len__'):  # numpy scalar
+        value = value.item()
+    if type(value) in (list, dict, tuple):
+        return value
+    if pd.isna(value):
+        return None
+    if type(value) == float and value.is_integer():
+        return int(value)
+    return value
+
+
+def _compactInteger(series: pd.Series)->pd.Series:
+    """
+    Return the series with the smallest integer type able to hold its values (nullable if it contains missing values).
+    The series is returned unchanged if it contains values that are not integers.
+    """
+    if series.dtype == bool or isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    try:
+        numbers = pd.to_numeric(series, errors='coerce')
+    except TypeError:  # lists or dictionaries
+        return series
+    missing = numbers.isna()
+    if (missing & series.notna()).any():
+        return series  # values that are not numbers
+    values = numbers[~missing]
+    if len(values) == 0:
+        return series
+    if (values % 1 != 0).any():
+        return numbers
+    low, high = values.min(), values.max()
+    for numpyType, nullableType in _INTEGER_TYPES:
+        info = np.iinfo(numpyType)
+        if info.min <= low and high <= info.max:
+            return numbers.astype(nullableType if missing.any() else numpyType)
+    return numbers
+
+
+def _intern(series: pd.Series)->pd.Series:
+    """
+    Return the series with its strings interned, identical values then share the same object.
+    """
+    return series.map(lambda value: sys.intern(value) if type(value) == str else value)
+
+
+def _flatten(df: pd.DataFrame, column: str)->pd.DataFrame:
+    """
+    Replace a column of dictionaries by one column per key, named "column.key".
+    """
+    values = df[column].tolist()
+    nested = pd.DataFrame([value if type(value) == dict else {} for value in values], index=df.index)
+    nested.columns = [f"{column}.{key}" for key in nested.columns]
+    position = df.columns.get_loc(column)
+    df = df.drop(columns=[column])
+    for offset, name in enumerate(nested.columns):
+        df.insert(position + offset, name, nested[name])
+    return df
+
+
+def toDataFrame(records: list, kind: str)->pd.DataFrame:
+    """
+    Build a typed and compact dataframe from the list returned by an endpoint.
+    The nested metrics are flattened, the ids and counters use the smallest integer type, the status and types are categoricals,
+    the repeated strings are interned and the timestamps are parsed.
+    Arguments:
+        records : REQUIRED : list of dictionaries returned by the API.
+        kind : REQUIRED : schema to use, one of SCHEMAS keys (traits, segments, dataSources, reports, destinations, derivedSignals, models, modelTraits).
+    """
+    if kind not in SCHEMAS.keys():
+        raise ValueError(f"kind should be part of the following values {list(SCHEMAS.keys())}")
+    schema = SCHEMAS[kind]
+    df = pd.DataFrame(records)
+    if len(df) == 0:
+        return df
+    for column in schema['flatten']:
+        if column in df.columns:
+            df = _flatten(df, column)
+    for column in df.columns:
+        if column in schema['timestamps']:
+            df[column] = pd.to_datetime(pd.to_numeric(df[column], errors='coerce'), unit='ms', utc=True)
+        elif column in schema['categories']:
+            if df[column].map(type).isin([list, dict]).any() == False:
+                df[column] = df[column].astype('category')
+        elif column in schema['strings']:
+            df[column] = _intern(df[column])
+        elif column in schema['ids'] or column.startswith(tuple(f"{flattened}." for flattened in schema['flatten'])):
+            df[column] = _compactInteger(df[column])
+    return df
@@ -0,0 +1,187 @@
+import gzip, pickle
+
+_EMPTY = frozenset()
+
+
+class ObjectIndex:
+    """
+    In-memory index over a list of objects (traits or segments), giving O(1) lookups by id, integration code, name, data source and folder.
+    Use the TraitIndex and SegmentIndex classes.
+    The sets returned by the lookup methods are the internal ones, they should not be modified.
+    """
+    idKey = 'sid'
+    # unique keys : one id per value
+    UNIQUE_KEYS = ['integrationCode']
+    # grouping keys : set of ids per value
+    GROUP_KEYS = ['name', 'dataSourceId', 'folderId']
+
+    def __init__(self, records: object = None)->None:
+        """
+        Build the index.
+        Arguments:
+            records : OPTIONAL : list of objects (raw response of the list methods) or dataframe.
+        """
+        self.records = {}
+        self.unique = {key: {} for key in self.UNIQUE_KEYS}
+        self.groups = {key: {} for key in self.GROUP_KEYS}
+        if records is not None:
+            self.update(records)
+
+    def __len__(self)->int:
+        return len(self.records)
+
+    def __contains__(self, objectId: int)->bool:
+        return objectId in self.records
+
+    def _normalize(self, key: str, value: object)->object:
+        """
+        Ids are stored as int so that "123" and 123 are the same key.
+        """
+        if key in ['dataSourceId', 'folderId'] or key == self.idKey:
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return value
+        return value
+
+    def upsert(self, record: dict)->None:
+        """
+        Add or replace an object in the index.
+        Arguments:
+            record : REQUIRED : object as returned by the API.
+        """
+        objectId = self._normalize(self.idKey, record[self.idKey])
+        if objectId in self.records:
+            self.remove(objectId)
+        self.records[objectId] = record
+        for key in self.UNIQUE_KEYS:
+            value = record.get(key)
+            if value is not None and value == value and value != "":  # value == value skips the NaN of dataframes
+                self.unique[key][value] = objectId
+        for key in self.GROUP_KEYS:
+            value = record.get(key)
+            if value is not None and value == value:
+                self.groups[key].setdefault(self._normalize(key, value), set()).add(objectId)
+
+    def remove(self, objectId: int)->dict:
+        """
+        Remove an object from the index. Return the removed object (None if it was not indexed).
+        Arguments:
+            objectId : REQUIRED : id of the object.
+        """
+        objectId = self._normalize(self.idKey, objectId)
+        record = self.records.pop(objectId, None)
+        if record is None:
+            return None
+        for key in self.UNIQUE_KEYS:
+            value = record.get(key)
+            if value is not None and self.unique[key].get(value) == objectId:
+                del self.unique[key][value]
+        for key in self.GROUP_KEYS:
+            value = record.get(key)
+            if value is not None and value == value:
+                value = self._normalize(key, value)
+                ids = self.groups[key].get(value)
+                if ids is not None:
+                    ids.discard(objectId)
+                    if len(ids) == 0:
+                        del self.groups[key][value]
+        return record
+
+    def update(self, records: object)->None:
+        """
+        Add or replace several objects.
+        Arguments:
+            records : REQUIRED : list of objects or dataframe.
+        """
+        if hasattr(records, 'to_dict'):
+            records = records.to_dict(orient='records')
+        for record in records:
+            self.upsert(record)
+
+    def get(self, objectId: int)->dict:
+        """
+        Return the object with that id, None if it is not indexed.
+        """
+        return self.records.get(self._normalize(self.idKey, objectId))
+
+    def byIntegrationCode(self, integrationCode: str)->dict:
+        """
+        Return the object with that integration code, None if there is none.
+        """
+        objectId = self.unique['integrationCode'].get(integrationCode)
+        if objectId is None:
+            return None
+        return self.records[objectId]
+
+    def idByIntegrationCode(self, integrationCode: str)->int:
+        """
+        Return the id of the object with that integration code, None if there is none.
+        """
+        return self.unique['integrationCode'].get(integrationCode)
+
+    def idsByName(self, name: str)->set:
+        """
+        Return the ids of the objects with that name.
+        """
+        return self.groups['name'].get(name, _EMPTY)
+
+    def idsByDataSource(self, dataSourceId: int)->set:
+        """
+        Return the ids of the objects of that data source.
+        """
+        return self.groups['dataSourceId'].get(self._normalize('dataSourceId', dataSourceId), _EMPTY)
+
+    def idsByFolder(self, folderId: int)->set:
+        """
+        Return the ids of the objects stored in that folder (not in its sub folders).
+        """
+        return self.groups['folderId'].get(self._normalize('folderId', folderId), _EMPTY)
+
+    def save(self, path: str, compress: bool = False)->None:
+        """
+        Serialize the index in a file.
+        Arguments:
+            path : REQUIRED : path of the file.
+            compress : OPTIONAL : gzip the file (smaller, slower to load) (default False).
+        """
+        opener = gzip.open if compress else open
+        with opener(path, 'wb') as f:
+            pickle.dump({'class': type(self).__name__, 'records': self.records, 'unique': self.unique, 'groups': self.groups},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str)->'ObjectIndex':
+        """
+        Load an index saved with the save method. Only load files you have created, as pickle is used.
+        Arguments:
+            path : REQUIRED : path of the file.
+        """
+        with open(path, 'rb') as f:
+            compressed = f.read(2) == b'\x1f\x8b'
+        opener = gzip.open if compressed else open
+        with opener(path, 'rb') as f:
+            state = pickle.load(f)
+        if state['class'] != cls.__name__:
+            raise ValueError(f"The file contains a {state['class']}, not a {cls.__name__}")
+        index = cls()
+        index.records = state['records']
+        index.unique = state['unique']
+        index.groups = state['groups']
+        return index
+
+
+class TraitIndex(ObjectIndex):
+    """
+    In-memory index over traits, giving O(1) lookups by sid, integration code, name, data source and folder.
+    Build it from the getTraits response: TraitIndex(aam.getTraits(format='raw', includeDetails=True))
+    """
+    idKey = 'sid'
+
+
+class SegmentIndex(ObjectIndex):
+    """
+    In-memory index over segments, giving O(1) lookups by sid, integration code, name, data source and folder.
+    Build it from the getSegments response: SegmentIndex(aam.getSegments(format='raw'))
+    """
+    idKey = 'sid'
@@ -0,0 +1,274 @@
+"""
+Metrics and tracing hooks of the connector (metrics parameter).
+The connector sends an event for each request sent, retry, token retrieval and JSON decoding, and the AudienceManager
+list methods for each conversion of a response (dataframe, arrow, ...). The events are passed to the subscribed callbacks,
+such as the PrometheusExporter and OpenTelemetryExporter of this module. Nothing is measured when no Metrics instance is set.
+Events (name : values):
+    request : method, endpoint, status (None when no response), error, attempt, seconds, bytesSent, bytesReceived
+    retry : method, endpoint, attempt, reason (status code, "unauthorized" or exception name), delay
+    token : seconds, status
+    decode : endpoint, seconds, bytes
+    output : kind, format, rows, seconds
+"""
+from functools import lru_cache
+from urllib.parse import urlparse
+import threading, time
+from audiencemanager.modules import otelMetrics, otelTrace
+from audiencemanager.__version__ import __version__
+
+
+class Metrics:
+    """
+    Dispatch the events of the connector to the callbacks, called as callback(event, values) in the thread of the request.
+    An exception raised by a callback is counted in the errors attribute and does not stop the request.
+    Ex: metrics = Metrics(PrometheusExporter())
+        aam = AudienceManager(metrics=metrics)
+    Arguments:
+        callbacks : OPTIONAL : callbacks to subscribe.
+    """
+    EVENTS = ['request', 'retry', 'token', 'decode', 'output']
+
+    def __init__(self, *callbacks: callable)->None:
+        self._callbacks = list(callbacks)
+        self._lock = threading.Lock()
+        self.errors = 0
+
+    def __repr__(self)->str:
+        return f"Metrics({len(self._callbacks)} callbacks, {self.errors} errors)"
+
+    def subscribe(self, callback: callable)->callable:
+        """
+        Register a callback receiving (event, values). Returns the callback, so that it can be used as a decorator.
+        """
+        with self._lock:
+            self._callbacks = self._callbacks + [callback]  # the list is replaced, emit does not need the lock
+        return callback
+
+    def unsubscribe(self, callback: callable)->None:
+        with self._lock:
+            self._callbacks = [registered for registered in self._callbacks if registered is not callback]
+
+    def emit(self, event: str, **values)->None:
+        """
+        Pass the event to all of the callbacks.
+        """
+        for callback in self._callbacks:
+            try:
+                callback(event, values)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+
+
+@lru_cache(maxsize=1024)
+def route(endpoint: str)->str:
+    """
+    Return the path of the endpoint with the ids replaced by {id} (ex: /v1/traits/{id}), to keep a bounded number of label values.
+    """
+    path = urlparse(endpoint).path or endpoint
+    return '/'.join('{id}' if part.isdigit() else part for part in path.split('/'))
+
+
+class PrometheusExporter:
+    """
+    Callback aggregating the events in counters and histograms, rendered in the Prometheus text format with render,
+    or served on /metrics with serve.
+    Arguments:
+        prefix : OPTIONAL : prefix of the metric names (default "aam").
+        buckets : OPTIONAL : upper bounds in seconds of the duration histograms.
+    """
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    HELP = {
+        'requests_total': ('counter', 'Requests sent to the API by status code'),
+        'request_duration_seconds': ('histogram', 'Duration of the requests until the response is received'),
+        'request_bytes_total': ('counter', 'Bytes of the request bodies sent'),
+        'response_bytes_total': ('counter', 'Bytes of the response bodies received, as sent on the network'),
+        'retries_total': ('counter', 'Requests retried by reason'),
+        'token_refreshes_total': ('counter', 'Tokens retrieved from IMS'),
+        'token_refresh_duration_seconds': ('histogram', 'Duration of the token retrievals'),
+        'decode_duration_seconds': ('histogram', 'Duration of the JSON decoding of the responses'),
+        'decode_bytes_total': ('counter', 'Bytes of JSON decoded'),
+        'output_duration_seconds': ('histogram', 'Duration of the conversion of the responses (dataframe, arrow, ...)'),
+        'output_rows_total': ('counter', 'Rows converted'),
+    }
+
+    def __init__(self, prefix: str = 'aam', buckets: tuple = BUCKETS)->None:
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self._counters = {}  # (name, labels) : value
+        self._histograms = {}  # (name, labels) : [count per bucket, sum, count]
+        self._lock = threading.Lock()
+        self.server = None
+
+    def __call__(self, event: str, values: dict)->None:
+        if event == 'request':
+            labels = (('method', values['method']), ('endpoint', route(values['endpoint'])))
+            status = str(values['status']) if values['status'] is not None else values['error']
+            self._count('requests_total', labels + (('status', status),))
+            self._observe('request_duration_seconds', labels, values['seconds'])
+            if values['bytesSent']:
+                self._count('request_bytes_total', labels, values['bytesSent'])
+            if values['bytesReceived']:
+                self._count('response_bytes_total', labels, values['bytesReceived'])
+        elif event == 'retry':
+            self._count('retries_total', (('endpoint', route(values['endpoint'])), ('reason', values['reason'])))
+        elif event == 'token':
+            self._count('token_refreshes_total', (('status', str(values['status'])),))
+            self._observe('token_refresh_duration_seconds', (), values['seconds'])
+        elif event == 'decode':
+            labels = (('endpoint', route(values['endpoint'])),)
+            self._observe('decode_duration_seconds', labels, values['seconds'])
+            self._count('decode_bytes_total', labels, values['bytes'])
+        elif event == 'output':
+            labels = (('kind', values['kind'] or ''), ('format', values['format']))
+            self._observe('output_duration_seconds', labels, values['seconds'])
+            if values['rows'] is not None:
+                self._count('output_rows_total', labels, values['rows'])
+
+    def _count(self, name: str, labels: tuple, value: float = 1)->None:
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0) + value
+
+    def _observe(self, name: str, labels: tuple, value: float)->None:
+        with self._lock:
+            histogram = self._histograms.get((name, labels))
+            if histogram is None:
+                histogram = self._histograms[(name, labels)] = [0] * len(self.buckets) + [0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[index] += 1
+                    break
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    @staticmethod
+    def _labels(labels: tuple)->str:
+        if len(labels) == 0:
+            return ''
+        escaped = [(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for name, value in labels]
+        return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+    def render(self)->str:
+        """
+        Return the metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(value) for key, value in self._histograms.items()}
+        lines = []
+        for name, (metricType, description) in self.HELP.items():
+            series = counters if metricType == 'counter' else histograms
+            keys = sorted(key for key in series if key[0] == name)
+            if len(keys) == 0:
+                continue
+            fullName = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {fullName} {description}")
+            lines.append(f"# TYPE {fullName} {metricType}")
+            for key in keys:
+                labels = key[1]
+                if metricType == 'counter':
+                    lines.append(f"{fullName}{self._labels(labels)} {series[key]}")
+                    continue
+                cumulative = 0
+                for bound, number in zip(self.buckets, series[key]):
+                    cumulative += number
+                    lines.append(f"{fullName}_bucket{self._labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{fullName}_bucket{self._labels(labels + (('le', '+Inf'),))} {series[key][-1]}")
+                lines.append(f"{fullName}_sum{self._labels(labels)} {series[key][-2]}")
+                lines.append(f"{fullName}_count{self._labels(labels)} {series[key][-1]}")
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int = 9464, host: str = '0.0.0.0')->object:
+        """
+        Serve the metrics on http://host:port/metrics from a background thread, to be scraped by Prometheus.
+        Returns the http.server.ThreadingHTTPServer started.
+        """
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args)->None:
+                pass
+
+            def do_GET(self)->None:
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='aam-metrics', daemon=True).start()
+        return self.server
+
+    def stop(self)->None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class OpenTelemetryExporter:
+    """
+    Callback recording the events with the OpenTelemetry API (pip install audiencemanager[otel]): a client span per request
+    sent, child of the current span, and the metrics of the PrometheusExporter as OpenTelemetry instruments.
+    The providers configured by the application (SDK and exporters) are used by default.
+    Arguments:
+        meterProvider : OPTIONAL : MeterProvider to use instead of the global one.
+        tracerProvider : OPTIONAL : TracerProvider to use instead of the global one.
+        traces : OPTIONAL : create a span per request (default True).
+    """
+
+    def __init__(self, meterProvider: object = None, tracerProvider: object = None, traces: bool = True)->None:
+        meter = otelMetrics.get_meter('audiencemanager', __version__, meter_provider=meterProvider)
+        self.tracer = otelTrace.get_tracer('audiencemanager', __version__, tracer_provider=tracerProvider) if traces else None
+        self.requests = meter.create_counter('aam.requests', unit='{request}', description='Requests sent to the API')
+        self.duration = meter.create_histogram('aam.request.duration', unit='s', description='Duration of the requests')
+        self.bytesSent = meter.create_counter('aam.request.body.size', unit='By', description='Bytes of the request bodies sent')
+        self.bytesReceived = meter.create_counter('aam.response.body.size', unit='By', description='Bytes of the response bodies received')
+        self.retries = meter.create_counter('aam.retries', unit='{retry}', description='Requests retried')
+        self.token = meter.create_histogram('aam.token.duration', unit='s', description='Duration of the token retrievals')
+        self.decode = meter.create_histogram('aam.decode.duration', unit='s', description='Duration of the JSON decoding')
+        self.output = meter.create_histogram('aam.output.duration', unit='s', description='Duration of the conversion of the responses')
+        self.rows = meter.create_counter('aam.output.rows', unit='{row}', description='Rows converted')
+
+    def __call__(self, event: str, values: dict)->None:
+        if event == 'request':
+            attributes = {'http.request.method': values['method'], 'url.template': route(values['endpoint'])}
+            if values['status'] is not None:
+                attributes['http.response.status_code'] = values['status']
+            else:
+                attributes['error.type'] = values['error']
+            self.requests.add(1, attributes)
+            self.duration.record(values['seconds'], attributes)
+            if values['bytesSent']:
+                self.bytesSent.add(values['bytesSent'], attributes)
+            if values['bytesReceived']:
+                self.bytesReceived.add(values['bytesReceived'], attributes)
+            if self.tracer is not None:
+                self._span(values, attributes)
+        elif event == 'retry':
+            self.retries.add(1, {'url.template': route(values['endpoint']), 'aam.retry.reason': values['reason']})
+        elif event == 'token':
+            self.token.record(values['seconds'], {'http.response.status_code': values['status']})
+        elif event == 'decode':
+            self.decode.record(values['seconds'], {'url.template': route(values['endpoint'])})
+        elif event == 'output':
+            attributes = {'aam.kind': values['kind'] or '', 'aam.format': values['format']}
+            self.output.record(values['seconds'], attributes)
+            if values['rows'] is not None:
+                self.rows.add(values['rows'], attributes)
+
+    def _span(self, values: dict, attributes: dict)->None:
+        """
+        Record the span of a request once it is done, from its duration.
+        """
+        end = time.time_ns()
+        attributes = dict(attributes, **{'url.full': values['endpoint'], 'aam.attempt': values['attempt']})
+        span = self.tracer.start_span(f"{values['method']} {attributes['url.template']}", kind=otelTrace.SpanKind.CLIENT,
+                                      attributes=attributes, start_time=end - int(values['seconds'] * 1e9))
+        if values['status'] is None or values['status'] >= 500:
+            span.set_status(otelTrace.Status(otelTrace.StatusCode.ERROR, values['error']))
+        span.end(end_time=end)
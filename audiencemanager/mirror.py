@@ -0,0 +1,311 @@
+from __future__ import annotations
+from contextlib import closing
+import hashlib, json, sqlite3, time
+from audiencemanager.modules import pd
+
+# object type : (table, id key, parent key used to scope the deletions)
+OBJECTS = {
+    'traits': ('traits', 'sid', None),
+    'segments': ('segments', 'sid', None),
+    'traitFolders': ('trait_folders', 'folderId', None),
+    'segmentFolders': ('segment_folders', 'folderId', None),
+    'destinations': ('destinations', 'destinationId', None),
+    'destinationMappings': ('destination_mappings', 'destinationMappingId', 'destinationId'),
+}
+
+
+def _flattenFolders(obj: object)->list:
+    """
+    Return the list of folders contained in the nested folder response, without their subFolders.
+    """
+    if type(obj) == dict and 'error' in obj.keys():
+        raise Exception(f"Issue retrieving the folders: {obj}")
+    folders = []
+    stack = [obj]
+    while len(stack) > 0:
+        element = stack.pop()
+        if type(element) == list:
+            stack.extend(reversed(element))
+        elif type(element) == dict:
+            if 'folderId' in element.keys():
+                folders.append({key: value for key, value in element.items() if key != 'subFolders'})
+            if 'subFolders' in element.keys():
+                stack.append(element['subFolders'])
+    return folders
+
+
+class Mirror:
+    """
+    Local SQLite mirror of the traits, segments, folders, destinations and destination mappings of an instance.
+    After the first full load, the sync only writes the objects whose updateTime (or content when there is no updateTime) changed,
+    and flags the objects that are not returned by the API anymore as deleted.
+    The query methods read from the mirror and do not request the API.
+    """
+
+    def __init__(self, path: str = 'aam_mirror.db')->None:
+        """
+        Open (or create) the mirror.
+        Arguments:
+            path : OPTIONAL : path of the SQLite file (default "aam_mirror.db").
+        """
+        self.path = path
+        self.lastSync = {}
+        with closing(self._connect()) as conn:
+            with conn:
+                for table, _, _ in OBJECTS.values():
+                    conn.execute(f"""CREATE TABLE IF NOT EXISTS {table} (
+                        id INTEGER PRIMARY KEY, parentId INTEGER, name TEXT, integrationCode TEXT, folderId INTEGER, dataSourceId INTEGER,
+                        updateTime INTEGER, version TEXT, deleted INTEGER DEFAULT 0, deletedAt REAL, payload TEXT)""")
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_integrationCode ON {table} (integrationCode)")
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_folderId ON {table} (folderId)")
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_parentId ON {table} (parentId)")
+                conn.execute("CREATE TABLE IF NOT EXISTS sync_state (object TEXT PRIMARY KEY, lastSync REAL, total INTEGER, upserted INTEGER, deleted INTEGER)")
+                # version of the destinations when their mappings were requested
+                conn.execute("CREATE TABLE IF NOT EXISTS mapping_state (destinationId INTEGER PRIMARY KEY, version TEXT)")
+
+    def _connect(self)->sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _version(self, record: dict)->str:
+        """
+        Return the version of the record: its updateTime, or a hash of its content.
+        """
+        if record.get('updateTime') is not None:
+            return str(record['updateTime'])
+        return hashlib.sha1(json.dumps(record, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _syncTable(self, objectType: str, records: object, parentIds: list = None)->dict:
+        """
+        Upsert the changed records of an object type and flag the missing ones as deleted.
+        Arguments:
+            objectType : REQUIRED : one of the OBJECTS keys.
+            records : REQUIRED : iterable of the records returned by the API.
+            parentIds : OPTIONAL : when the records are scoped by a parent (mappings per destination), the parents that have been requested.
+        """
+        table, idKey, parentKey = OBJECTS[objectType]
+        now = time.time()
+        summary = {'total': 0, 'upserted': 0, 'deleted': 0}
+        with closing(self._connect()) as conn:
+            with conn:
+                if parentIds is None:
+                    existing = dict(conn.execute(f"SELECT id, version FROM {table} WHERE deleted = 0"))
+                else:
+                    existing = {}
+                    for parentId in parentIds:
+                        existing.update(conn.execute(f"SELECT id, version FROM {table} WHERE deleted = 0 AND parentId = ?", (parentId,)))
+                seen = set()
+                rows = []
+                for record in records:
+                    recordId = record.get(idKey)
+                    if recordId is None:
+                        continue
+                    seen.add(recordId)
+                    version = self._version(record)
+                    if existing.get(recordId) == version:
+                        continue
+                    rows.append((recordId, record.get(parentKey) if parentKey is not None else None, record.get('name'), record.get('integrationCode'),
+                                 record.get('folderId'), record.get('dataSourceId'), record.get('updateTime'), version, json.dumps(record)))
+                    if len(rows) >= 1000:
+                        conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, NULL, ?)", rows)
+                        summary['upserted'] += len(rows)
+                        rows = []
+                if len(rows) > 0:
+                    conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, NULL, ?)", rows)
+                    summary['upserted'] += len(rows)
+                deleted = [(now, recordId) for recordId in existing if recordId not in seen]
+                conn.executemany(f"UPDATE {table} SET deleted = 1, deletedAt = ? WHERE id = ?", deleted)
+                summary['total'] = len(seen)
+                summary['deleted'] = len(deleted)
+                conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?)",
+                             (objectType, now, summary['total'], summary['upserted'], summary['deleted']))
+        return summary
+
+    def _parentIds(self, objectType: str)->set:
+        """
+        Return the parent IDs of the records of an object type that are not flagged as deleted.
+        """
+        table = OBJECTS[objectType][0]
+        with closing(self._connect()) as conn:
+            return {row[0] for row in conn.execute(f"SELECT DISTINCT parentId FROM {table} WHERE deleted = 0 AND parentId IS NOT NULL")}
+
+    def _mappingVersions(self)->dict:
+        """
+        Return the version of the destinations when their mappings were last requested.
+        """
+        with closing(self._connect()) as conn:
+            return dict(conn.execute("SELECT destinationId, version FROM mapping_state"))
+
+    def _setMappingVersions(self, versions: dict, removedIds: set)->None:
+        with closing(self._connect()) as conn:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO mapping_state VALUES (?, ?)", list(versions.items()))
+                conn.executemany("DELETE FROM mapping_state WHERE destinationId = ?", [(destinationId,) for destinationId in removedIds])
+
+    def sync(self, aam: object, objects: list = None, max_workers: int = 5, verbose: bool = False)->dict:
+        """
+        Synchronize the mirror with the instance. Return a summary per object type.
+        The API does not filter the lists on their updateTime, so the lists of traits, segments, folders and destinations are requested in full
+        and only the changed objects are written. The mappings are only requested for the destinations whose updateTime changed since the last sync
+        (the skipped key of the summary counts the other destinations).
+        Arguments:
+            aam : REQUIRED : AudienceManager instance used to request the API.
+            objects : OPTIONAL : list of object types to synchronize (default all): traits, segments, traitFolders, segmentFolders, destinations, destinationMappings.
+            max_workers : OPTIONAL : number of parallel requests for the destination mappings (default 5).
+            verbose : OPTIONAL : print information if set to True.
+        """
+        if objects is None:
+            objects = list(OBJECTS.keys())
+        for objectType in objects:
+            if objectType not in OBJECTS.keys():
+                raise ValueError(f"objects should be part of the following values {list(OBJECTS.keys())}")
+        summary = {}
+        destinations = None
+        for objectType in objects:
+            if objectType == 'traits':
+                records = aam.iterTraits(includeMetrics=False, includeDetails=True)
+            elif objectType == 'segments':
+                records = aam.iterSegments(includeMetrics=False)
+            elif objectType == 'traitFolders':
+                records = _flattenFolders(aam.getTraitFolders(format='raw'))
+            elif objectType == 'segmentFolders':
+                records = _flattenFolders(aam.getSegmentFolders(format='raw'))
+            elif objectType == 'destinations':
+                destinations = list(aam.iterDestinations(includeMetrics=False))
+                records = destinations
+            elif objectType == 'destinationMappings':
+                if destinations is None:
+                    destinations = list(aam.iterDestinations(includeMetrics=False))
+                # the mappings are only requested for the destinations whose version changed since their last request
+                versions = {destination['destinationId']: self._version(destination) for destination in destinations}
+                requested = self._mappingVersions()
+                destinationIds = [destinationId for destinationId, version in versions.items() if requested.get(int(destinationId)) != version]
+                mappings = aam._fanOut(lambda destinationId: aam.getDestinationMappings(destinationId, includeMetrics=False),
+                                       destinationIds, max_workers=max_workers)
+                records = []
+                requestedIds = []
+                for destinationId, destinationMappings in zip(destinationIds, mappings):
+                    if type(destinationMappings) != list:
+                        if verbose:
+                            print(f"Issue retrieving the mappings of destination {destinationId}: {destinationMappings}")
+                        continue
+                    requestedIds.append(destinationId)
+                    for mapping in destinationMappings:
+                        records.append(dict(mapping, destinationId=mapping.get('destinationId', destinationId)))
+                # the mappings of the deleted destinations are flagged as deleted too
+                currentIds = {int(destinationId) for destinationId in versions}
+                removedIds = (self._parentIds(objectType) | set(requested.keys())) - currentIds
+                summary[objectType] = self._syncTable(objectType, records, parentIds=requestedIds + sorted(removedIds))
+                summary[objectType]['skipped'] = len(versions) - len(destinationIds)
+                self._setMappingVersions({destinationId: versions[destinationId] for destinationId in requestedIds}, removedIds)
+                if verbose:
+                    print(f"{objectType} : {summary[objectType]}")
+                continue
+            summary[objectType] = self._syncTable(objectType, records)
+            if verbose:
+                print(f"{objectType} : {summary[objectType]}")
+        self.lastSync = summary
+        return summary
+
+    def query(self, sql: str, params: tuple = (), format: str = 'df')->object:
+        """
+        Run a SQL query on the mirror.
+        Arguments:
+            sql : REQUIRED : SQL query. Tables: traits, segments, trait_folders, segment_folders, destinations, destination_mappings, sync_state.
+            params : OPTIONAL : parameters of the query.
+            format : OPTIONAL : "df" returns a dataframe (default), "raw" returns a list of tuples.
+        """
+        with closing(self._connect()) as conn:
+            if format == "df":
+                return pd.read_sql_query(sql, conn, params=params)
+            return conn.execute(sql, params).fetchall()
+
+    def _getObjects(self, objectType: str, filters: dict = None, includeDeleted: bool = False, format: str = 'df')->object:
+        """
+        Return the stored payloads of an object type matching the filters.
+        """
+        table = OBJECTS[objectType][0]
+        conditions = []
+        params = []
+        if includeDeleted == False:
+            conditions.append("deleted = 0")
+        for column, value in (filters or {}).items():
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        sql = f"SELECT payload FROM {table}"
+        if len(conditions) > 0:
+            sql += " WHERE " + " AND ".join(conditions)
+        with closing(self._connect()) as conn:
+            records = [json.loads(row[0]) for row in conn.execute(sql + " ORDER BY id", params)]
+        if format == "raw":
+            return records
+        return pd.DataFrame(records)
+
+    def getTraits(self, folderId: int = None, dataSourceId: int = None, integrationCode: str = None, includeDeleted: bool = False, format: str = 'df')->object:
+        """
+        Return the traits stored in the mirror.
+        Arguments:
+            folderId : OPTIONAL : only return the traits of that folder.
+            dataSourceId : OPTIONAL : only return the traits of that data source.
+            integrationCode : OPTIONAL : only return the trait with that integration code.
+            includeDeleted : OPTIONAL : include the traits deleted since they have been mirrored (default False).
+            format : OPTIONAL : "df" returns a dataframe (default), "raw" returns a list.
+        """
+        return self._getObjects('traits', {'folderId': folderId, 'dataSourceId': dataSourceId, 'integrationCode': integrationCode}, includeDeleted=includeDeleted, format=format)
+
+    def getSegments(self, folderId: int = None, dataSourceId: int = None, integrationCode: str = None, includeDeleted: bool = False, format: str = 'df')->object:
+        """
+        Return the segments stored in the mirror.
+        Arguments:
+            folderId : OPTIONAL : only return the segments of that folder.
+            dataSourceId : OPTIONAL : only return the segments of that data source.
+            integrationCode : OPTIONAL : only return the segment with that integration code.
+            includeDeleted : OPTIONAL : include the segments deleted since they have been mirrored (default False).
+            format : OPTIONAL : "df" returns a dataframe (default), "raw" returns a list.
+        """
+        return self._getObjects('segments', {'folderId': folderId, 'dataSourceId': dataSourceId, 'integrationCode': integrationCode}, includeDeleted=includeDeleted, format=format)
+
+    def getTraitFolders(self, format: str = 'df')->object:
+        """
+        Return the trait folders stored in the mirror.
+        Arguments:
+            format : OPTIONAL : "df" returns a dataframe (default), "raw" returns a list.
+        """
+        return self._getObjects('traitFolders', format=format)
+
+    def getSegmentFolders(self, format: str = 'df')->object:
+        """
+        Return the segment folders stored in the mirror.
+        Arguments:
+            format : OPTIONAL : "df" returns a dataframe (default), "raw" returns a list.
+        """
+        return self._getObjects('segmentFolders', format=format)
+
+    def getDestinations(self, format: str = 'df')->object:
+        """
+        Return the destinations stored in the mirror.
+        Arguments:
+            format : OPTIONAL : "df" returns a dataframe (default), "raw" returns a list.
+        """
+        return self._getObjects('destinations', format=format)
+
+    def getDestinationMappings(self, destinationId: int = None, format: str = 'df')->object:
+        """
+        Return the destination mappings stored in the mirror.
+        Arguments:
+            destinationId : OPTIONAL : only return the mappings of that destination.
+            format : OPTIONAL : "df" returns a dataframe (default), "raw" returns a list.
+        """
+        return self._getObjects('destinationMappings', {'parentId': destinationId}, format=format)
+
+    def getDeleted(self, objectType: str = 'traits', since: float = None, format: str = 'df')->object:
+        """
+        Return the objects that have been deleted from the instance since they have been mirrored.
+        Arguments:
+            objectType : OPTIONAL : object type (default traits).
+            since : OPTIONAL : only return the objects deleted after that timestamp.
+            format : OPTIONAL : "df" returns a dataframe (default), "raw" returns a list of tuples (id, name, deletedAt).
+        """
+        table = OBJECTS[objectType][0]
+        return self.query(f"SELECT id, name, deletedAt FROM {table} WHERE deleted = 1 AND deletedAt >= ? ORDER BY deletedAt",
+                          (since or 0,), format=format)
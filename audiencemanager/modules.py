@@ -0,0 +1,91 @@
+"""
+Modules used within audiencemanager that are slow to import or optional.
+They are imported on their first use, so that the requests returning the raw format do not pay the import of pandas or numpy.
+Ex: audiencemanager.modules.pd is pandas.
+"""
+from importlib import import_module
+from importlib.util import find_spec
+import sys
+import threading
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported when one of its attributes is accessed for the first time.
+    Arguments:
+        name : REQUIRED : name of the module (ex: "pandas", "pyarrow.parquet").
+        install : OPTIONAL : installation hint added to the ImportError when the module is missing.
+    """
+
+    def __init__(self, name: str, install: str = None)->None:
+        self.__dict__['_name'] = name
+        self.__dict__['_install'] = install
+        self.__dict__['_module'] = None
+        self.__dict__['_available'] = None
+        self.__dict__['_lock'] = threading.Lock()
+
+    def _load(self)->object:
+        module = self.__dict__['_module']
+        if module is None:
+            with self.__dict__['_lock']:
+                module = self.__dict__['_module']
+                if module is None:
+                    try:
+                        module = import_module(self._name)
+                    except ImportError as e:
+                        if self._install is None:
+                            raise
+                        raise ImportError(f"The {self._name} module is required: {self._install}") from e
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attribute: str)->object:
+        return getattr(self._load(), attribute)
+
+    def __setattr__(self, attribute: str, value: object)->None:
+        setattr(self._load(), attribute, value)
+
+    def __dir__(self)->list:
+        return dir(self._load())
+
+    def __repr__(self)->str:
+        state = "loaded" if self.__dict__['_module'] is not None else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+    @property
+    def available(self)->bool:
+        """
+        True if the module can be imported, checked without importing it.
+        """
+        if self.__dict__['_available'] is None:
+            try:
+                self.__dict__['_available'] = self.__dict__['_module'] is not None or find_spec(self._name) is not None
+            except (ImportError, ValueError):  # parent package missing
+                self.__dict__['_available'] = False
+        return self.__dict__['_available']
+
+    @property
+    def loaded(self)->bool:
+        """
+        True if the module has already been imported (by audiencemanager or another module).
+        """
+        return self.__dict__['_module'] is not None or self._name in sys.modules
+
+
+pd = LazyModule('pandas')
+np = LazyModule('numpy')
+jwt = LazyModule('jwt')
+aiohttp = LazyModule('aiohttp', install='pip install audiencemanager[async]')
+pa = LazyModule('pyarrow', install='pip install audiencemanager[arrow]')
+pq = LazyModule('pyarrow.parquet', install='pip install audiencemanager[arrow]')
+ipc = LazyModule('pyarrow.ipc', install='pip install audiencemanager[arrow]')
+pl = LazyModule('polars', install='pip install polars')
+otelMetrics = LazyModule('opentelemetry.metrics', install='pip install audiencemanager[otel]')
+otelTrace = LazyModule('opentelemetry.trace', install='pip install audiencemanager[otel]')
+
+
+def isDataFrame(obj: object)->bool:
+    """
+    Return True if the object is a pandas DataFrame, without importing pandas when it has not been imported yet.
+    """
+    return 'pandas' in sys.modules and isinstance(obj, pd.DataFrame)
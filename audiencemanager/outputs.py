@@ -0,0 +1,91 @@
+"""
+Output formats of the list methods (format parameter).
+A format is a function receiving the list returned by the API, the kind of objects (traits, segments, ... see frames.SCHEMAS)
+and options (typed), and returning the object given back to the user. New formats can be added with the register function.
+"""
+from audiencemanager import frames
+from audiencemanager.modules import pd, pa, pl
+from collections import namedtuple
+
+OUTPUTS = {}
+
+
+def register(name: str, func: callable)->None:
+    """
+    Add (or replace) an output format usable in the format parameter of the list methods.
+    Arguments:
+        name : REQUIRED : name of the format (ex: "arrow").
+        func : REQUIRED : function called as func(records, kind, **options) returning the output.
+    """
+    OUTPUTS[name] = func
+
+
+def convert(records: list, format: str = 'df', kind: str = None, **options)->object:
+    """
+    Return the records in the format requested.
+    Arguments:
+        records : REQUIRED : list of dictionaries returned by the API.
+        format : OPTIONAL : one of the registered formats (default "df").
+        kind : OPTIONAL : kind of objects, used by the typed dataframes (see frames.SCHEMAS).
+    possible options:
+        typed : for "df", return a typed and compact dataframe (see frames.toDataFrame).
+    """
+    func = OUTPUTS.get(format)
+    if func is None:
+        raise ValueError(f"format should be part of the following values {list(OUTPUTS.keys())}")
+    return func(records, kind, **options)
+
+
+def _raw(records: list, kind: str = None, **options)->list:
+    return records
+
+
+def _dataframe(records: list, kind: str = None, typed: bool = False, **options)->object:
+    if typed and kind in frames.SCHEMAS.keys():
+        return frames.toDataFrame(records, kind)
+    return pd.DataFrame(records)
+
+
+def _columns(records: list)->list:
+    """
+    Return the keys of all of the records, in the order they appear.
+    """
+    columns = {}
+    for record in records:
+        for key in record:
+            columns[key] = None
+    return list(columns)
+
+
+def _records(records: list, kind: str = None, **options)->list:
+    """
+    Return the records as named tuples (with missing keys set to None), lighter than dictionaries.
+    """
+    if type(records) != list:  # error message
+        return records
+    columns = _columns(records)
+    Record = namedtuple('Record', columns, rename=True)  # keys that are not valid identifiers are renamed _0, _1, ...
+    return [Record(*[record.get(key) for key in columns]) for record in records]
+
+
+def _arrow(records: list, kind: str = None, **options)->object:
+    if type(records) != list:
+        return records
+    if len(records) == 0:
+        return pa.table({})
+    return pa.Table.from_pylist(records)
+
+
+def _polars(records: list, kind: str = None, **options)->object:
+    if type(records) != list:
+        return records
+    if len(records) == 0:
+        return pl.DataFrame()
+    return pl.from_dicts(records, infer_schema_length=None)
+
+
+register('raw', _raw)
+register('df', _dataframe)
+register('records', _records)
+register('arrow', _arrow)
+register('polars', _polars)
@@ -0,0 +1,98 @@
+"""
+Query parameters of the list endpoints, shared by AudienceManager and AsyncAudienceManager so that both send the same requests.
+"""
+
+
+def traits(folderId: int = None, includeMetrics: bool = True, integrationCode: str = None, dataSourceIds: list = None, includeDetails: bool = False)->dict:
+    """
+    Return the parameters of the traits list endpoint.
+    """
+    params = {}
+    if includeMetrics:
+        params["includeMetrics"] = includeMetrics
+    if folderId is not None:
+        params["folderId"] = folderId
+    if integrationCode is not None:
+        params["integrationCode"] = integrationCode
+    if includeDetails:
+        params["includeDetails"] = True
+    if type(dataSourceIds) == list:
+        params["dataSourceId"] = [str(dsid) for dsid in dataSourceIds]
+    return params
+
+
+def segments(includeInUseStatus: bool = None, status: str = None, containsTrait: int = None, dataSourceId: int = None, mergeRuleDataSourceId: int = None, includeMetrics: bool = True, includeTraitDataSourceIds: bool = False, includeAddressableAudienceMetrics: bool = False)->dict:
+    """
+    Return the parameters of the segments list endpoint.
+    """
+    params = {}
+    if includeMetrics:
+        params['includeMetrics'] = True
+    if includeTraitDataSourceIds:
+        params['includeTraitDataSourceIds'] = True
+    if includeAddressableAudienceMetrics:
+        params['includeAddressableAudienceMetrics'] = True
+    if status == "ACTIVE" or status == "INACTIVE":
+        params['status'] = status
+    if includeInUseStatus:
+        params['includeInUseStatus'] = True
+    if containsTrait is not None:
+        params['containsTrait'] = containsTrait
+    if dataSourceId is not None:
+        params['dataSourceId'] = dataSourceId
+    if mergeRuleDataSourceId is not None:
+        params["mergeRuleDataSourceId"] = mergeRuleDataSourceId
+    return params
+
+
+def dataSources(inboundOnly: bool = None, outboundOnly: bool = None, integrationCode: str = None, includeThirdParty: bool = None, modelingEnabled: bool = None,
+                availableForContainersOnly: bool = None, excludeReportSuites: bool = None)->dict:
+    """
+    Return the parameters of the data sources list endpoint.
+    """
+    params = {}
+    if inboundOnly:
+        params["inboundOnly"] = inboundOnly
+    if outboundOnly:
+        params["outboundOnly"] = outboundOnly
+    if integrationCode is not None:
+        params["integrationCode"] = integrationCode
+    if includeThirdParty:
+        params["includeThirdParty"] = includeThirdParty
+    if modelingEnabled:
+        params["modelingEnabled"] = modelingEnabled
+    if availableForContainersOnly:
+        params["availableForContainersOnly"] = availableForContainersOnly
+    if excludeReportSuites:
+        params["excludeReportSuites"] = excludeReportSuites
+    return params
+
+
+def destinations(containsSegment: str = None, includeMasterDataSourceIdType: bool = None, includeMetrics: bool = True, includeAddressableAudienceMetrics: bool = False)->dict:
+    """
+    Return the parameters of the destinations list endpoint.
+    """
+    params = {}
+    if includeMasterDataSourceIdType:
+        params["includeMasterDataSourceIdType"] = includeMasterDataSourceIdType
+    if includeMetrics:
+        params["includeMetrics"] = includeMetrics
+    if includeAddressableAudienceMetrics:
+        params["includeAddressableAudienceMetrics"] = includeAddressableAudienceMetrics
+    if containsSegment is not None:
+        params["containsSegment"] = containsSegment
+    return params
+
+
+def destinationMappings(includeMetrics: bool = True, includeAddressableAudienceMetrics: bool = None, includeDeletedEntities: bool = None)->dict:
+    """
+    Return the parameters of the destination mappings endpoint.
+    """
+    params = {}
+    if includeMetrics:
+        params["includeMetrics"] = includeMetrics
+    if includeAddressableAudienceMetrics:
+        params["includeAddressableAudienceMetrics"] = includeAddressableAudienceMetrics
+    if includeDeletedEntities:
+        params["includeDeletedEntities"] = includeDeletedEntities
+    return params
@@ -0,0 +1,94 @@
+from __future__ import annotations
+from audiencemanager import frames
+from audiencemanager.modules import pd
+
+# fields compared and sent in the update requests, per object type : (id key, fields)
+OBJECTS = {
+    'traits': ('sid', ['name', 'traitType', 'dataSourceId', 'folderId', 'traitRule', 'integrationCode', 'description', 'comments',
+                       'status', 'ttl', 'type', 'categoryId', 'algoModelId', 'thresholdValue']),
+    'segments': ('sid', ['name', 'segmentRule', 'folderId', 'dataSourceId', 'mergeRuleDataSourceId', 'integrationCode', 'description', 'status']),
+}
+
+
+def _normalize(value: object)->str:
+    """
+    Return the value as sent by the update methods (string), None for the missing values.
+    """
+    value = frames.cellValue(value)
+    if value is None:
+        return None
+    return str(value)
+
+
+class Plan:
+    """
+    Changes to apply to go from the current state to the desired state of the traits or segments.
+    Created with makePlan (or AudienceManager.planTraits / planSegments) and applied with AudienceManager.applyPlan.
+    """
+
+    def __init__(self, objectType: str)->None:
+        self.objectType = objectType
+        self.changes = []  # {'id', 'fields': {field: (current, desired)}, 'payload'}
+        self.unchanged = []
+        self.missing = []  # desired objects not found in the current state
+
+    def __len__(self)->int:
+        return len(self.changes)
+
+    def __repr__(self)->str:
+        return f"Plan({self.objectType}: {len(self.changes)} to update, {len(self.unchanged)} unchanged, {len(self.missing)} not found)"
+
+    def toDataFrame(self)->pd.DataFrame:
+        """
+        Return one row per changed field with the current and desired values.
+        """
+        records = []
+        for change in self.changes:
+            for field, (current, desired) in change['fields'].items():
+                records.append({'id': change['id'], 'field': field, 'current': current, 'desired': desired})
+        return pd.DataFrame(records, columns=['id', 'field', 'current', 'desired'])
+
+
+def makePlan(objectType: str, desired: object, current: list, fields: list = None)->Plan:
+    """
+    Compare the desired state with the current state and return the Plan of the objects to update.
+    Only the fields present in a desired row are compared, the objects are matched on their sid, or on their integrationCode
+    when there is no sid. The missing values of a desired row (None, NaN, NaT, pd.NA) are not compared.
+    Arguments:
+        objectType : REQUIRED : "traits" or "segments".
+        desired : REQUIRED : dataframe or list of dictionaries of the desired objects.
+        current : REQUIRED : list of the current objects (getTraits(includeDetails=True) or getSegments raw response).
+        fields : OPTIONAL : list of the fields compared (default all of the updatable fields).
+    """
+    if objectType not in OBJECTS.keys():
+        raise ValueError(f"objectType should be part of the following values {list(OBJECTS.keys())}")
+    idKey, updatable = OBJECTS[objectType]
+    if fields is None:
+        fields = updatable
+    if hasattr(desired, 'to_dict'):
+        desired = desired.to_dict(orient='records')
+    currentById = {_normalize(record[idKey]): record for record in current}
+    currentByCode = {record['integrationCode']: record for record in current if record.get('integrationCode')}
+    plan = Plan(objectType)
+    for row in desired:
+        objectId = _normalize(row.get(idKey))
+        if objectId is not None:
+            record = currentById.get(objectId)
+        else:
+            record = currentByCode.get(row.get('integrationCode'))
+        if record is None:
+            plan.missing.append(row)
+            continue
+        objectId = _normalize(record[idKey])
+        compared = [field for field in fields if field in row and _normalize(row[field]) is not None]
+        desiredValues = [_normalize(row[field]) for field in compared]
+        currentValues = [_normalize(record.get(field)) for field in compared]
+        if desiredValues == currentValues:
+            plan.unchanged.append(objectId)
+            continue
+        changed = {field: (currentValue, desiredValue) for field, currentValue, desiredValue in zip(compared, currentValues, desiredValues)
+                   if currentValue != desiredValue}
+        payload = {field: record.get(field) for field in updatable if record.get(field) is not None}
+        payload.update(dict(zip(compared, desiredValues)))
+        plan.changes.append({'id': objectId, 'fields': changed, 'payload': payload})
+    return plan
@@ -0,0 +1,128 @@
+from audiencemanager.filelock import FileLock
+import asyncio, json, os, time
+import threading
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the number of requests sent per second.
+    The rate adapts itself: it is reduced when the API answers with a 429 status code (throttling)
+    and recovers gradually, with every successful request, up to the maximum rate.
+    The same instance can be shared by several connectors (threads). In order to share the limit between processes,
+    pass a sharedPath: the state of the bucket is then stored in that file and protected by a file lock.
+    """
+
+    def __init__(self, rate: float = 10, burst: int = None, minRate: float = 0.5, decreaseFactor: float = 0.5, recoveryStep: float = None, sharedPath: str = None)->None:
+        """
+        Instantiate the rate limiter.
+        Arguments:
+            rate : OPTIONAL : maximum number of requests per second (default 10).
+            burst : OPTIONAL : number of requests that can be sent at once after an idle period (default rate).
+            minRate : OPTIONAL : the rate will never go below this value (default 0.5).
+            decreaseFactor : OPTIONAL : the rate is multiplied by this value when throttled (default 0.5).
+            recoveryStep : OPTIONAL : the rate is increased by this value for each successful request (default rate / 50).
+            sharedPath : OPTIONAL : path of the file used to share the bucket between processes.
+        """
+        self.maxRate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.minRate = float(minRate)
+        self.decreaseFactor = decreaseFactor
+        self.recoveryStep = recoveryStep if recoveryStep is not None else self.maxRate / 50
+        self.sharedPath = sharedPath
+        self.rate = self.maxRate
+        self.tokens = self.burst
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+        self._fileLock = FileLock(sharedPath + '.lock') if sharedPath is not None else None
+
+    def _loadState(self)->None:
+        """
+        Read the shared state of the bucket when a sharedPath is used.
+        Time is based on time.time() as monotonic clocks are not comparable between processes.
+        """
+        try:
+            with open(self.sharedPath, 'r') as f:
+                state = json.load(f)
+            self.tokens = state['tokens']
+            self.last = state['last']
+            self.rate = state['rate']
+        except (FileNotFoundError, ValueError, KeyError):
+            self.tokens = self.burst
+            self.last = time.time()
+
+    def _saveState(self)->None:
+        """
+        Write the shared state of the bucket when a sharedPath is used.
+        """
+        tmp_path = f"{self.sharedPath}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'tokens': self.tokens, 'last': self.last, 'rate': self.rate}, f)
+        os.replace(tmp_path, self.sharedPath)
+
+    def _update(self, func: callable)->object:
+        """
+        Run the function passed while holding the locks, with the shared state loaded and saved around it.
+        """
+        with self._lock:
+            if self._fileLock is None:
+                return func(time.monotonic())
+            with self._fileLock:
+                self._loadState()
+                result = func(time.time())
+                self._saveState()
+                return result
+
+    def _take(self, now: float)->float:
+        """
+        Refill the bucket and take a token. Return the time to wait if no token was available.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def acquire(self)->float:
+        """
+        Block until a request can be sent. Return the time waited in seconds.
+        """
+        waited = 0
+        wait = self._update(self._take)
+        while wait > 0:
+            time.sleep(wait)
+            waited += wait
+            wait = self._update(self._take)
+        return waited
+
+    async def acquireAsync(self)->float:
+        """
+        Wait until a request can be sent, without blocking the event loop. Return the time waited in seconds.
+        """
+        waited = 0
+        wait = self._update(self._take)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            wait = self._update(self._take)
+        return waited
+
+    def onThrottle(self)->None:
+        """
+        Reduce the rate after a 429 response and empty the bucket.
+        """
+        def throttle(now):
+            self.rate = max(self.minRate, self.rate * self.decreaseFactor)
+            self.tokens = min(self.tokens, 0)
+        self._update(throttle)
+
+    def onSuccess(self)->None:
+        """
+        Increase gradually the rate after a successful response.
+        """
+        if self.rate >= self.maxRate and self._fileLock is None:
+            return
+
+        def recover(now):
+            self.rate = min(self.maxRate, self.rate + self.recoveryStep)
+        self._update(recover)
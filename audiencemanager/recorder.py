@@ -0,0 +1,126 @@
+from contextlib import closing
+from urllib.parse import urlparse
+from requests.structures import CaseInsensitiveDict
+import gzip, hashlib, json, sqlite3, time, zlib
+import threading
+import requests
+
+
+class ReplayMiss(LookupError):
+    """
+    Raised in replay mode when no response has been recorded for a request.
+    """
+
+
+class Recorder:
+    """
+    Archive of the API responses, used by the connector (recorder parameter) to work offline.
+    In "record" mode, the requests are sent and their responses are stored. In "replay" mode, the responses are served
+    from the archive without any network access nor token exchange. In "auto" mode, the recorded responses are replayed
+    and the other requests are sent and recorded.
+    The responses are stored compressed in a SQLite file, keyed on the method, the endpoint, the parameters and the body.
+    A request recorded several times keeps its latest response. The request headers (token) are never stored.
+    """
+    MODES = ['record', 'replay', 'auto']
+    # response headers not stored: the body is stored decompressed and the cookies are not needed
+    SKIPPED_HEADERS = ['content-encoding', 'content-length', 'transfer-encoding', 'set-cookie', 'connection']
+
+    def __init__(self, path: str = 'aam_recording.db', mode: str = 'replay', compressLevel: int = 6)->None:
+        """
+        Open (or create) an archive.
+        Arguments:
+            path : OPTIONAL : path of the SQLite file (default aam_recording.db).
+            mode : OPTIONAL : "record", "replay" (default) or "auto".
+            compressLevel : OPTIONAL : zlib compression level of the bodies (default 6).
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"mode should be part of the following values {self.MODES}")
+        self.path = path
+        self.mode = mode
+        self.compressLevel = compressLevel
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, method TEXT, endpoint TEXT, params TEXT, "
+                      "status INTEGER, headers TEXT, body BLOB, recordedAt REAL)")
+
+    def __len__(self)->int:
+        return self._execute("SELECT COUNT(*) FROM responses")[0]
+
+    def __repr__(self)->str:
+        return f"Recorder({self.path}, mode={self.mode}, {self.hits} replayed, {self.recorded} recorded)"
+
+    @property
+    def replaying(self)->bool:
+        """
+        True if no request is sent to the API (replay mode).
+        """
+        return self.mode == 'replay'
+
+    def _execute(self, sql: str, params: tuple = ())->tuple:
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            with conn:
+                return conn.execute(sql, params).fetchone()
+
+    def key(self, method: str, endpoint: str, params: dict = None, data: object = None)->str:
+        """
+        Return the key of the request: method, host and path (without trailing slash), sorted parameters and hash of the body.
+        """
+        url = urlparse(endpoint)
+        body = None
+        if data:
+            if type(data) == str:
+                data = data.encode('utf-8')
+            if data[:2] == b'\x1f\x8b':  # compressed body (compressThreshold)
+                data = gzip.decompress(data)
+            try:  # same key whatever the codec used to encode the body
+                data = json.dumps(json.loads(data), sort_keys=True).encode('utf-8')
+            except ValueError:
+                pass
+            body = hashlib.sha1(data).hexdigest()
+        identity = json.dumps([method.upper(), url.netloc, url.path.rstrip('/'), params or {}, body], sort_keys=True, default=str)
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    def record(self, method: str, endpoint: str, params: dict, data: object, res: requests.Response)->None:
+        """
+        Store the response of a request. The body is read completely, the response can still be used afterwards.
+        """
+        content = res.content
+        headers = {name: value for name, value in res.headers.items() if name.lower() not in self.SKIPPED_HEADERS}
+        self._execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                      (self.key(method, endpoint, params, data), method.upper(), endpoint, json.dumps(params or {}, default=str),
+                       res.status_code, json.dumps(headers), zlib.compress(content, self.compressLevel), time.time()))
+        if res.raw is not None and hasattr(res.raw, 'release_conn'):
+            res.raw.release_conn()
+        res.raw = None  # the body has been read, it is served from res.content
+        with self._lock:
+            self.recorded += 1
+
+    def replay(self, method: str, endpoint: str, params: dict = None, data: object = None)->requests.Response:
+        """
+        Return the recorded response of the request as a requests.Response, None if it has not been recorded.
+        """
+        row = self._execute("SELECT status, headers, body FROM responses WHERE key = ?", (self.key(method, endpoint, params, data),))
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        res = requests.Response()
+        res.status_code = row[0]
+        res.headers = CaseInsensitiveDict(json.loads(row[1]))
+        res._content = zlib.decompress(row[2])
+        res._content_consumed = True  # served from _content (iter_content, close)
+        res.headers['Content-Length'] = str(len(res._content))
+        res.url = endpoint
+        res.reason = 'Replayed'
+        res.encoding = requests.utils.get_encoding_from_headers(res.headers)
+        with self._lock:
+            self.hits += 1
+        return res
+
+    def clear(self)->None:
+        """
+        Remove all of the recorded responses.
+        """
+        self._execute("DELETE FROM responses")
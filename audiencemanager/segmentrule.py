@@ -0,0 +1,426 @@
+from __future__ import annotations
+from audiencemanager.modules import np
+from collections import namedtuple
+import operator, re
+
+
+class _Node:
+    """
+    Equality and hash include the node type, so that And((a, b)) and Or((a, b)) are different keys.
+    Identical sub expressions of different rules are evaluated once.
+    """
+    __slots__ = ()
+
+    def __eq__(self, other: object)->bool:
+        return type(self) is type(other) and tuple.__eq__(self, other)
+
+    def __ne__(self, other: object)->bool:
+        return not self.__eq__(other)
+
+    def __hash__(self)->int:
+        return hash((type(self).__name__, tuple.__hash__(self)))
+
+
+# Nodes of the rule tree
+class Trait(_Node, namedtuple('Trait', ['sid'])):
+    __slots__ = ()
+
+
+class Frequency(_Node, namedtuple('Frequency', ['sids', 'op', 'value'])):
+    __slots__ = ()
+
+
+class Recency(_Node, namedtuple('Recency', ['sids', 'op', 'days'])):
+    __slots__ = ()
+
+
+class Not(_Node, namedtuple('Not', ['operand'])):
+    __slots__ = ()
+
+
+class And(_Node, namedtuple('And', ['operands'])):
+    __slots__ = ()
+
+
+class Or(_Node, namedtuple('Or', ['operands'])):
+    __slots__ = ()
+
+
+_TOKENS = re.compile(r"\s*(?:(?P<trait>\d+)[Tt]\b|(?P<days>\d+)[Dd]\b|(?P<keyword>AND|OR|NOT)\b|(?P<function>FREQUENCY|RECENCY)\b"
+                     r"|(?P<paren>[()])|(?P<bracket>[\[\]])|(?P<comma>,)|(?P<op>>=|<=|==|=|>|<)|(?P<number>\d+))", re.IGNORECASE)
+_COMPARE = {'>=': operator.ge, '<=': operator.le, '==': operator.eq, '>': operator.gt, '<': operator.lt}
+
+
+def _tokenize(rule: str)->list:
+    tokens = []
+    pos = 0
+    rule = rule.rstrip()
+    while pos < len(rule):
+        match = _TOKENS.match(rule, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"Invalid segment rule, unexpected character at position {pos}: {rule[pos:pos + 20]}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind in ('keyword', 'function'):
+            value = value.upper()
+        elif kind == 'op' and value == '=':
+            value = '=='
+        tokens.append((kind, value, match.start(kind)))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent parser, the precedence is NOT > AND > OR.
+    """
+
+    def __init__(self, rule: str)->None:
+        self.rule = rule
+        self.tokens = _tokenize(rule)
+        self.pos = 0
+
+    def _peek(self)->tuple:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None, len(self.rule))
+
+    def _next(self)->tuple:
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def _error(self, expected: str)->ValueError:
+        kind, value, position = self._peek()
+        found = 'end of rule' if kind is None else repr(value)
+        return ValueError(f"Invalid segment rule, expected {expected} at position {position}, found {found}: {self.rule}")
+
+    def parse(self)->tuple:
+        if len(self.tokens) == 0:
+            raise ValueError("Empty segment rule")
+        node = self._or()
+        if self._peek()[0] is not None:
+            raise self._error("AND, OR or the end of the rule")
+        return node
+
+    def _or(self)->tuple:
+        operands = [self._and()]
+        while self._peek()[1] == 'OR':
+            self._next()
+            operands.append(self._and())
+        return operands[0] if len(operands) == 1 else Or(tuple(operands))
+
+    def _and(self)->tuple:
+        operands = [self._not()]
+        while self._peek()[1] == 'AND':
+            self._next()
+            operands.append(self._not())
+        return operands[0] if len(operands) == 1 else And(tuple(operands))
+
+    def _not(self)->tuple:
+        if self._peek()[1] == 'NOT':
+            self._next()
+            return Not(self._not())
+        return self._atom()
+
+    def _atom(self)->tuple:
+        kind, value, _ = self._peek()
+        if kind == 'paren' and value == '(':
+            self._next()
+            node = self._or()
+            self._expect(')')
+            return node
+        if kind == 'function':
+            return self._function()
+        if kind != 'trait':
+            raise self._error("a trait (ex: 123T), frequency, recency, NOT or '('")
+        self._next()
+        sid = int(value)
+        if self._peek()[0] == 'op':  # shorthand of frequency([123T] >= 2)
+            op = self._next()[1]
+            return Frequency((sid,), op, self._number('number', "a frequency"))
+        return Trait(sid)
+
+    def _expect(self, value: str)->None:
+        if self._peek()[1] != value:
+            raise self._error(repr(value))
+        self._next()
+
+    def _number(self, kind: str, expected: str)->int:
+        if self._peek()[0] != kind:
+            raise self._error(expected)
+        return int(self._next()[1])
+
+    def _function(self)->tuple:
+        """
+        frequency([123T, 456T] >= 2) or recency([123T] <= 7D), the comparison can also follow the closing parenthesis.
+        """
+        name = self._next()[1]
+        self._expect('(')
+        self._expect('[')
+        sids = [self._number('trait', "a trait (ex: 123T)")]
+        while self._peek()[0] == 'comma':
+            self._next()
+            sids.append(self._number('trait', "a trait (ex: 123T)"))
+        self._expect(']')
+        inside = self._peek()[0] == 'op'
+        if not inside:
+            self._expect(')')
+        if self._peek()[0] != 'op':
+            raise self._error("a comparison operator")
+        op = self._next()[1]
+        if name == 'FREQUENCY':
+            node = Frequency(tuple(sids), op, self._number('number', "a frequency"))
+        else:
+            node = Recency(tuple(sids), op, self._number('days', "a number of days (ex: 7D)"))
+        if inside:
+            self._expect(')')
+        return node
+
+
+def _format(node: tuple)->str:
+    sids = ', '.join(f"{sid}T" for sid in node.sids)
+    if type(node) == Frequency:
+        return f"frequency([{sids}] {node.op} {node.value})"
+    return f"recency([{sids}] {node.op} {node.days}D)"
+
+
+def parseSegmentRule(rule: str)->tuple:
+    """
+    Parse a segment rule and return its tree, made of Trait, Frequency, Recency, Not, And and Or nodes.
+    Supported syntax:
+        123T : the profile has realized the trait 123.
+        frequency([123T] >= 3) : the profile has realized the trait at least 3 times (>=, >, <=, <, == are supported).
+            With several traits (frequency([123T, 456T] >= 3)), the realizations of the traits are added.
+            123T >= 3 is accepted as a shorthand.
+        recency([123T] <= 7D) : the profile has realized the trait in the last 7 days.
+            With several traits, the most recent realization of the traits is compared.
+        AND, OR, NOT and parentheses, NOT has the highest precedence then AND then OR.
+    Raise a ValueError with the position of the issue when the rule is invalid.
+    """
+    return _Parser(rule).parse()
+
+
+def ruleTraits(node: tuple)->set:
+    """
+    Return the trait IDs used in a rule tree.
+    """
+    traits = set()
+    stack = [node]
+    while len(stack) > 0:
+        node = stack.pop()
+        if type(node) == Trait:
+            traits.add(node.sid)
+        elif type(node) in (Frequency, Recency):
+            traits.update(node.sids)
+        elif type(node) == Not:
+            stack.append(node.operand)
+        else:
+            stack.extend(node.operands)
+    return traits
+
+
+class TraitMatrix:
+    """
+    Trait realizations of a set of profiles, one row per trait and one column per profile.
+    The membership can be stored as a boolean matrix or bit packed (8 profiles per byte), in which case the rules are evaluated
+    with bitwise operations on the bytes.
+    Frequency and recency conditions require the frequency (number of realizations) and recency (days since the last realization) matrices.
+    """
+
+    def __init__(self, traitIds: list, membership: np.ndarray = None, frequency: np.ndarray = None, recency: np.ndarray = None,
+                 packed: bool = False, profiles: int = None)->None:
+        """
+        Arguments:
+            traitIds : REQUIRED : list of the trait IDs, in the order of the rows.
+            membership : OPTIONAL : boolean matrix (traits x profiles), or bit packed matrix when packed is True.
+                Deduced from the frequency when not provided.
+            frequency : OPTIONAL : matrix (traits x profiles) of the number of realizations.
+            recency : OPTIONAL : matrix (traits x profiles) of the number of days since the last realization.
+            packed : OPTIONAL : set to True when the membership is packed with numpy.packbits(axis=1).
+            profiles : OPTIONAL : number of profiles, required when the membership is packed and no frequency is given.
+        """
+        if membership is None and frequency is None:
+            raise ValueError("membership or frequency is required")
+        self.traitIds = [int(traitId) for traitId in traitIds]
+        self.rows = {traitId: row for row, traitId in enumerate(self.traitIds)}
+        self.frequency = None if frequency is None else np.asarray(frequency)
+        self.recency = None if recency is None else np.asarray(recency)
+        self.packed = packed
+        if membership is None:
+            membership = self.frequency > 0
+            if packed:
+                membership = np.packbits(membership, axis=1)
+        membership = np.asarray(membership)
+        if packed:
+            if profiles is None:
+                if self.frequency is None:
+                    raise ValueError("profiles is required with a packed membership")
+                profiles = self.frequency.shape[1]
+            self.profiles = profiles
+            self.membership = membership.astype(np.uint8, copy=False)
+            remainder = profiles % 8
+            self._lastMask = np.uint8((0xFF << (8 - remainder)) & 0xFF) if remainder else np.uint8(0xFF)
+        else:
+            self.profiles = membership.shape[1]
+            self.membership = membership.astype(bool, copy=False)
+        if self.membership.shape[0] != len(self.traitIds):
+            raise ValueError("The number of rows does not match the number of traits")
+
+    @classmethod
+    def fromProfiles(cls, profiles: list, traitIds: list = None, packed: bool = False)->'TraitMatrix':
+        """
+        Build the matrix from a list of profiles.
+        Arguments:
+            profiles : REQUIRED : list of profiles, each one being a list of trait IDs or a dictionary {traitId: frequency}.
+            traitIds : OPTIONAL : trait IDs of the rows (default: all of the traits found in the profiles).
+            packed : OPTIONAL : bit pack the membership (default False).
+        """
+        if traitIds is None:
+            traitIds = sorted({int(traitId) for profile in profiles for traitId in profile})
+        rows = {int(traitId): row for row, traitId in enumerate(traitIds)}
+        withFrequency = any(type(profile) == dict for profile in profiles)
+        matrix = np.zeros((len(traitIds), len(profiles)), dtype=np.int32 if withFrequency else bool)
+        for column, profile in enumerate(profiles):
+            items = profile.items() if type(profile) == dict else ((traitId, 1) for traitId in profile)
+            for traitId, count in items:
+                row = rows.get(int(traitId))
+                if row is not None:
+                    matrix[row, column] = count
+        if withFrequency:
+            return cls(traitIds, frequency=matrix, packed=packed)
+        membership = np.packbits(matrix, axis=1) if packed else matrix
+        return cls(traitIds, membership=membership, packed=packed, profiles=len(profiles))
+
+    def _empty(self)->np.ndarray:
+        return np.zeros(self.membership.shape[1], dtype=self.membership.dtype)
+
+    def _pack(self, values: np.ndarray)->np.ndarray:
+        return np.packbits(values) if self.packed else values
+
+    def _invert(self, values: np.ndarray)->np.ndarray:
+        if self.packed == False:
+            return ~values
+        result = ~values
+        if len(result) > 0:
+            result[-1] &= self._lastMask
+        return result
+
+    def _trait(self, node: Trait)->np.ndarray:
+        row = self.rows.get(node.sid)
+        if row is None:
+            return self._empty()
+        return self.membership[row]
+
+    def _realized(self, row: int)->np.ndarray:
+        if self.frequency is not None:
+            return self.frequency[row] > 0
+        return self.unpack(self.membership[row])
+
+    def _frequency(self, node: Frequency)->np.ndarray:
+        if self.frequency is None:
+            raise ValueError(f"A frequency matrix is required to evaluate {_format(node)}")
+        total = np.zeros(self.profiles, dtype=np.int64)
+        for sid in node.sids:
+            row = self.rows.get(sid)
+            if row is not None:
+                total += self.frequency[row]
+        # ex: frequency([123T] < 2) is true for the profiles without the trait
+        return self._pack(_COMPARE[node.op](total, node.value))
+
+    def _recency(self, node: Recency)->np.ndarray:
+        if self.recency is None:
+            raise ValueError(f"A recency matrix is required to evaluate {_format(node)}")
+        realized = np.zeros(self.profiles, dtype=bool)
+        latest = np.full(self.profiles, np.inf)
+        for sid in node.sids:
+            row = self.rows.get(sid)
+            if row is not None:
+                mask = self._realized(row)
+                realized |= mask
+                latest = np.where(mask, np.minimum(latest, self.recency[row]), latest)
+        return self._pack(realized & _COMPARE[node.op](latest, node.days))
+
+    def evaluate(self, node: tuple, cache: dict = None)->np.ndarray:
+        """
+        Evaluate a rule tree for all of the profiles. Return a boolean vector (bit packed if the matrix is packed).
+        Arguments:
+            node : REQUIRED : rule tree (see parseSegmentRule).
+            cache : OPTIONAL : dictionary of the evaluated sub expressions, shared between the rules.
+        """
+        if cache is None:
+            cache = {}
+        result = cache.get(node)
+        if result is not None:
+            return result
+        if type(node) == Trait:
+            result = self._trait(node)
+        elif type(node) == Frequency:
+            result = self._frequency(node)
+        elif type(node) == Recency:
+            result = self._recency(node)
+        elif type(node) == Not:
+            result = self._invert(self.evaluate(node.operand, cache))
+        else:
+            combine = np.bitwise_and if type(node) == And else np.bitwise_or
+            result = self.evaluate(node.operands[0], cache)
+            for operand in node.operands[1:]:
+                result = combine(result, self.evaluate(operand, cache))
+        cache[node] = result
+        return result
+
+    def unpack(self, values: np.ndarray)->np.ndarray:
+        """
+        Return the boolean vector of an evaluation result.
+        """
+        if self.packed == False:
+            return values
+        return np.unpackbits(values, count=self.profiles).astype(bool)
+
+
+class SegmentRule:
+    """
+    Compiled segment rule, evaluated on a TraitMatrix.
+    """
+
+    def __init__(self, rule: str)->None:
+        """
+        Parse the rule, raise a ValueError when it is invalid.
+        Arguments:
+            rule : REQUIRED : segment rule (ex: "5T OR (6T AND NOT 7T)").
+        """
+        self.rule = rule
+        self.tree = parseSegmentRule(rule)
+        self.traits = ruleTraits(self.tree)
+
+    def __repr__(self)->str:
+        return f"SegmentRule({self.rule!r})"
+
+    def evaluate(self, matrix: TraitMatrix, unpack: bool = True, cache: dict = None)->np.ndarray:
+        """
+        Return the profiles qualifying for the segment.
+        Arguments:
+            matrix : REQUIRED : TraitMatrix of the profiles.
+            unpack : OPTIONAL : return a boolean vector even if the matrix is packed (default True).
+            cache : OPTIONAL : dictionary of the evaluated sub expressions, shared between the rules.
+        """
+        result = matrix.evaluate(self.tree, cache)
+        return matrix.unpack(result) if unpack else result
+
+
+def evaluateSegments(rules: dict, matrix: TraitMatrix, unpack: bool = True)->dict:
+    """
+    Evaluate several segment rules in one pass, the sub expressions shared between the rules are evaluated once.
+    Return a dictionary {key: vector of the qualifying profiles}.
+    Arguments:
+        rules : REQUIRED : dictionary {key (ex: segment ID): rule string or SegmentRule}.
+        matrix : REQUIRED : TraitMatrix of the profiles.
+        unpack : OPTIONAL : return boolean vectors even if the matrix is packed (default True).
+    """
+    cache = {}
+    results = {}
+    for key, rule in rules.items():
+        if type(rule) == str:
+            rule = SegmentRule(rule)
+        results[key] = rule.evaluate(matrix, unpack=unpack, cache=cache)
+    return results
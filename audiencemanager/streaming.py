@@ -0,0 +1,83 @@
+import codecs, json
+from typing import Iterable, Iterator
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = _WHITESPACE + ',]'
+
+
+def iterJsonArray(chunks: Iterable[bytes], encoding: str = 'utf-8')->Iterator[object]:
+    """
+    Incremental parser yielding the elements of a JSON array as soon as they are complete,
+    without keeping the whole document in memory.
+    Arguments:
+        chunks : REQUIRED : iterable of bytes (ex: response.iter_content()).
+        encoding : OPTIONAL : encoding of the document (default utf-8).
+    """
+    textDecoder = codecs.getincrementaldecoder(encoding)()
+    buffer = ''
+    started = False
+    chunks = iter(chunks)
+    last = False
+    while last == False:
+        chunk = next(chunks, None)
+        if chunk is None:
+            last = True
+            buffer += textDecoder.decode(b'', final=True)
+        else:
+            buffer += textDecoder.decode(chunk)
+        pos = 0
+        size = len(buffer)
+        while True:
+            while pos < size and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= size:
+                break
+            char = buffer[pos]
+            if started == False:
+                if char != '[':
+                    raise ValueError(f"Expected a JSON array, got: {buffer[pos:pos + 200]}")
+                started = True
+                pos += 1
+                continue
+            if char == ']':
+                return
+            if char == ',':
+                pos += 1
+                continue
+            try:
+                element, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if last:
+                    raise
+                break  # element not complete yet
+            if last == False and type(element) in (int, float) and (end == size or buffer[end] not in _DELIMITERS):
+                break  # the number may continue in the next chunk
+            yield element
+            pos = end
+        buffer = buffer[pos:]
+    if started == False:
+        raise ValueError("Empty response, expected a JSON array")
+    raise ValueError("Incomplete JSON array")
+
+
+def iterResponseRecords(response: object, chunkSize: int = 65536)->Iterator[object]:
+    """
+    Yield the elements of the JSON array returned in a streamed requests.Response.
+    Use the ijson module when it is installed, the included parser otherwise.
+    Arguments:
+        response : REQUIRED : response of a request sent with stream=True.
+        chunkSize : OPTIONAL : size of the chunks read from the network (default 64kB).
+    """
+    if ijson is not None and response.raw is not None:
+        response.raw.decode_content = True
+        for element in ijson.items(response.raw, 'item', use_float=True):
+            yield element
+        return
+    for element in iterJsonArray(response.iter_content(chunk_size=chunkSize), encoding=response.encoding or 'utf-8'):
+        yield element
@@ -0,0 +1,231 @@
+from audiencemanager.filelock import FileLock
+from pathlib import Path
+import hashlib, json, os, time
+import threading, weakref
+
+_managers = {}
+_managersLock = threading.Lock()
+
+
+class TokenManager:
+    """
+    Retrieve and cache the IMS token for a configuration (org, client, technical account).
+    The token is cached in memory and on disk, protected by a file lock, so that all of the processes using the same configuration
+    re-use the same token. A background thread refreshes the token before it expires and notifies the subscribed connectors.
+    Use the getTokenManager function to share the same manager within a process.
+    """
+
+    def __init__(self, config_object: dict, fetcher: callable, cachePath: str = None, diskCache: bool = True, refreshMargin: int = 500, autoRefresh: bool = True, verbose: bool = False)->None:
+        """
+        Instantiate the token manager.
+        Arguments:
+            config_object : REQUIRED : configuration containing org_id, client_id and tech_id.
+            fetcher : REQUIRED : function called with the config, verbose and metrics arguments, returning a dictionary with token and expiry (in ms).
+                It should not reference a connector, as the manager is kept for the whole process (see connector.fetchToken).
+            cachePath : OPTIONAL : folder where the tokens are cached (default ~/.audiencemanager/tokens).
+            diskCache : OPTIONAL : set to False to only cache the token in memory (default True).
+            refreshMargin : OPTIONAL : number of seconds before the expiry at which the token is not used anymore (default 500).
+                The background refresh happens twice that margin before the expiry.
+            autoRefresh : OPTIONAL : refresh the token in a background thread before it expires (default True).
+            verbose : OPTIONAL : print information if set to True.
+        """
+        self.config = dict(config_object)
+        self.fetcher = fetcher
+        self.key = tokenKey(config_object)
+        if cachePath is None:
+            cachePath = Path.home() / '.audiencemanager' / 'tokens'
+        self.cachePath = Path(cachePath)
+        self.diskCache = diskCache
+        self.refreshMargin = refreshMargin
+        self.autoRefresh = autoRefresh
+        self.verbose = verbose
+        self.token = None
+        self.expiresAt = 0
+        self._lock = threading.Lock()  # token, expiry and subscribers, never held during a request
+        self._fetchLock = threading.Lock()  # only one renewal at a time, the waiting threads re-use its token
+        self._subscribers = []
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def date_limit(self)->float:
+        """
+        Time after which the token should not be used anymore.
+        """
+        return self.expiresAt - self.refreshMargin
+
+    def _isValid(self, expiresAt: float, margin: float)->bool:
+        return time.time() < expiresAt - margin
+
+    def _readDisk(self)->dict:
+        """
+        Read the cached token of this configuration. Return None if there is none.
+        """
+        try:
+            with open(self.cachePath / f"{self.key}.json", 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _writeDisk(self, token: str, expiresAt: float)->None:
+        """
+        Write the token in the cache, only readable by the current user.
+        """
+        self.cachePath.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cachePath / f"{self.key}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'token': token, 'expiresAt': expiresAt}, f)
+        os.replace(tmp_path, self.cachePath / f"{self.key}.json")
+
+    def _fetch(self, metrics: object = None)->tuple:
+        """
+        Request a new token to IMS.
+        """
+        token_and_expiry = self.fetcher(config=self.config, verbose=self.verbose, metrics=metrics)
+        return token_and_expiry['token'], time.time() + token_and_expiry['expiry'] / 1000
+
+    def _obtain(self, margin: float, stale: str = None, metrics: object = None)->tuple:
+        """
+        Return a token valid for at least margin seconds, from the disk cache or from IMS.
+        A token equal to stale is not re-used.
+        """
+        if self.diskCache == False:
+            return self._fetch(metrics)
+        with FileLock(str(self.cachePath / f"{self.key}.lock")):
+            cached = self._readDisk()
+            if cached is not None and cached['token'] != stale and self._isValid(cached['expiresAt'], margin):
+                return cached['token'], cached['expiresAt']
+            token, expiresAt = self._fetch(metrics)
+            self._writeDisk(token, expiresAt)
+            return token, expiresAt
+
+    def getToken(self, stale: str = None, metrics: object = None)->str:
+        """
+        Return a valid token.
+        Arguments:
+            stale : OPTIONAL : token that has been rejected by the API, a new token is retrieved if it is still the current one.
+            metrics : OPTIONAL : Metrics instance of the caller, receiving the token event if a token is requested to IMS.
+        """
+        token = self.token
+        if token is not None and token != stale and self._isValid(self.expiresAt, self.refreshMargin):
+            return token
+        return self._refresh(self.refreshMargin, stale, metrics)
+
+    def _refresh(self, margin: float, stale: str = None, metrics: object = None)->str:
+        """
+        Renew the token and notify the subscribers if it has changed.
+        The token is requested outside of the state lock, so that reading the token and subscribing are not blocked by IMS.
+        """
+        with self._fetchLock:
+            with self._lock:
+                if self.token is not None and self.token != stale and self._isValid(self.expiresAt, margin):
+                    return self.token
+            token, expiresAt = self._obtain(margin, stale, metrics)
+            with self._lock:
+                changed = token != self.token
+                self.token, self.expiresAt = token, expiresAt
+        if changed:
+            self._notify()
+        if self.autoRefresh:
+            self._startThread()
+        return token
+
+    def subscribe(self, callback: callable)->None:
+        """
+        Register a method that is called with (token, date_limit) every time the token changes.
+        Only a weak reference to bound methods is kept so connectors can be garbage collected.
+        """
+        if hasattr(callback, '__self__'):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = lambda: callback
+        with self._lock:
+            self._subscribers.append(ref)
+
+    def _notify(self)->None:
+        with self._lock:
+            self._subscribers = [ref for ref in self._subscribers if ref() is not None]
+            callbacks = [ref() for ref in self._subscribers]
+        for callback in callbacks:
+            if callback is not None:
+                callback(self.token, self.date_limit)
+
+    def _startThread(self)->None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"aam-token-{self.key[:8]}", daemon=True)
+            self._thread.start()
+
+    def _run(self)->None:
+        """
+        Background loop refreshing the token before it reaches its date limit.
+        """
+        while not self._stop.is_set():
+            wait = self.expiresAt - 2 * self.refreshMargin - time.time()
+            if wait > 0 and self._stop.wait(wait):
+                break
+            try:
+                self._refresh(2 * self.refreshMargin)
+                if self.expiresAt - 2 * self.refreshMargin <= time.time() and self._stop.wait(30):
+                    break  # token lifetime shorter than the margin, avoid requesting IMS in a loop
+            except Exception as e:
+                if self.verbose:
+                    print(f"Issue refreshing the token: {e}")
+                if self._stop.wait(30):
+                    break
+
+    def stop(self)->None:
+        """
+        Stop the background refresh.
+        """
+        self._stop.set()
+
+
+def tokenKey(config_object: dict)->str:
+    """
+    Return the key identifying the token of a configuration.
+    """
+    identity = f"{config_object['org_id']}|{config_object['client_id']}|{config_object['tech_id']}"
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+
+def credentialsFingerprint(config_object: dict)->str:
+    """
+    Return a fingerprint of the credentials of a configuration: secret, private key, or path of the key file with its size and
+    modification time, so that a rotated secret or key does not re-use a manager created with the previous one.
+    """
+    parts = [config_object.get('secret') or '']
+    if config_object.get('private_key') is not None:
+        parts.append(config_object['private_key'])
+    else:
+        pathToKey = config_object.get('pathToKey') or ''
+        parts.append(pathToKey)
+        try:
+            stat = os.stat(pathToKey)
+            parts.append(f"{stat.st_size}|{stat.st_mtime_ns}")
+        except (OSError, ValueError):
+            pass
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def getTokenManager(config_object: dict, fetcher: callable, cachePath: str = None, diskCache: bool = True, refreshMargin: int = 500,
+                    autoRefresh: bool = True, verbose: bool = False)->TokenManager:
+    """
+    Return the TokenManager of this configuration and options for the current process, create it if it does not exist.
+    Arguments:
+        config_object : REQUIRED : configuration containing org_id, client_id and tech_id.
+        fetcher : REQUIRED : function returning a new token (see TokenManager), used when the manager is created.
+    The other arguments are the ones of the TokenManager. Different credentials (secret or private key), cachePath, diskCache,
+    refreshMargin or autoRefresh return a different manager, verbose is the one of the first call.
+    """
+    if cachePath is None:
+        cachePath = Path.home() / '.audiencemanager' / 'tokens'
+    key = (tokenKey(config_object), credentialsFingerprint(config_object), str(Path(cachePath).resolve()), diskCache, refreshMargin, autoRefresh)
+    with _managersLock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = TokenManager(config_object, fetcher, cachePath=cachePath, diskCache=diskCache, refreshMargin=refreshMargin,
+                                   autoRefresh=autoRefresh, verbose=verbose)
+            _managers[key] = manager
+        return manager
@@ -0,0 +1,193 @@
+from audiencemanager.segmentrule import _Node, Not, And, Or
+from collections import namedtuple
+import hashlib, re
+
+_TOKENS = re.compile(r"""\s*(?:
+    (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+    |(?P<number>-?\d+(?:\.\d+)?)(?![\w.])
+    |(?P<op>==|!=|<=|>=|<|>)
+    |(?P<paren>[()])
+    |(?P<word>[A-Za-z0-9_@$][\w.\-:@$]*)
+    )""", re.VERBOSE)
+_KEYWORDS = {'AND', 'OR', 'NOT'}
+_WORD_OPERATORS = {'contains', 'startswith', 'endswith', 'matches'}
+OPERATORS = ['==', '!=', '<', '<=', '>', '>=', 'contains', 'startswith', 'endswith', 'matches']
+
+
+class Condition(_Node, namedtuple('Condition', ['key', 'op', 'value'])):
+    __slots__ = ()
+
+
+def _tokenize(rule: str)->list:
+    tokens = []
+    pos = 0
+    rule = rule.rstrip()
+    while pos < len(rule):
+        match = _TOKENS.match(rule, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"Invalid trait rule, unexpected character at position {pos}: {rule[pos:pos + 20]}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        start = match.start(kind)
+        if kind == 'word' and value.upper() in _KEYWORDS:
+            kind, value = 'keyword', value.upper()
+        elif kind == 'word' and value.lower() in _WORD_OPERATORS:
+            kind, value = 'op', value.lower()
+        elif kind == 'string':
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        elif kind == 'number':
+            value = float(value) if '.' in value else int(value)
+        tokens.append((kind, value, start))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent parser, the precedence is NOT > AND > OR.
+    """
+
+    def __init__(self, rule: str)->None:
+        self.rule = rule
+        self.tokens = _tokenize(rule)
+        self.pos = 0
+
+    def _peek(self)->tuple:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None, len(self.rule))
+
+    def _next(self)->tuple:
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def _error(self, expected: str)->ValueError:
+        kind, value, position = self._peek()
+        found = 'end of rule' if kind is None else repr(value)
+        return ValueError(f"Invalid trait rule, expected {expected} at position {position}, found {found}: {self.rule}")
+
+    def parse(self)->tuple:
+        if len(self.tokens) == 0:
+            raise ValueError("Empty trait rule")
+        node = self._or()
+        if self._peek()[0] is not None:
+            raise self._error("AND, OR or the end of the rule")
+        return node
+
+    def _or(self)->tuple:
+        operands = [self._and()]
+        while self._peek()[1] == 'OR' and self._peek()[0] == 'keyword':
+            self._next()
+            operands.append(self._and())
+        return operands[0] if len(operands) == 1 else Or(tuple(operands))
+
+    def _and(self)->tuple:
+        operands = [self._not()]
+        while self._peek()[1] == 'AND' and self._peek()[0] == 'keyword':
+            self._next()
+            operands.append(self._not())
+        return operands[0] if len(operands) == 1 else And(tuple(operands))
+
+    def _not(self)->tuple:
+        if self._peek()[1] == 'NOT' and self._peek()[0] == 'keyword':
+            self._next()
+            return Not(self._not())
+        return self._condition()
+
+    def _condition(self)->tuple:
+        kind, value, _ = self._peek()
+        if kind == 'paren' and value == '(':
+            self._next()
+            node = self._or()
+            if self._peek()[1] != ')':
+                raise self._error("')'")
+            self._next()
+            return node
+        if kind != 'word':
+            raise self._error("a signal key, NOT or '('")
+        key = self._next()[1]
+        if self._peek()[0] != 'op':
+            raise self._error(f"an operator ({', '.join(OPERATORS)})")
+        op = self._next()[1]
+        kind, value, _ = self._peek()
+        if kind not in ('string', 'number'):
+            raise self._error("a quoted string or a number")
+        self._next()
+        if op in ('contains', 'startswith', 'endswith', 'matches') and kind != 'string':
+            raise ValueError(f"Invalid trait rule, {op} requires a quoted string for the key {key}: {self.rule}")
+        if op == 'matches':
+            try:
+                re.compile(value)
+            except re.error as e:
+                raise ValueError(f"Invalid trait rule, invalid regular expression for the key {key} ({e}): {self.rule}")
+        return Condition(key, op, value)
+
+
+def parseTraitRule(rule: str)->tuple:
+    """
+    Parse a trait rule and return its tree, made of Condition, Not, And and Or nodes.
+    A condition is made of a signal key, an operator (==, !=, <, <=, >, >=, contains, startswith, endswith, matches) and
+    a quoted string or a number. Conditions are combined with AND, OR, NOT and parentheses.
+    Raise a ValueError with the position of the issue when the rule is invalid.
+    """
+    if type(rule) != str:
+        raise ValueError("The trait rule must be a string")
+    return _Parser(rule).parse()
+
+
+def signalKeys(node: tuple)->set:
+    """
+    Return the signal keys used in a rule tree.
+    """
+    keys = set()
+    stack = [node]
+    while len(stack) > 0:
+        node = stack.pop()
+        if type(node) == Condition:
+            keys.add(node.key)
+        elif type(node) == Not:
+            stack.append(node.operand)
+        else:
+            stack.extend(node.operands)
+    return keys
+
+
+def formatTraitRule(node: tuple)->str:
+    """
+    Return the canonical text of a rule tree, used to recognize the same rule written with a different spacing.
+    """
+    if type(node) == Condition:
+        value = node.value
+        if type(value) == str:
+            value = '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+        return f"{node.key} {node.op} {value}"
+    if type(node) == Not:
+        return f"NOT {formatTraitRule(node.operand)}" if type(node.operand) == Condition else f"NOT ({formatTraitRule(node.operand)})"
+    separator = ' AND ' if type(node) == And else ' OR '
+    return separator.join(formatTraitRule(operand) if type(operand) in (Condition, Not) else f"({formatTraitRule(operand)})"
+                          for operand in node.operands)
+
+
+class TraitRule:
+    """
+    Parsed trait rule.
+    """
+
+    def __init__(self, rule: str)->None:
+        """
+        Parse the rule, raise a ValueError when it is invalid.
+        Arguments:
+            rule : REQUIRED : trait rule (ex: 'c_page == "home" AND c_visits >= 3').
+        """
+        self.rule = rule
+        self.tree = parseTraitRule(rule)
+        self.keys = signalKeys(self.tree)
+        self.canonical = formatTraitRule(self.tree)
+
+    def __repr__(self)->str:
+        return f"TraitRule({self.rule!r})"
+
+    @property
+    def hash(self)->str:
+        return hashlib.sha1(self.canonical.encode('utf-8')).hexdigest()
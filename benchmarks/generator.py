@@ -0,0 +1,172 @@
+"""
+Synthetic Audience Manager instance generator used by the benchmarks.
+The objects have the fields and value distributions of a real instance (trait types, integration codes, rules, metrics,
+deep folder trees, segment rules referencing traits, destination mappings), and are reproducible with the seed.
+Only the standard library is used so that the stub server does not import the modules measured.
+"""
+import random
+from itertools import count
+
+TRAIT_TYPES = [('RULE_BASED_TRAIT', 70), ('ON_BOARDED_TRAIT', 25), ('ALGO_TRAIT', 5)]
+SIGNAL_KEYS = ['c_page', 'c_section', 'c_category', 'c_product', 'c_country', 'c_device', 'c_campaign', 'c_score', 'c_visits', 'c_language']
+WORDS = ['auto', 'finance', 'travel', 'sport', 'news', 'retail', 'luxury', 'family', 'students', 'gaming', 'music', 'health',
+         'insurance', 'mobile', 'desktop', 'france', 'germany', 'spain', 'premium', 'engaged', 'visitors', 'buyers', 'intenders']
+START_TIME = 1420070400000  # 2015-01-01 in milliseconds
+
+
+def _name(rand: random.Random, prefix: str, objectId: int)->str:
+    return f"{prefix} {' '.join(rand.sample(WORDS, 3))} {objectId}"
+
+
+def _folders(rand: random.Random, ids: count, parentId: int, path: str, depth: int, maxDepth: int, fanout: int)->list:
+    """
+    Return the sub folders of a folder, as returned by the folders endpoints (nested subFolders).
+    """
+    if depth >= maxDepth:
+        return []
+    folders = []
+    # the number of sub folders decreases with the depth, some branches stop early
+    width = rand.randint(1, fanout) if depth > 0 else fanout
+    for _ in range(width):
+        if depth > 1 and rand.random() < 0.25:
+            continue
+        folderId = next(ids)
+        name = f"{rand.choice(WORDS)} {folderId}"
+        folder = {'folderId': folderId, 'parentFolderId': parentId, 'name': name, 'path': f"{path}/{name}"}
+        subFolders = _folders(rand, ids, folderId, folder['path'], depth + 1, maxDepth, fanout)
+        folder['folderCount'] = len(subFolders)
+        if len(subFolders) > 0:
+            folder['subFolders'] = subFolders
+        folders.append(folder)
+    return folders
+
+
+def _folderIds(folders: list)->list:
+    ids = []
+    stack = list(folders)
+    while len(stack) > 0:
+        folder = stack.pop()
+        ids.append(folder['folderId'])
+        stack.extend(folder.get('subFolders', []))
+    return ids
+
+
+def _metrics(rand: random.Random)->dict:
+    lifetime = int(rand.paretovariate(1.2) * 1000)
+    metrics = {'uniquesLifetime': lifetime}
+    for days in [1, 7, 14, 30, 60]:
+        metrics[f'uniques{days}Day'] = int(lifetime * min(1, days / 90) * rand.uniform(0.5, 1))
+        metrics[f'population{days}Day'] = int(metrics[f'uniques{days}Day'] * rand.uniform(1, 1.5))
+    return metrics
+
+
+def _traitRule(rand: random.Random)->str:
+    conditions = []
+    for _ in range(rand.randint(1, 4)):
+        key = rand.choice(SIGNAL_KEYS)
+        if rand.random() < 0.3:
+            conditions.append(f"{key} > {rand.randint(1, 100)}")
+        else:
+            conditions.append(f'{key} == "{rand.choice(WORDS)}"')
+    return f" {rand.choice(['AND', 'OR'])} ".join(conditions)
+
+
+def _segmentRule(rand: random.Random, traitIds: list)->str:
+    """
+    Return a rule referencing 1 to 6 traits, with nested groups and frequency conditions.
+    """
+    terms = []
+    for _ in range(rand.randint(1, 6)):
+        sid = rand.choice(traitIds)
+        if rand.random() < 0.15:
+            terms.append(f"({sid}T >= {rand.randint(2, 5)})")
+        else:
+            terms.append(f"{sid}T")
+    if len(terms) > 3:
+        terms = [f"({' AND '.join(terms[:2])})"] + terms[2:]
+    rule = f" {rand.choice(['OR', 'AND'])} ".join(terms)
+    if rand.random() < 0.1:
+        rule = f"({rule}) AND NOT {rand.choice(traitIds)}T"
+    return rule
+
+
+def generateInstance(traits: int = 100000, segments: int = 20000, destinations: int = 50, dataSources: int = 200,
+                     folderDepth: int = 7, folderFanout: int = 6, seed: int = 0)->dict:
+    """
+    Return a dictionary with the dataSources, traitFolders, segmentFolders, traits, segments, destinations and mappings
+    (destinationId: list of mappings) of a synthetic instance.
+    Arguments:
+        traits : OPTIONAL : number of traits (default 100000).
+        segments : OPTIONAL : number of segments (default 20000).
+        destinations : OPTIONAL : number of destinations (default 50).
+        dataSources : OPTIONAL : number of data sources (default 200).
+        folderDepth : OPTIONAL : maximum depth of the folder trees (default 7).
+        folderFanout : OPTIONAL : maximum number of sub folders per folder (default 6).
+        seed : OPTIONAL : seed of the random generator (default 0).
+    """
+    rand = random.Random(seed)
+    pid = 1234
+    instance = {}
+    instance['dataSources'] = [{
+        'dataSourceId': 100000 + index, 'pid': pid, 'name': f"data source {index}", 'description': '', 'status': 'ACTIVE',
+        'integrationCode': f"ds{index}", 'idType': rand.choice(['COOKIE', 'CROSS_DEVICE']), 'type': 'GENERAL',
+        'createTime': START_TIME, 'updateTime': START_TIME + rand.randint(0, 10 ** 11),
+    } for index in range(dataSources)]
+    dataSourceIds = [dataSource['dataSourceId'] for dataSource in instance['dataSources']]
+    for objectType, firstId in [('trait', 1), ('segment', 500000)]:
+        ids = count(firstId + 1)
+        root = {'folderId': firstId, 'parentFolderId': 0, 'name': f"All {objectType.capitalize()}s", 'path': f"/All {objectType.capitalize()}s"}
+        subFolders = _folders(rand, ids, firstId, root['path'], 0, folderDepth, folderFanout)
+        root['folderCount'] = len(subFolders)
+        root['subFolders'] = subFolders
+        instance[f'{objectType}Folders'] = [root]
+    traitFolderIds = _folderIds(instance['traitFolders'])
+    segmentFolderIds = _folderIds(instance['segmentFolders'])
+    types = [traitType for traitType, weight in TRAIT_TYPES for _ in range(weight)]
+    instance['traits'] = []
+    for index in range(traits):
+        sid = 1000000 + index
+        createTime = START_TIME + rand.randint(0, 2 * 10 ** 11)
+        trait = {
+            'sid': sid, 'name': _name(rand, 'trait', sid), 'description': rand.choice(['', f"description of {sid}"]),
+            'integrationCode': f"ic_{sid}" if rand.random() < 0.8 else '',
+            'folderId': rand.choice(traitFolderIds), 'dataSourceId': rand.choice(dataSourceIds), 'pid': pid,
+            'traitType': rand.choice(types), 'status': 'ACTIVE', 'ttl': rand.choice([30, 60, 120, 180]),
+            'createTime': createTime, 'updateTime': createTime + rand.randint(0, 10 ** 10), 'crUID': 1, 'upUID': 1,
+            'metrics': _metrics(rand),
+        }
+        if trait['traitType'] == 'RULE_BASED_TRAIT':
+            trait['traitRule'] = _traitRule(rand)
+            trait['traitRuleVersion'] = 1
+        instance['traits'].append(trait)
+    traitIds = [trait['sid'] for trait in instance['traits']]
+    instance['segments'] = []
+    for index in range(segments):
+        sid = 2000000 + index
+        createTime = START_TIME + rand.randint(0, 2 * 10 ** 11)
+        instance['segments'].append({
+            'sid': sid, 'name': _name(rand, 'segment', sid), 'description': '', 'integrationCode': f"seg_{sid}",
+            'folderId': rand.choice(segmentFolderIds), 'dataSourceId': rand.choice(dataSourceIds), 'pid': pid,
+            'mergeRuleDataSourceId': rand.choice(dataSourceIds), 'status': 'ACTIVE',
+            'segmentRule': _segmentRule(rand, traitIds) if len(traitIds) > 0 else '',
+            'createTime': createTime, 'updateTime': createTime + rand.randint(0, 10 ** 10), 'crUID': 1, 'upUID': 1,
+            'metrics': _metrics(rand),
+        })
+    segmentIds = [segment['sid'] for segment in instance['segments']]
+    instance['destinations'] = []
+    instance['mappings'] = {}
+    mappingIds = count(1)
+    for index in range(destinations):
+        destinationId = 3000 + index
+        instance['destinations'].append({
+            'destinationId': destinationId, 'name': f"destination {index}", 'description': '', 'pid': pid, 'status': 'ACTIVE',
+            'destinationType': rand.choice(['PUSH', 'ANALYTICS']), 'dataSourceId': rand.choice(dataSourceIds),
+            'createTime': START_TIME, 'updateTime': START_TIME + rand.randint(0, 10 ** 11),
+        })
+        mapped = rand.sample(segmentIds, min(len(segmentIds), rand.randint(50, 500)))
+        instance['mappings'][destinationId] = [{
+            'mappingId': next(mappingIds), 'destinationId': destinationId, 'sid': sid, 'traitType': 'SEGMENT',
+            'traitValue': f"seg_{sid}", 'startDate': '2020-01-01', 'endDate': None,
+            'createTime': START_TIME, 'updateTime': START_TIME,
+        } for sid in mapped]
+    return instance
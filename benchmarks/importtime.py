@@ -0,0 +1,68 @@
+"""
+Measure the time needed to import audiencemanager, and check that the heavy modules are not imported with it.
+Each run is done in a new interpreter with python -X importtime.
+Usage:
+    python benchmarks/importtime.py [--runs 5] [--top 10] [--max-ms 300] [--json]
+The script exits with the code 1 if the median import time is above --max-ms or if a heavy module is imported.
+"""
+import argparse, json, statistics, subprocess, sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# modules that should only be imported when they are used
+HEAVY = ['pandas', 'numpy', 'pyarrow', 'polars', 'aiohttp', 'jwt', 'cryptography']
+
+
+def importTime(module: str = 'audiencemanager')->dict:
+    """
+    Import the module in a new interpreter and return the cumulative time (microseconds) per imported module,
+    and the heavy modules that have been imported.
+    """
+    code = f"import sys, {module}; print(','.join(name for name in {HEAVY!r} if name in sys.modules))"
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    modules = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        selfTime, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = {'self': int(selfTime), 'cumulative': int(cumulative)}
+    heavy = [name for name in process.stdout.strip().split(',') if name]
+    return {'total': modules[module]['cumulative'], 'modules': modules, 'heavy': heavy}
+
+
+def main()->int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5, help='number of imports measured (default 5)')
+    parser.add_argument('--top', type=int, default=10, help='number of slowest modules reported (default 10)')
+    parser.add_argument('--max-ms', type=float, default=None, help='fail if the median import time is above this value')
+    parser.add_argument('--json', action='store_true', help='print the result as JSON')
+    args = parser.parse_args()
+    runs = [importTime() for _ in range(args.runs)]
+    totals = [run['total'] / 1000 for run in runs]
+    last = runs[-1]
+    slowest = sorted(last['modules'].items(), key=lambda item: item[1]['self'], reverse=True)[:args.top]
+    result = {
+        'python': sys.version.split()[0],
+        'runs': args.runs,
+        'medianMs': round(statistics.median(totals), 2),
+        'minMs': round(min(totals), 2),
+        'maxMs': round(max(totals), 2),
+        'heavyImported': last['heavy'],
+        'slowest': [{'module': name, 'selfMs': round(times['self'] / 1000, 2), 'cumulativeMs': round(times['cumulative'] / 1000, 2)}
+                    for name, times in slowest],
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"import audiencemanager: median {result['medianMs']} ms (min {result['minMs']}, max {result['maxMs']}) over {args.runs} runs")
+        print(f"heavy modules imported: {', '.join(result['heavyImported']) or 'none'}")
+        for element in result['slowest']:
+            print(f"  {element['selfMs']:>8} ms  {element['module']}")
+    failed = len(result['heavyImported']) > 0
+    if args.max_ms is not None and result['medianMs'] > args.max_ms:
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
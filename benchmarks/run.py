@@ -0,0 +1,278 @@
+"""
+Benchmark suite of the audiencemanager module, run against a local stub of the API serving a synthetic instance.
+For each scenario, the throughput (elements per second), the latency percentiles of the requests and the peak memory
+(tracemalloc, measured on a separate run) are reported. The results are saved in a JSON file to be compared across versions.
+Usage:
+    python benchmarks/run.py [--traits 100000] [--segments 20000] [--repeat 3] [--only getTraits.raw,createTrait]
+                             [--latency 0] [--no-gzip] [--codec orjson] [--compare benchmarks/results/<previous>.json]
+"""
+from pathlib import Path
+import argparse, gc, json, platform, statistics, sys, time, tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))  # the audiencemanager module of this repository
+sys.path.insert(0, str(HERE))
+
+import audiencemanager
+from audiencemanager import config, frames, outputs
+from generator import generateInstance
+from stubserver import StubAPI
+
+SCENARIOS = {}
+
+
+def scenario(name: str, setup: callable = None)->callable:
+    """
+    Register a scenario: a function receiving the context (and the result of setup) and returning the number of elements processed.
+    The setup function is run before each iteration and is not measured.
+    """
+    def register(func):
+        SCENARIOS[name] = (func, setup)
+        return func
+    return register
+
+
+class RequestTimer:
+    """
+    Record the duration of the requests sent by a connector (until the response is received, retries included).
+    """
+
+    def __init__(self, connector: object)->None:
+        self.connector = connector
+        self.durations = []
+
+    def __enter__(self)->'RequestTimer':
+        request = self.connector._request
+
+        def timedRequest(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return request(*args, **kwargs)
+            finally:
+                self.durations.append(time.perf_counter() - start)
+
+        self.connector._request = timedRequest
+        return self
+
+    def __exit__(self, *args)->None:
+        del self.connector._request  # back to the method of the class
+
+
+def percentile(values: list, rank: float)->float:
+    if len(values) == 0:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(rank / 100 * (len(ordered) - 1))))]
+
+
+@scenario('getTraits.raw')
+def getTraitsRaw(context: dict, state: object)->int:
+    return len(context['aam'].getTraits(format='raw'))
+
+
+@scenario('getTraits.df')
+def getTraitsDf(context: dict, state: object)->int:
+    return len(context['aam'].getTraits())
+
+
+@scenario('getTraits.paged')
+def getTraitsPaged(context: dict, state: object)->int:
+    return len(context['aam'].getTraits(format='raw', pageSize=10000, prefetch=4))
+
+
+@scenario('iterTraits')
+def iterTraits(context: dict, state: object)->int:
+    return sum(1 for _ in context['aam'].iterTraits())
+
+
+@scenario('getSegments.raw')
+def getSegmentsRaw(context: dict, state: object)->int:
+    return len(context['aam'].getSegments(format='raw'))
+
+
+@scenario('getTraitFolders')
+def getTraitFolders(context: dict, state: object)->int:
+    return len(context['aam'].getTraitFolders())
+
+
+def _rawTraits(context: dict)->list:
+    if 'rawTraits' not in context:
+        context['rawTraits'] = context['aam'].getTraits(format='raw')
+    return context['rawTraits']
+
+
+@scenario('dataframe', setup=_rawTraits)
+def dataframe(context: dict, records: list)->int:
+    return len(outputs.convert(records, 'df'))
+
+
+@scenario('dataframe.typed', setup=_rawTraits)
+def dataframeTyped(context: dict, records: list)->int:
+    return len(frames.toDataFrame(records, 'traits'))
+
+
+@scenario('createTrait')
+def createTrait(context: dict, state: object)->int:
+    aam = context['aam']
+    instance = context['instance']
+    number = context['args'].creates
+
+    def create(index):
+        return aam.createTrait(name=f"benchmark trait {index}", traitType='ON_BOARDED_TRAIT',
+                               dataSourceId=instance['dataSources'][0]['dataSourceId'], folderId=instance['traitFolders'][0]['folderId'])
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(create, range(number)))
+    return len(results)
+
+
+def _seedTraits(context: dict)->list:
+    return context['stub'].seed('traits', context['args'].deletes)
+
+
+@scenario('deleteBulkTraits', setup=_seedTraits)
+def deleteBulkTraits(context: dict, ids: list)->int:
+    result = context['aam'].deleteBulkTraits(ids, chunkSize=500, max_workers=5, retry=0)
+    return int(result['deleted'].sum())
+
+
+@scenario('destinationMappings')
+def destinationMappings(context: dict, state: object)->int:
+    aam = context['aam']
+    ids = [destination['destinationId'] for destination in context['instance']['destinations']]
+    results = aam._fanOut(aam.getDestinationMappings, ids, max_workers=10)
+    return sum(len(result) for result in results)
+
+
+def measure(context: dict, name: str, repeat: int, memory: bool)->dict:
+    """
+    Run a scenario repeat times and return its statistics.
+    """
+    func, setup = SCENARIOS[name]
+    aam = context['aam']
+    seconds = []
+    latencies = []
+    requests = []
+    items = 0
+    for _ in range(repeat):
+        state = setup(context) if setup is not None else None
+        gc.collect()
+        with RequestTimer(aam.connector) as timer:
+            start = time.perf_counter()
+            items = func(context, state)
+            seconds.append(time.perf_counter() - start)
+        latencies += timer.durations
+        requests.append(len(timer.durations))
+    result = {
+        'items': items,
+        'runs': [round(value, 4) for value in seconds],
+        'medianSeconds': round(statistics.median(seconds), 4),
+        'minSeconds': round(min(seconds), 4),
+        'throughput': round(items / statistics.median(seconds), 1) if items else None,
+        'requests': requests[-1],
+        'latencyMs': {
+            'p50': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+            'p90': round(percentile(latencies, 90) * 1000, 2) if latencies else None,
+            'p99': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+            'max': round(max(latencies) * 1000, 2) if latencies else None,
+        },
+        'peakMemoryMB': None,
+    }
+    if memory:
+        state = setup(context) if setup is not None else None
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func(context, state)
+            result['peakMemoryMB'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def makeClient(url: str, codec: str = None)->object:
+    """
+    Return an AudienceManager instance requesting the stub (token included).
+    """
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.primitives import serialization
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()).decode('utf-8')
+    configuration = dict(config.config_object, org_id='benchmark@AdobeOrg', client_id='benchmark', tech_id='benchmark@techacct.adobe.com',
+                         secret='benchmark', pathToKey='', private_key=key, tokenEndpoint=f"{url}/ims/exchange/jwt")
+    audiencemanager.modules.pd.DataFrame  # the import time of pandas is measured by importtime.py, not in the scenarios
+    aam = audiencemanager.AudienceManager(config_object=configuration, tokenCache=False, autoRefresh=False, poolSize=20, codec=codec)
+    aam.endpoint = f"{url}/v1"
+    aam.legacyEndpoint = f"{url}/v1"
+    return aam
+
+
+def compare(previous: dict, current: dict)->None:
+    print(f"\nComparison with {previous.get('version')} ({previous.get('timestamp')})")
+    for name, result in current['results'].items():
+        before = previous.get('results', {}).get(name)
+        if before is None:
+            continue
+        change = (result['medianSeconds'] - before['medianSeconds']) / before['medianSeconds'] * 100 if before['medianSeconds'] else 0
+        memory = ''
+        if result.get('peakMemoryMB') is not None and before.get('peakMemoryMB'):
+            memory = f"  memory {before['peakMemoryMB']} -> {result['peakMemoryMB']} MB"
+        print(f"  {name:<22} {before['medianSeconds']:>9.3f}s -> {result['medianSeconds']:>9.3f}s  ({change:+.1f}%){memory}")
+
+
+def main()->int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--traits', type=int, default=100000, help='number of traits of the instance (default 100000)')
+    parser.add_argument('--segments', type=int, default=20000, help='number of segments of the instance (default 20000)')
+    parser.add_argument('--destinations', type=int, default=50, help='number of destinations of the instance (default 50)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the generator (default 0)')
+    parser.add_argument('--repeat', type=int, default=3, help='number of measured runs per scenario (default 3)')
+    parser.add_argument('--only', default=None, help=f"comma separated scenarios, among {', '.join(SCENARIOS)}")
+    parser.add_argument('--creates', type=int, default=500, help='number of traits created by createTrait (default 500)')
+    parser.add_argument('--deletes', type=int, default=5000, help='number of traits deleted by deleteBulkTraits (default 5000)')
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds added by the stub to each response (default 0)')
+    parser.add_argument('--no-gzip', action='store_true', help='do not compress the responses')
+    parser.add_argument('--codec', default=None, help='JSON codec of the client: json or orjson (default orjson when installed)')
+    parser.add_argument('--no-memory', action='store_true', help='do not measure the peak memory')
+    parser.add_argument('--output', default=str(HERE / 'results'), help='folder of the result files (default benchmarks/results)')
+    parser.add_argument('--compare', default=None, help='result file of a previous run to compare with')
+    args = parser.parse_args()
+    names = list(SCENARIOS) if args.only is None else args.only.split(',')
+    unknown = [name for name in names if name not in SCENARIOS]
+    if len(unknown) > 0:
+        parser.error(f"unknown scenarios {unknown}, should be part of {list(SCENARIOS)}")
+    start = time.perf_counter()
+    instance = generateInstance(traits=args.traits, segments=args.segments, destinations=args.destinations, seed=args.seed)
+    print(f"instance generated in {time.perf_counter() - start:.1f}s: {len(instance['traits'])} traits, {len(instance['segments'])} segments")
+    results = {}
+    with StubAPI(instance, latency=args.latency / 1000, compress=not args.no_gzip) as stub:
+        aam = makeClient(stub.url, codec=args.codec)
+        context = {'aam': aam, 'stub': stub, 'instance': instance, 'args': args}
+        for name in names:
+            results[name] = measure(context, name, args.repeat, memory=not args.no_memory)
+            result = results[name]
+            print(f"{name:<22} {result['medianSeconds']:>9.3f}s  {result['throughput'] or 0:>12,.0f} items/s  "
+                  f"p50 {result['latencyMs']['p50']} ms  p99 {result['latencyMs']['p99']} ms  peak {result['peakMemoryMB']} MB")
+    report = {
+        'version': audiencemanager.__version__,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'codec': aam.connector.codec.name if hasattr(aam.connector.codec, 'name') else type(aam.connector.codec).__name__,
+        'settings': {'traits': args.traits, 'segments': args.segments, 'destinations': args.destinations, 'seed': args.seed,
+                     'repeat': args.repeat, 'latencyMs': args.latency, 'gzip': not args.no_gzip},
+        'results': results,
+    }
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    path = output / f"{report['version']}_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.write_text(json.dumps(report, indent=2))
+    print(f"results saved in {path}")
+    if args.compare is not None:
+        compare(json.loads(Path(args.compare).read_text()), report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
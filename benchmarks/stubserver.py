@@ -0,0 +1,231 @@
+"""
+Local stub of the Audience Manager REST API (and of the IMS token endpoint) serving a synthetic instance.
+The list responses are encoded once and kept until the objects change, so that the time measured is spent in the client.
+Supported endpoints (under /v1):
+    GET /traits, /traits/{sid}, /segments, /segments/{sid}, /folders/traits, /folders/segments, /datasources,
+    /destinations, /destinations/{id}/mappings
+    POST /traits, /segments, /traits/bulk-delete, /segments/bulk-delete
+    PUT /traits/{sid}, /segments/{sid}
+    DELETE /traits/{sid}, /segments/{sid}
+    POST /ims/exchange/jwt
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import gzip, json, threading, time
+
+FILTERS = {'folderId': 'folderId', 'dataSourceId': 'dataSourceId', 'dataSourceIds': 'dataSourceId', 'status': 'status'}
+
+
+class StubAPI:
+    """
+    Serve the instance passed (see generator.generateInstance) on a local port, in a background thread.
+    Arguments:
+        instance : REQUIRED : dictionary of the objects served.
+        latency : OPTIONAL : time in seconds added to each response, to simulate the network round trip (default 0).
+        compress : OPTIONAL : compress the responses with gzip when the client accepts it (default True).
+    """
+
+    def __init__(self, instance: dict, latency: float = 0, compress: bool = True)->None:
+        self.latency = latency
+        self.compress = compress
+        self.lock = threading.Lock()
+        self.objects = {
+            'traits': {trait['sid']: trait for trait in instance['traits']},
+            'segments': {segment['sid']: segment for segment in instance['segments']},
+        }
+        self.instance = instance
+        self.nextId = {'traits': max(self.objects['traits'], default=1000000) + 1, 'segments': max(self.objects['segments'], default=2000000) + 1}
+        self.versions = {'traits': 0, 'segments': 0}
+        self.encoded = {}  # (key, version, gzip) : body
+        self.counts = {'requests': 0, 'bytesOut': 0, 'tokens': 0}
+        self.server = None
+        self.url = None
+
+    def start(self)->str:
+        """
+        Start the server and return its URL (ex: http://127.0.0.1:8080).
+        """
+        api = self
+
+        class Handler(RequestHandler):
+            stub = api
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name='aam-stub', daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        return self.url
+
+    def stop(self)->None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self)->'StubAPI':
+        self.start()
+        return self
+
+    def __exit__(self, *args)->None:
+        self.stop()
+
+    def seed(self, objectType: str, number: int)->list:
+        """
+        Add copies of existing objects with new ids (ex: traits to be deleted by a benchmark) and return their ids.
+        """
+        with self.lock:
+            templates = list(self.objects[objectType].values())[:100]
+            ids = []
+            for index in range(number):
+                objectId = self.nextId[objectType]
+                self.nextId[objectType] += 1
+                self.objects[objectType][objectId] = dict(templates[index % len(templates)], sid=objectId, integrationCode=f"seeded_{objectId}")
+                ids.append(objectId)
+            self.versions[objectType] += 1
+        return ids
+
+    def listBody(self, objectType: str, params: dict, acceptGzip: bool)->tuple:
+        """
+        Return the encoded list (filtered and paginated as the API does) and whether it is compressed.
+        """
+        useGzip = self.compress and acceptGzip
+        key = (objectType, tuple(sorted(params.items())), self.versions.get(objectType, 0), useGzip)
+        body = self.encoded.get(key)
+        if body is None:
+            if objectType in self.objects:
+                elements = list(self.objects[objectType].values())
+            else:
+                elements = self.instance[objectType]
+            for param, field in FILTERS.items():
+                if param in params:
+                    values = set(params[param].split(','))
+                    elements = [element for element in elements if str(element.get(field)) in values]
+            if params.get('includeMetrics', 'false').lower() != 'true' and objectType in ['traits', 'segments', 'destinations']:
+                elements = [{key: value for key, value in element.items() if key != 'metrics'} for element in elements]
+            if 'pageSize' in params:
+                pageSize = int(params['pageSize'])
+                page = int(params.get('page', 0))
+                elements = {'list': elements[page * pageSize:(page + 1) * pageSize], 'page': page, 'pageSize': pageSize, 'total': len(elements)}
+            body = json.dumps(elements).encode('utf-8')
+            if useGzip:
+                body = gzip.compress(body, compresslevel=1)
+            with self.lock:
+                if len(self.encoded) > 256:
+                    self.encoded.clear()
+                self.encoded[key] = body
+        return body, useGzip
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    stub = None
+
+    def log_message(self, *args)->None:
+        pass
+
+    def _send(self, status: int, obj: object = None, body: bytes = None, compressed: bool = False)->None:
+        if body is None:
+            body = b'' if obj is None else json.dumps(obj).encode('utf-8')
+        if self.stub.latency > 0:
+            time.sleep(self.stub.latency)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
+        self.stub.counts['bytesOut'] += len(body)
+
+    def _read(self)->bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length > 0 else b''
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return body
+
+    def _body(self)->object:
+        body = self._read()
+        return json.loads(body) if body else None
+
+    def _handle(self, method: str)->None:
+        stub = self.stub
+        stub.counts['requests'] += 1
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path.endswith('/ims/exchange/jwt'):
+            self._read()  # form encoded
+            stub.counts['tokens'] += 1
+            return self._send(200, {'access_token': f"token{stub.counts['tokens']}", 'token_type': 'bearer', 'expires_in': 86399000})
+        parts = [part for part in url.path.split('/') if part][1:]  # without v1
+        if len(parts) == 0:
+            return self._send(404, {'code': 'not_found'})
+        acceptGzip = 'gzip' in (self.headers.get('Accept-Encoding') or '')
+        objectType = parts[0]
+        if method == 'GET':
+            if objectType in ['traits', 'segments'] and len(parts) == 1:
+                body, compressed = stub.listBody(objectType, params, acceptGzip)
+                return self._send(200, body=body, compressed=compressed)
+            if objectType in ['traits', 'segments'] and len(parts) == 2 and parts[1].isdigit():
+                element = stub.objects[objectType].get(int(parts[1]))
+                if element is None:
+                    return self._send(404, {'code': 'not_found', 'message': f"{objectType} {parts[1]} not found"})
+                return self._send(200, element)
+            if objectType == 'folders' and len(parts) == 2 and parts[1] in ['traits', 'segments']:
+                body, compressed = stub.listBody(parts[1][:-1] + 'Folders', {}, acceptGzip)
+                return self._send(200, body=body, compressed=compressed)
+            if objectType == 'datasources':
+                body, compressed = stub.listBody('dataSources', params, acceptGzip)
+                return self._send(200, body=body, compressed=compressed)
+            if objectType == 'destinations' and len(parts) == 1:
+                body, compressed = stub.listBody('destinations', params, acceptGzip)
+                return self._send(200, body=body, compressed=compressed)
+            if objectType == 'destinations' and len(parts) == 3 and parts[2] == 'mappings':
+                return self._send(200, stub.instance['mappings'].get(int(parts[1]), []))
+            return self._send(404, {'code': 'not_found'})
+        data = self._body()
+        if objectType not in ['traits', 'segments']:
+            return self._send(404, {'code': 'not_found'})
+        if method == 'POST' and len(parts) == 2 and parts[1] == 'bulk-delete':
+            with stub.lock:
+                for objectId in data or []:
+                    stub.objects[objectType].pop(int(objectId), None)
+                stub.versions[objectType] += 1
+            return self._send(200, [])
+        if method == 'POST' and len(parts) == 1:
+            with stub.lock:
+                objectId = stub.nextId[objectType]
+                stub.nextId[objectType] += 1
+                element = dict(data, sid=objectId, createTime=int(time.time() * 1000), updateTime=int(time.time() * 1000))
+                stub.objects[objectType][objectId] = element
+                stub.versions[objectType] += 1
+            return self._send(201, element)
+        if len(parts) == 2 and parts[1].isdigit():
+            objectId = int(parts[1])
+            with stub.lock:
+                if objectId not in stub.objects[objectType]:
+                    return self._send(404, {'code': 'not_found'})
+                if method == 'PUT':
+                    element = dict(stub.objects[objectType][objectId])
+                    element.update(data or {})
+                    element['updateTime'] = int(time.time() * 1000)
+                    stub.objects[objectType][objectId] = element
+                    stub.versions[objectType] += 1
+                    return self._send(200, element)
+                if method == 'DELETE':
+                    del stub.objects[objectType][objectId]
+                    stub.versions[objectType] += 1
+                    return self._send(204)
+        return self._send(405, {'code': 'method_not_allowed'})
+
+    def do_GET(self)->None:
+        self._handle('GET')
+
+    def do_POST(self)->None:
+        self._handle('POST')
+
+    def do_PUT(self)->None:
+        self._handle('PUT')
+
+    def do_DELETE(self)->None:
+        self._handle('DELETE')
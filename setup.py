@@ -24,7 +24,6 @@ CLASSIFIERS = [
     "Operating System :: OS Independent",
     "Programming Language :: Python",
     "Topic :: Scientific/Engineering :: Information Analysis",
-    "Programming Language :: Python :: 3.6",
     "Programming Language :: Python :: 3.7",
     "Programming Language :: Python :: 3.8",
     "Development Status :: 4 - Beta"
@@ -51,6 +50,13 @@ setup(
         'PyJWT[crypto]',
         'PyJWT',
         ],
+    extras_require={
+        'async': ['aiohttp'],
+        'stream': ['ijson'],
+        'arrow': ['pyarrow'],
+        'fast': ['orjson', 'brotli'],
+        'otel': ['opentelemetry-api'],
+    },
     classifiers=CLASSIFIERS,
-    python_requires='>=3.6'
+    python_requires='>=3.7'
 )
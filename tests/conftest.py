@@ -0,0 +1,88 @@
+import io
+import json
+
+import pytest
+import requests
+
+from audiencemanager import connector
+
+CONFIG = {'org_id': 'org@AdobeOrg', 'client_id': 'client', 'tech_id': 'tech@techacct.adobe.com', 'pathToKey': '', 'secret': '',
+          'tokenEndpoint': 'https://ims.example.com/ims/exchange/jwt'}
+
+
+def makeResponse(status: int = 200, body: object = None, headers: dict = None, content: bytes = None, url: str = 'https://aam.example.com/v1/'):
+    """
+    Return a requests.Response, the body is encoded in JSON unless the raw content is passed.
+    """
+    res = requests.Response()
+    res.status_code = status
+    res.url = url
+    res.headers.update(headers or {})
+    res._content = content if content is not None else json.dumps(body).encode('utf-8')
+    res._content_consumed = True
+    res.raw = io.BytesIO(res._content)
+    return res
+
+
+class StubSession:
+    """
+    Session returning the responses of a handler (or of a list, in order) and recording the requests sent.
+    """
+
+    def __init__(self, responses: object):
+        self.responses = responses
+        self.requests = []
+
+    def request(self, method, url, headers=None, params=None, data=None, stream=False):
+        self.requests.append({'method': method, 'url': url, 'headers': dict(headers or {}), 'params': params, 'data': data})
+        if callable(self.responses):
+            res = self.responses(method, url, params, data)
+        else:
+            res = self.responses.pop(0)
+        if isinstance(res, Exception):
+            raise res
+        res.url = url
+        if stream:
+            res.raw = io.BytesIO(res._content)
+            res._content, res._content_consumed = False, False
+        return res
+
+
+class StubPool:
+
+    def __init__(self, session: StubSession):
+        self.session = session
+
+    def getSession(self, endpoint: str):
+        return self.session
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def tokens(monkeypatch):
+    """
+    Replace the IMS token request, return the list of the tokens issued.
+    """
+    issued = []
+
+    def fetchToken(config, verbose=False, metrics=None, **kwargs):
+        issued.append(f"token{len(issued)}")
+        return {'token': issued[-1], 'expiry': 86400000}
+    monkeypatch.setattr(connector, 'fetchToken', fetchToken)
+    return issued
+
+
+@pytest.fixture
+def stubConnector(tokens, tmp_path):
+    """
+    Return a function creating an AdobeRequest sending its requests to a StubSession.
+    """
+    def make(responses, **kwargs):
+        session = StubSession(responses)
+        kwargs.setdefault('backoffFactor', 0)
+        kwargs.setdefault('codec', 'json')
+        adobeRequest = connector.AdobeRequest(CONFIG, sessionPool=StubPool(session), tokenCache=False, autoRefresh=False, **kwargs)
+        return adobeRequest, session
+    return make
@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from audiencemanager import asyncconnector, connector
+from audiencemanager.asyncaudiencemanager import AsyncAudienceManager
+from audiencemanager.ratelimiter import RateLimiter
+
+CONFIG = {'org_id': 'org@AdobeOrg', 'client_id': 'client', 'tech_id': 'tech@techacct.adobe.com', 'pathToKey': '', 'secret': '',
+          'tokenEndpoint': 'https://ims.example.com/ims/exchange/jwt'}
+
+
+class FakeResponse:
+
+    def __init__(self, status, body, headers=None):
+        self.status = status
+        self.body = json.dumps(body).encode('utf-8')
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def read(self):
+        return self.body
+
+
+class FakeSession:
+    closed = False
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, endpoint, headers=None, params=None, data=None):
+        self.requests.append((method, endpoint, params, dict(headers)))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def tokens(monkeypatch):
+    issued = []
+
+    def fetchToken(config, verbose=False, metrics=None, **kwargs):
+        issued.append(f"token{len(issued)}")
+        return {'token': issued[-1], 'expiry': 86400000}
+    monkeypatch.setattr(connector, 'fetchToken', fetchToken)
+    return issued
+
+
+def makeConnector(session, tmp_path, **kwargs):
+    kwargs.setdefault('backoffFactor', 0)
+    return asyncconnector.AsyncAdobeRequest(CONFIG, session=session, tokenCachePath=tmp_path, autoRefresh=False, **kwargs)
+
+
+def test_throttled_requests_are_retried(tokens, tmp_path):
+    session = FakeSession([FakeResponse(429, {'error': 'throttled'}, {'Retry-After': '0'}),
+                           FakeResponse(503, {'error': 'unavailable'}),
+                           FakeResponse(200, {'sid': 1})])
+    limiter = RateLimiter(rate=1000)
+    aam = makeConnector(session, tmp_path, rateLimiter=limiter)
+    assert asyncio.run(aam.getData('https://aam.example.com/v1/traits/1')) == {'sid': 1}
+    assert len(session.requests) == 3
+    assert limiter.rate < limiter.maxRate
+
+
+def test_server_errors_not_retried_for_post(tokens, tmp_path):
+    session = FakeSession([FakeResponse(503, {'error': 'unavailable'}), FakeResponse(200, {'sid': 1})])
+    aam = makeConnector(session, tmp_path)
+    assert asyncio.run(aam.postData('https://aam.example.com/v1/traits', data={'name': 'a'})) == {'error': 'unavailable'}
+    assert len(session.requests) == 1
+
+
+def test_retries_are_bounded(tokens, tmp_path):
+    session = FakeSession([FakeResponse(429, {'error': 'throttled'}) for _ in range(3)])
+    aam = makeConnector(session, tmp_path, retry=2)
+    assert asyncio.run(aam.getData('https://aam.example.com/v1/traits')) == {'error': 'throttled'}
+    assert len(session.requests) == 3
+
+
+def test_unauthorized_renews_the_token_once(tokens, tmp_path):
+    session = FakeSession([FakeResponse(401, {'error': 'expired'}), FakeResponse(401, {'error': 'expired'})])
+    aam = makeConnector(session, tmp_path, tokenCache=False)
+    assert asyncio.run(aam.getData('https://aam.example.com/v1/traits')) == {'error': 'expired'}
+    assert [request[3]['Authorization'] for request in session.requests] == ['Bearer token0', 'Bearer token1']
+
+
+def test_async_and_sync_send_the_same_params(tokens, tmp_path):
+    session = FakeSession([FakeResponse(200, [])])
+    aam = AsyncAudienceManager(CONFIG, session=session, tokenCachePath=tmp_path, autoRefresh=False)
+    asyncio.run(aam.getTraits(folderId=5, dataSourceIds=[1, 2], includeDetails=True, format='raw'))
+    assert session.requests[0][2] == [('includeMetrics', 'True'), ('folderId', 5), ('includeDetails', 'True'),
+                                      ('dataSourceId', '1'), ('dataSourceId', '2')]
@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from audiencemanager.audiencemanager import AudienceManager
+
+
+class FakeConnector:
+    """
+    Delete the ids posted from the existing ones, except the ids listed in stuck.
+    """
+
+    def __init__(self, existing, stuck=()):
+        self.existing = set(existing)
+        self.stuck = set(stuck)
+        self.bodies = []
+        self._lock = threading.Lock()
+
+    def postData(self, endpoint, data=None, headers=None, verbose=False):
+        with self._lock:
+            self.bodies.append(list(data))
+            deleted = {str(elementId) for elementId in data} - {str(elementId) for elementId in self.stuck}
+            self.existing = {elementId for elementId in self.existing if str(elementId) not in deleted}
+        return {'error': 'bulk delete errors are returned even on success'}
+
+
+def makeAudienceManager(connector):
+    aam = AudienceManager.__new__(AudienceManager)
+    aam.connector = connector
+    aam.endpoint = 'https://aam.example.com/v1'
+    aam.header = {}
+    return aam
+
+
+def statuses(df):
+    return dict(zip(df['id'], df['status']))
+
+
+def test_absent_ids_are_not_found_and_not_sent():
+    connector = FakeConnector(existing=[1, 2, 3, 9])
+    df = makeAudienceManager(connector)._bulkDelete('/segments/bulk-delete', [1, 2, 3, 4], lambda: sorted(connector.existing), chunkSize=2)
+    assert statuses(df) == {1: 'deleted', 2: 'deleted', 3: 'deleted', 4: 'notFound'}
+    assert df['deleted'].tolist() == [True, True, True, False]
+    assert df['attempts'].tolist() == [1, 1, 1, 0]
+    assert sorted(sum(connector.bodies, [])) == [1, 2, 3]
+
+
+def test_ids_not_deleted_are_sent_again():
+    connector = FakeConnector(existing=[1, 2], stuck=[2])
+    df = makeAudienceManager(connector)._bulkDelete('/segments/bulk-delete', [1, 2], lambda: sorted(connector.existing), retry=2)
+    assert statuses(df) == {1: 'deleted', 2: 'notDeleted'}
+    assert connector.bodies == [[1, 2], [2], [2]]
+    assert df['attempts'].tolist() == [1, 3]
+
+
+def test_ids_are_compared_as_strings():
+    connector = FakeConnector(existing=['1', '2'])
+    df = makeAudienceManager(connector)._bulkDelete('/datasources/bulk-delete', [1, 3], lambda: sorted(connector.existing))
+    assert statuses(df) == {1: 'deleted', 3: 'notFound'}
+
+
+def test_listing_error_after_the_deletion():
+    connector = FakeConnector(existing=[1, 2])
+    calls = []
+
+    def listIds():
+        calls.append(1)
+        if len(calls) > 1:
+            raise ConnectionError('listing failed')
+        return sorted(connector.existing)
+    df = makeAudienceManager(connector)._bulkDelete('/segments/bulk-delete', [1, 2, 3], listIds)
+    assert statuses(df) == {1: 'unverified', 2: 'unverified', 3: 'notFound'}
+    assert df['attempts'].tolist() == [1, 1, 0]
+    assert df['response'].iloc[0] == {'error': 'bulk delete errors are returned even on success'}
+
+
+def test_listing_error_before_the_deletion():
+    connector = FakeConnector(existing=[1])
+
+    def listIds():
+        raise ConnectionError('listing failed')
+    with pytest.raises(ConnectionError):
+        makeAudienceManager(connector)._bulkDelete('/segments/bulk-delete', [1], listIds)
+    assert connector.bodies == []
@@ -0,0 +1,101 @@
+from audiencemanager import cache as cacheModule
+from audiencemanager.cache import ResponseCache
+from audiencemanager.codec import JsonCodec
+from conftest import makeResponse
+
+
+class RecordingCodec(JsonCodec):
+
+    def __init__(self):
+        self.calls = []
+
+    def dumps(self, obj):
+        self.calls.append('dumps')
+        return super().dumps(obj)
+
+    def loads(self, content):
+        self.calls.append('loads')
+        return super().loads(content)
+
+
+def test_ttl_matches_path_segments():
+    cache = ResponseCache()
+    assert cache.getTtl('https://aam.example.com/v1/datasources/') == 3600
+    assert cache.getTtl('https://aam.example.com/v1/datasources/12') == 3600
+    assert cache.getTtl('https://aam.example.com/v1/datasources/12/history/inbound') == 0
+    assert cache.getTtl('https://aam.example.com/v1/datasources/configurations/available-id-types') == 86400
+    assert cache.getTtl('https://aam.example.com/v1/destinations/3/history/outbound') == 0
+    assert cache.getTtl('https://aam.example.com/v1/reports/largest-traits') == 86400
+    assert cache.getTtl('https://aam.example.com/v1/traits/') == 0
+
+
+def test_ttl_user_patterns():
+    cache = ResponseCache(ttl={'/traits': 600, '/traits/*': 60, '/datasources/*': 0})
+    assert cache.getTtl('/v1/traits/') == 600
+    assert cache.getTtl('/v1/traits/5') == 60
+    assert cache.getTtl('/v1/traits/limits') == 3600  # the literal entry wins over /traits/*
+    assert cache.getTtl('/v1/datasources/12') == 0
+    assert cache.getTtl('/v1/datasources/configurations') == 0
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cacheModule.time, 'time', lambda: now[0])
+    cache = ResponseCache(ttl={'/traits': 10}, codec='json')
+    cache.set('/v1/traits/', {'page': 1}, [{'sid': 1}])
+    assert cache.get('/v1/traits/', {'page': 1}) == (True, [{'sid': 1}])
+    assert cache.get('/v1/traits/', {'page': 2}) == (False, None)
+    now[0] += 11
+    assert cache.get('/v1/traits/', {'page': 1}) == (False, None)
+    assert cache.entries == {}
+
+
+def test_memory_tier_is_bounded():
+    cache = ResponseCache(ttl={'/traits/*': 60}, maxSize=2, codec='json')
+    for sid in range(3):
+        cache.set(f'/v1/traits/{sid}', None, {'sid': sid})
+    assert cache.get('/v1/traits/0') == (False, None)
+    assert cache.get('/v1/traits/2') == (True, {'sid': 2})
+
+
+def test_disk_tier(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    ResponseCache(ttl={'/traits/*': 60}, diskPath=path, codec='json').set('/v1/traits/1', None, {'sid': 1})
+    cache = ResponseCache(ttl={'/traits/*': 60}, diskPath=path, codec='json')
+    assert cache.get('/v1/traits/1') == (True, {'sid': 1})
+    cache.invalidate('/v1/segments/')
+    assert cache.get('/v1/traits/1') == (True, {'sid': 1})
+    cache.invalidate('/v1/traits/1')
+    assert cache.get('/v1/traits/1') == (False, None)
+    assert ResponseCache(ttl={'/traits/*': 60}, diskPath=path, codec='json').get('/v1/traits/1') == (False, None)
+
+
+def test_write_invalidates_the_cached_responses(stubConnector):
+    responses = [makeResponse(body=[{'sid': 1}]), makeResponse(body={'sid': 2}), makeResponse(body=[{'sid': 1}, {'sid': 2}])]
+    cache = ResponseCache(ttl={'/traits': 600})
+    aam, session = stubConnector(responses, cache=cache)
+    endpoint = 'https://aam.example.com/v1/traits/'
+    assert aam.getData(endpoint) == [{'sid': 1}]
+    assert aam.getData(endpoint) == [{'sid': 1}]
+    assert len(session.requests) == 1
+    aam.postData(endpoint, data={'name': 'new'})
+    assert aam.getData(endpoint) == [{'sid': 1}, {'sid': 2}]
+    assert [request['method'] for request in session.requests] == ['GET', 'POST', 'GET']
+
+
+def test_cache_uses_the_codec_of_the_connector(stubConnector):
+    codec = RecordingCodec()
+    cache = ResponseCache(ttl={'/traits': 600})
+    aam, session = stubConnector([makeResponse(body=[{'sid': 1}])], cache=cache, codec=codec)
+    assert cache.codec is codec
+    aam.getData('https://aam.example.com/v1/traits/')
+    codec.calls.clear()
+    assert aam.getData('https://aam.example.com/v1/traits/') == [{'sid': 1}]
+    assert codec.calls == ['loads']
+
+
+def test_cache_keeps_its_own_codec(stubConnector):
+    codec = RecordingCodec()
+    cache = ResponseCache(codec=codec)
+    stubConnector([], cache=cache, codec='json')
+    assert cache.codec is codec
@@ -0,0 +1,66 @@
+import gzip
+
+import numpy as np
+import pytest
+
+from audiencemanager import codec
+from conftest import makeResponse
+
+PAYLOAD = {'name': 'trait é', 'sid': 12, 'ratio': 0.5, 'active': True, 'folderId': None, 'tags': ['a', 'b'], 'nested': {'list': [1, 2]}}
+CODECS = ['json', pytest.param('orjson', marks=pytest.mark.skipif(codec.orjson is None, reason='orjson is not installed'))]
+
+
+@pytest.mark.parametrize('name', CODECS)
+def test_round_trip(name):
+    instance = codec.getCodec(name)
+    body = instance.dumps(PAYLOAD)
+    assert type(body) == bytes
+    assert instance.loads(body) == PAYLOAD
+
+
+@pytest.mark.parametrize('name', CODECS)
+def test_numpy_values_and_sets(name):
+    instance = codec.getCodec(name)
+    body = instance.dumps({'sid': np.int64(3), 'ratio': np.float64(0.25), 'ids': {7}})
+    decoded = instance.loads(body)
+    assert decoded == {'sid': 3, 'ratio': 0.25, 'ids': [7]}
+    assert type(decoded['sid']) == int
+
+
+def test_codecs_decode_to_the_same_types():
+    if codec.orjson is None:
+        pytest.skip('orjson is not installed')
+    body = codec.JsonCodec().dumps(PAYLOAD)
+    assert codec.OrjsonCodec().loads(body) == codec.JsonCodec().loads(body)
+
+
+def test_get_codec():
+    custom = codec.JsonCodec()
+    assert codec.getCodec(custom) is custom
+    assert isinstance(codec.getCodec(), codec.OrjsonCodec if codec.orjson is not None else codec.JsonCodec)
+    with pytest.raises(ValueError):
+        codec.getCodec('yaml')
+    with pytest.raises(TypeError):
+        codec.getCodec(object())
+
+
+def test_unsupported_type():
+    with pytest.raises(TypeError):
+        codec.JsonCodec().dumps({'value': object()})
+
+
+def test_compress():
+    body = codec.JsonCodec().dumps(PAYLOAD)
+    assert gzip.decompress(codec.compress(body)) == body
+
+
+def test_large_bodies_are_compressed(stubConnector):
+    aam, session = stubConnector([makeResponse(body={}), makeResponse(body={})], compressThreshold=100)
+    aam.postData('https://aam.example.com/v1/traits/', data={'name': 'small'})
+    aam.postData('https://aam.example.com/v1/traits/', data={'name': 'x' * 200})
+    small, large = session.requests
+    assert 'Content-Encoding' not in small['headers']
+    assert small['data'] == b'{"name": "small"}'
+    assert large['headers']['Content-Encoding'] == 'gzip'
+    assert aam.codec.loads(gzip.decompress(large['data'])) == {'name': 'x' * 200}
+    assert 'Content-Encoding' not in aam.header
@@ -0,0 +1,44 @@
+import pandas as pd
+
+from audiencemanager.audiencemanager import AudienceManager
+
+
+class FakeConnector:
+
+    def __init__(self):
+        self.bodies = []
+
+    def postData(self, endpoint, data=None, headers=None):
+        self.bodies.append(data)
+        return {'sid': len(self.bodies), 'name': data['name']}
+
+
+def makeAudienceManager():
+    aam = AudienceManager.__new__(AudienceManager)
+    aam.connector = FakeConnector()
+    aam.endpoint = 'https://aam.example.com/v1'
+    aam.header = {}
+    return aam
+
+
+def test_dataframe_values_are_normalized():
+    aam = makeAudienceManager()
+    traits = pd.DataFrame({'name': ['a', 'b'], 'traitType': 'ON_BOARDED_TRAIT', 'dataSourceId': [1, 1], 'folderId': [2, 2],
+                           'ttl': [30, None], 'categoryId': [5, None],
+                           'description': pd.array(['desc', pd.NA], dtype='string')})
+    result = aam.createTraitsBulk(traits)
+    assert result['status'].tolist() == ['created', 'created']
+    first, second = sorted(aam.connector.bodies, key=lambda body: body['name'])
+    assert first['ttl'] == '30' and first['categoryId'] == '5' and first['description'] == 'desc'
+    assert second['ttl'] == '120'
+    assert 'categoryId' not in second and 'description' not in second
+
+
+def test_rule_based_trait_requires_a_rule():
+    aam = makeAudienceManager()
+    traits = [{'name': 'a', 'traitType': 'RULE_BASED_TRAIT', 'dataSourceId': 1, 'folderId': 2},
+              {'name': 'b', 'traitType': 'RULE_BASED_TRAIT', 'dataSourceId': 1, 'folderId': 2, 'traitRule': float('nan')},
+              {'name': 'c', 'traitType': 'RULE_BASED_TRAIT', 'dataSourceId': 1, 'folderId': 2, 'traitRule': 'c_page == "home"'}]
+    result = aam.createTraitsBulk(traits)
+    assert result['status'].tolist() == ['invalid', 'invalid', 'created']
+    assert len(aam.connector.bodies) == 1
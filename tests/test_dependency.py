@@ -0,0 +1,42 @@
+from audiencemanager.dependency import DependencyGraph
+
+
+class FakeAudienceManager:
+
+    def __init__(self, traits, segments):
+        self.traits = traits
+        self.segments = segments
+
+    def iterTraits(self, includeMetrics=False):
+        return iter(self.traits)
+
+    def iterSegments(self, includeMetrics=False):
+        return iter(self.segments)
+
+    def iterDestinations(self, includeMetrics=False):
+        return iter([])
+
+
+def test_refresh_code_view_rules():
+    aam = FakeAudienceManager([{'sid': 1, 'dataSourceId': 10}],
+                              [{'sid': 100, 'segmentRule': "frequency([1T] >= 2)", 'dataSourceId': 10},
+                               {'sid': 101, 'segmentRule': "2T AND recency([1T] <= 7D)", 'dataSourceId': 10}])
+    graph = DependencyGraph()
+    summary = graph.refresh(aam)
+    assert summary['segments']['updated'] == 2
+    assert graph.impacted('trait', [1], types=['segment']) == {'segment': [100, 101]}
+
+
+def test_refresh_unparsable_rule_keeps_edges():
+    aam = FakeAudienceManager([{'sid': 1, 'dataSourceId': 10}],
+                              [{'sid': 100, 'segmentRule': "1T AND unknown(3T)", 'dataSourceId': 20, 'updateTime': 1}])
+    graph = DependencyGraph()
+    summary = graph.refresh(aam)
+    assert summary['segments']['failed'] == 1
+    assert summary['segments']['updated'] == 0
+    assert summary['segments']['errors'] == [100]
+    assert ('segment', 100) in graph.errors
+    assert graph.impacted('trait', [1], types=['segment']) == {'segment': [100]}
+    assert graph.dependencies('segment', [100], types=['trait', 'dataSource']) == {'trait': [1, 3], 'dataSource': [10, 20]}
+    # still reported in the next refresh
+    assert graph.refresh(aam)['segments']['errors'] == [100]
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from audiencemanager.foldertree import FolderTree
+
+FOLDERS = [{'folderId': 1, 'name': 'All', 'parentFolderId': 0, 'subFolders': [
+    {'folderId': 2, 'name': 'Sports', 'parentFolderId': 1, 'subFolders': [
+        {'folderId': 4, 'name': 'Tennis', 'parentFolderId': 2, 'subFolders': []}]},
+    {'folderId': 3, 'name': 'News', 'parentFolderId': 1, 'subFolders': []}]}]
+
+
+def test_hierarchy():
+    tree = FolderTree(FOLDERS)
+    assert len(tree) == 4
+    assert tree.parent(4) == 2
+    assert tree.parent(1) is None
+    assert tree.children(1) == [2, 3]
+    assert tree.ancestors(4) == [2, 1]
+    assert tree.descendants(1).tolist() == [2, 4, 3]
+    assert tree.isAncestor(1, 4) and not tree.isAncestor(3, 4)
+    assert tree.path(4) == 'All/Sports/Tennis'
+    assert tree.resolve('/All/News/') == 3
+    with pytest.raises(KeyError):
+        tree.parent(99)
+
+
+def test_join_paths_unknown_folders():
+    df = pd.DataFrame({'sid': [10, 11, 12, 13], 'folderId': [4, 99, None, 3]})
+    result = FolderTree(FOLDERS).joinPaths(df)
+    assert result['folderPath'].tolist() == ['All/Sports/Tennis', None, None, 'All/News']
+    assert 'folderPath' not in df.columns
+
+
+def test_join_paths_empty_tree():
+    df = pd.DataFrame({'sid': [10, 11], 'folderId': [4, 5]})
+    tree = FolderTree([])
+    assert len(tree) == 0
+    assert tree.joinPaths(df)['folderPath'].tolist() == [None, None]
+    assert tree.joinPaths(df.iloc[:0])['folderPath'].tolist() == []
@@ -0,0 +1,50 @@
+from audiencemanager.mirror import Mirror
+
+
+class FakeAudienceManager:
+
+    def __init__(self, mappings):
+        self.mappings = mappings
+        self.updateTimes = {destinationId: 1 for destinationId in mappings}
+        self.requested = []
+
+    def iterDestinations(self, includeMetrics=False):
+        return iter([{'destinationId': destinationId, 'name': f"destination {destinationId}", 'updateTime': self.updateTimes[destinationId]}
+                     for destinationId in self.mappings])
+
+    def getDestinationMappings(self, destinationId, includeMetrics=False):
+        self.requested.append(destinationId)
+        return self.mappings[destinationId]
+
+    def _fanOut(self, func, ids, max_workers=5):
+        return [func(elementId) for elementId in ids]
+
+
+def test_mappings_of_deleted_destinations_are_deleted(tmp_path):
+    mirror = Mirror(str(tmp_path / 'mirror.db'))
+    aam = FakeAudienceManager({1: [{'destinationMappingId': 10, 'sid': 100}], 2: [{'destinationMappingId': 20, 'sid': 200}]})
+    mirror.sync(aam, objects=['destinations', 'destinationMappings'])
+    del aam.mappings[2]
+    summary = mirror.sync(aam, objects=['destinations', 'destinationMappings'])
+    assert summary['destinations']['deleted'] == 1
+    assert summary['destinationMappings']['deleted'] == 1
+    rows = mirror.query("SELECT id, deleted FROM destination_mappings ORDER BY id", format='raw')
+    assert rows == [(10, 0), (20, 1)]
+
+
+def test_mappings_only_requested_for_changed_destinations(tmp_path):
+    mirror = Mirror(str(tmp_path / 'mirror.db'))
+    aam = FakeAudienceManager({1: [{'destinationMappingId': 10, 'sid': 100}], 2: [{'destinationMappingId': 20, 'sid': 200}]})
+    mirror.sync(aam, objects=['destinationMappings'])
+    assert aam.requested == [1, 2]
+    summary = mirror.sync(aam, objects=['destinationMappings'])
+    assert aam.requested == [1, 2]
+    assert summary['destinationMappings']['skipped'] == 2
+    assert summary['destinationMappings']['deleted'] == 0
+    aam.mappings[2] = [{'destinationMappingId': 21, 'sid': 201}]
+    aam.updateTimes[2] = 2
+    summary = mirror.sync(aam, objects=['destinationMappings'])
+    assert aam.requested == [1, 2, 2]
+    assert summary['destinationMappings']['skipped'] == 1
+    rows = mirror.query("SELECT id, deleted FROM destination_mappings ORDER BY id", format='raw')
+    assert rows == [(10, 0), (20, 1), (21, 0)]
@@ -0,0 +1,46 @@
+import random
+import time
+
+import pytest
+
+from conftest import makeResponse
+
+URL = 'https://aam.example.com/v1/traits'
+
+
+def paginated(total, withTotal=True, delay=0):
+    def handler(method, url, params, data):
+        if delay:
+            time.sleep(random.uniform(0, delay))
+        page, pageSize = params['page'], params['pageSize']
+        elements = [{'sid': sid} for sid in range(page * pageSize, min(total, (page + 1) * pageSize))]
+        if withTotal:
+            return makeResponse(200, {'list': elements, 'page': page, 'pageSize': pageSize, 'total': total})
+        return makeResponse(200, elements)
+    return handler
+
+
+@pytest.mark.parametrize('prefetch', [0, 1, 4])
+@pytest.mark.parametrize('withTotal', [True, False])
+@pytest.mark.parametrize('total', [0, 5, 10, 23])
+def test_pages_in_order(stubConnector, prefetch, withTotal, total):
+    aam, session = stubConnector(paginated(total, withTotal, delay=0.005 if prefetch else 0))
+    pages = list(aam.getPages(URL, params={'includeMetrics': True}, pageSize=5, prefetch=prefetch))
+    assert [element['sid'] for page in pages for element in page] == list(range(total))
+    expected = max(1, -(-total // 5)) if withTotal else total // 5 + 1
+    assert len(pages) == expected
+    if prefetch == 0:
+        assert len(session.requests) == expected
+    assert all(request['params']['includeMetrics'] == True for request in session.requests)
+
+
+def test_error_page_raises(stubConnector):
+    def handler(method, url, params, data):
+        if params['page'] == 1:
+            return makeResponse(400, {'error': 'bad request'})
+        return makeResponse(200, [{'sid': sid} for sid in range(5)])
+    aam, _ = stubConnector(handler)
+    pages = aam.getPages(URL, pageSize=5, prefetch=2)
+    assert len(next(pages)) == 5
+    with pytest.raises(Exception, match='page 1'):
+        next(pages)
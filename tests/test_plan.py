@@ -0,0 +1,54 @@
+import pandas as pd
+
+from audiencemanager.audiencemanager import AudienceManager
+from audiencemanager.plan import makePlan
+
+CURRENT = [{'sid': 1, 'name': 'a', 'traitType': 'ON_BOARDED_TRAIT', 'dataSourceId': 10, 'folderId': 20, 'description': 'd', 'ttl': 30},
+           {'sid': 2, 'name': 'b', 'traitType': 'ON_BOARDED_TRAIT', 'dataSourceId': 10, 'folderId': 20, 'integrationCode': 'code-b', 'ttl': 60}]
+
+
+def test_missing_unchanged_and_changed_rows():
+    desired = [{'sid': 1, 'name': 'a', 'ttl': 30.0},
+               {'integrationCode': 'code-b', 'name': 'b2'},
+               {'sid': 3, 'name': 'c'}]
+    plan = makePlan('traits', desired, CURRENT)
+    assert plan.unchanged == ['1']
+    assert plan.missing == [{'sid': 3, 'name': 'c'}]
+    assert len(plan) == 1
+    change = plan.changes[0]
+    assert change['id'] == '2'
+    assert change['fields'] == {'name': ('b', 'b2')}
+    assert change['payload']['name'] == 'b2' and change['payload']['ttl'] == 60
+
+
+def test_missing_values_are_not_compared():
+    desired = pd.DataFrame({'sid': [1, 2], 'name': ['a', 'b'], 'description': pd.array([pd.NA, 'new'], dtype='string'),
+                            'ttl': [None, 60], 'updated': [pd.NaT, pd.Timestamp('2024-01-01')]})
+    plan = makePlan('traits', desired, CURRENT, fields=['name', 'description', 'ttl', 'updated'])
+    assert plan.unchanged == ['1']
+    assert [change['id'] for change in plan.changes] == ['2']
+    assert set(plan.changes[0]['fields'].keys()) == {'description', 'updated'}
+    assert plan.toDataFrame()['field'].tolist() == ['description', 'updated']
+
+
+class FakeConnector:
+
+    def __init__(self):
+        self.requests = []
+
+    def putData(self, endpoint, data=None, headers=None):
+        self.requests.append((endpoint, data))
+        return {'sid': int(endpoint.rsplit('/', 1)[1])}
+
+
+def test_apply_plan():
+    aam = AudienceManager.__new__(AudienceManager)
+    aam.connector = FakeConnector()
+    aam.endpoint = 'https://aam.example.com/v1'
+    aam.header = {}
+    plan = aam.planTraits([{'sid': 1, 'description': 'new'}, {'sid': 2, 'name': 'b'}], current=CURRENT)
+    result = aam.applyPlan(plan)
+    assert result['id'].tolist() == ['1'] and result['status'].tolist() == ['updated']
+    endpoint, body = aam.connector.requests[0]
+    assert endpoint.endswith('/traits/1')
+    assert body['description'] == 'new' and body['ttl'] == '30' and body['name'] == 'a'
@@ -0,0 +1,87 @@
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+
+from audiencemanager.ratelimiter import RateLimiter
+from conftest import makeResponse
+
+URL = 'https://aam.example.com/v1/traits'
+
+
+def test_throttled_requests_are_retried_for_all_methods(stubConnector):
+    aam, session = stubConnector([makeResponse(429, {'error': 'throttled'}, {'Retry-After': '0'}), makeResponse(200, {'sid': 1})])
+    assert aam.postData(URL, data={'name': 'a'}) == {'sid': 1}
+    assert [request['method'] for request in session.requests] == ['POST', 'POST']
+
+
+def test_server_errors_only_retried_for_idempotent_methods(stubConnector):
+    aam, session = stubConnector([makeResponse(503, {'error': 'unavailable'}), makeResponse(200, {'sid': 1})])
+    assert aam.getData(URL) == {'sid': 1}
+    aam, session = stubConnector([makeResponse(503, {'error': 'unavailable'}), makeResponse(200, {'sid': 1})])
+    assert aam.postData(URL, data={'name': 'a'}) == {'error': 'unavailable'}
+    assert len(session.requests) == 1
+
+
+def test_retries_are_bounded(stubConnector):
+    aam, session = stubConnector([makeResponse(429, {'error': 'throttled'}) for _ in range(3)], retry=2)
+    assert aam.getData(URL) == {'error': 'throttled'}
+    assert len(session.requests) == 3
+
+
+def test_connection_errors(stubConnector):
+    aam, session = stubConnector([requests.exceptions.ConnectionError('reset'), makeResponse(200, {'sid': 1})])
+    assert aam.getData(URL) == {'sid': 1}
+    aam, session = stubConnector([requests.exceptions.ConnectionError('reset'), makeResponse(200, {'sid': 1})])
+    with pytest.raises(requests.exceptions.ConnectionError):
+        aam.postData(URL, data={'name': 'a'})
+
+
+def test_unauthorized_renews_the_token_once(stubConnector, tokens):
+    aam, session = stubConnector([makeResponse(401, {'error': 'expired'}) for _ in range(3)])
+    assert aam.getData(URL) == {'error': 'expired'}
+    assert [request['headers']['Authorization'] for request in session.requests] == ['Bearer token0', 'Bearer token1']
+    assert aam.token == 'token1'
+
+
+def test_retry_after(stubConnector):
+    aam, _ = stubConnector([], backoffFactor=0.5, maxBackoff=4)
+    assert aam._retryDelay(makeResponse(429, headers={'Retry-After': '7'})) == 7
+    delay = aam._retryDelay(makeResponse(429, headers={'Retry-After': formatdate(time.time() + 30, usegmt=True)}))
+    assert 25 < delay <= 30
+    assert aam._retryDelay(makeResponse(429, headers={'Retry-After': formatdate(time.time() - 30, usegmt=True)})) == 0
+    assert all(0 <= aam._retryDelay(makeResponse(503), attempt=10) <= 4 for _ in range(20))
+
+
+def test_limiter_adapts_to_throttling(stubConnector):
+    limiter = RateLimiter(rate=1000, recoveryStep=100)
+    aam, _ = stubConnector([makeResponse(429, {'error': 'throttled'}), makeResponse(200, {'sid': 1})], rateLimiter=limiter)
+    aam.getData(URL)
+    assert limiter.rate == 600  # halved, then recovered by one step
+
+
+def test_limiter_bucket():
+    limiter = RateLimiter(rate=10, burst=2)
+    assert limiter._update(limiter._take) == 0
+    assert limiter._update(limiter._take) == 0
+    assert 0 < limiter._update(limiter._take) <= 0.1
+    limiter.onThrottle()
+    assert limiter.rate == 5 and limiter.tokens <= 0
+    for _ in range(100):
+        limiter.onThrottle()
+    assert limiter.rate == limiter.minRate
+    for _ in range(1000):
+        limiter.onSuccess()
+    assert limiter.rate == limiter.maxRate
+
+
+def test_limiter_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'limiter.json')
+    first = RateLimiter(rate=1, burst=1, sharedPath=path)
+    second = RateLimiter(rate=1, burst=1, sharedPath=path)
+    assert first._update(first._take) == 0
+    assert second._update(second._take) > 0.5  # the token has been taken by the first instance
+    second.onThrottle()
+    first._update(lambda now: None)  # loads the shared state
+    assert first.rate == 0.5
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from audiencemanager.segmentrule import (SegmentRule, TraitMatrix, evaluateSegments, parseSegmentRule,
+                                         Trait, Frequency, Recency, And, Not)
+
+TRAITS = [1, 2, 3]
+# 5 profiles, one row per trait
+FREQUENCY = np.array([[0, 1, 3, 2, 0],
+                      [0, 0, 1, 2, 4],
+                      [1, 0, 0, 0, 0]])
+RECENCY = np.array([[99, 2, 10, 30, 99],
+                    [99, 99, 5, 1, 8],
+                    [0, 99, 99, 99, 99]])
+
+
+@pytest.fixture(params=[False, True], ids=['boolean', 'packed'])
+def matrix(request):
+    return TraitMatrix(TRAITS, frequency=FREQUENCY, recency=RECENCY, packed=request.param)
+
+
+def test_parse_code_view_functions():
+    assert parseSegmentRule("frequency([1T] >= 2)") == Frequency((1,), '>=', 2)
+    assert parseSegmentRule("FREQUENCY([1T, 2T] >= 3)") == Frequency((1, 2), '>=', 3)
+    assert parseSegmentRule("recency([1T] <= 7D)") == Recency((1,), '<=', 7)
+    assert parseSegmentRule("frequency([1T]) > 1") == Frequency((1,), '>', 1)
+    assert parseSegmentRule("1T AND NOT recency([2T, 3T] <= 7D)") == And((Trait(1), Not(Recency((2, 3), '<=', 7))))
+    assert parseSegmentRule("1T >= 2") == Frequency((1,), '>=', 2)
+
+
+@pytest.mark.parametrize('rule', ["frequency(1T >= 2)", "frequency([1T] >= 2", "recency([1T] <= 7)",
+                                  "frequency([1T] >= 2D)", "1T@-7D", "frequency([] >= 1)", "1T AND"])
+def test_invalid_rules(rule):
+    with pytest.raises(ValueError):
+        SegmentRule(rule)
+
+
+def test_rule_traits():
+    rule = SegmentRule("(frequency([1T, 2T] >= 3) OR 4T) AND recency([3T] <= 7D)")
+    assert rule.traits == {1, 2, 3, 4}
+
+
+@pytest.mark.parametrize('rule, expected', [
+    ("1T", [False, True, True, True, False]),
+    ("frequency([1T] >= 2)", [False, False, True, True, False]),
+    ("frequency([1T] < 2)", [True, True, False, False, True]),
+    ("frequency([1T, 2T] >= 4)", [False, False, True, True, True]),
+    ("recency([1T] <= 7D)", [False, True, False, False, False]),
+    ("recency([1T, 2T] <= 7D)", [False, True, True, True, False]),
+    ("recency([2T] > 4D)", [False, False, True, False, True]),
+    ("1T AND recency([1T] <= 7D)", [False, True, False, False, False]),
+    ("frequency([1T] >= 2) AND NOT recency([2T] <= 1D)", [False, False, True, False, False]),
+    ("frequency([9T] < 1) AND 3T", [True, False, False, False, False]),
+])
+def test_evaluate(matrix, rule, expected):
+    assert SegmentRule(rule).evaluate(matrix).tolist() == expected
+
+
+def test_evaluate_segments_shares_sub_expressions(matrix):
+    results = evaluateSegments({10: "frequency([1T] >= 2) OR 3T", 20: "frequency([1T] >= 2) AND 2T"}, matrix)
+    assert results[10].tolist() == [True, False, True, True, False]
+    assert results[20].tolist() == [False, False, True, True, False]
+
+
+def test_missing_matrices():
+    matrix = TraitMatrix.fromProfiles([[1], [1, 2]])
+    assert SegmentRule("1T AND NOT 2T").evaluate(matrix).tolist() == [True, False]
+    with pytest.raises(ValueError, match=r"frequency\(\[1T\] >= 2\)"):
+        SegmentRule("frequency([1T] >= 2)").evaluate(matrix)
+    with pytest.raises(ValueError, match=r"recency\(\[1T\] <= 7D\)"):
+        SegmentRule("recency([1T] <= 7D)").evaluate(matrix)
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from audiencemanager import streaming
+from audiencemanager.streaming import iterJsonArray
+from conftest import makeResponse
+
+DOCUMENT = json.dumps([
+    {'sid': 1, 'name': 'quote " and backslash \\ in a name', 'traitRule': 'c_page == "home"'},
+    {'sid': 22, 'name': 'unicode é ü 日本  ', 'escaped': '\\u0041 \n \t', 'metrics': {'uniques': 12345, 'ratio': -0.5e-3}},
+    [1, 23, 456, True, False, None],
+    "]}, [{",
+    7890,
+    -12.5,
+], ensure_ascii=False).encode('utf-8')
+
+
+def split(document, size):
+    return [document[position:position + size] for position in range(0, len(document), size)]
+
+
+def test_every_split_point():
+    expected = json.loads(DOCUMENT)
+    for position in range(1, len(DOCUMENT)):
+        assert list(iterJsonArray([DOCUMENT[:position], DOCUMENT[position:]])) == expected, position
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64])
+def test_small_chunks(size):
+    assert list(iterJsonArray(split(DOCUMENT, size))) == json.loads(DOCUMENT)
+
+
+def test_ascii_escapes():
+    document = json.dumps([{'name': 'é "x" \\'}, 'a\\"b'], ensure_ascii=True).encode('utf-8')
+    assert list(iterJsonArray(split(document, 1))) == json.loads(document)
+
+
+def test_empty_and_invalid_documents():
+    assert list(iterJsonArray([b' [ ', b' ] '])) == []
+    with pytest.raises(ValueError):
+        list(iterJsonArray([b'{"error": "Request Error"}']))
+    with pytest.raises(ValueError):
+        list(iterJsonArray([b'']))
+    with pytest.raises(ValueError):
+        list(iterJsonArray([b'[1, {"sid": 2']))
+
+
+def test_elements_yielded_before_the_end():
+    chunks = iter([b'[{"sid": 1}, ', b'{"sid": 2}'])
+    elements = iterJsonArray(chunks)
+    assert next(elements) == {'sid': 1}
+    assert next(elements) == {'sid': 2}
+
+
+def test_response_records(monkeypatch):
+    monkeypatch.setattr(streaming, 'ijson', None)
+    res = makeResponse(content=DOCUMENT)
+    res._content, res._content_consumed = False, False
+    assert list(streaming.iterResponseRecords(res, chunkSize=5)) == json.loads(DOCUMENT)
+
+
+def test_stream_data(stubConnector):
+    aam, _ = stubConnector([makeResponse(content=DOCUMENT)])
+    assert list(aam.streamData('https://aam.example.com/v1/traits', chunkSize=3)) == json.loads(DOCUMENT)
+    aam, _ = stubConnector([makeResponse(500, {'error': 'server'})], retry=0)
+    with pytest.raises(Exception, match='status code 500'):
+        list(aam.streamData('https://aam.example.com/v1/traits'))
@@ -0,0 +1,79 @@
+import gc
+import threading
+import weakref
+
+from audiencemanager import connector, tokenmanager
+from audiencemanager.metrics import Metrics
+
+CONFIG = {'org_id': 'org@AdobeOrg', 'client_id': 'client', 'tech_id': 'tech@techacct.adobe.com', 'pathToKey': '', 'secret': '',
+          'tokenEndpoint': 'https://ims.example.com/ims/exchange/jwt'}
+
+
+def fakeFetchToken(config, verbose=False, metrics=None, **kwargs):
+    if metrics is not None:
+        metrics.emit('token', seconds=0.0, status=200)
+    return {'token': 'token', 'expiry': 86400000}
+
+
+def test_token_manager_options(tmp_path):
+    memory = tokenmanager.getTokenManager(CONFIG, fakeFetchToken, diskCache=False, autoRefresh=False)
+    disk = tokenmanager.getTokenManager(CONFIG, fakeFetchToken, cachePath=tmp_path, autoRefresh=False)
+    assert memory is not disk
+    assert memory.diskCache == False and disk.diskCache == True
+    assert tokenmanager.getTokenManager(CONFIG, fakeFetchToken, diskCache=False, autoRefresh=False) is memory
+
+
+def test_connector_not_kept_by_token_manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(connector, 'fetchToken', fakeFetchToken)
+    first = connector.AdobeRequest(CONFIG, tokenCachePath=tmp_path, autoRefresh=False)
+    events = []
+    second = connector.AdobeRequest(CONFIG, tokenCachePath=tmp_path, autoRefresh=False, tokenCache=False,
+                                    metrics=Metrics(lambda event, values: events.append(event)))
+    assert first.tokenManager is not second.tokenManager
+    assert events == ['token']
+    assert second.token == 'token'
+    reference = weakref.ref(first)
+    del first
+    gc.collect()
+    assert reference() is None
+
+
+def test_token_fetched_outside_of_the_lock(tmp_path):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slowFetchToken(config, verbose=False, metrics=None, **kwargs):
+        calls.append(manager._lock.locked())
+        started.set()
+        release.wait(5)
+        return {'token': f"token{len(calls)}", 'expiry': 86400000}
+    manager = tokenmanager.TokenManager(CONFIG, slowFetchToken, cachePath=tmp_path, diskCache=False, autoRefresh=False)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.getToken())) for _ in range(3)]
+    threads[0].start()
+    assert started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    received = []
+    manager.subscribe(lambda token, date_limit: received.append(token))  # not blocked by the request in flight
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == [False]
+    assert results == ['token1'] * 3
+    assert received == ['token1']
+
+
+def test_token_manager_per_credentials(tmp_path):
+    keyPath = tmp_path / 'private.key'
+    keyPath.write_text('key1')
+    config = dict(CONFIG, pathToKey=str(keyPath), secret='secret1')
+    manager = tokenmanager.getTokenManager(config, fakeFetchToken, cachePath=tmp_path, autoRefresh=False)
+    assert tokenmanager.getTokenManager(dict(config), fakeFetchToken, cachePath=tmp_path, autoRefresh=False) is manager
+    rotatedSecret = tokenmanager.getTokenManager(dict(config, secret='secret2'), fakeFetchToken, cachePath=tmp_path, autoRefresh=False)
+    assert rotatedSecret is not manager and rotatedSecret.config['secret'] == 'secret2'
+    keyPath.write_text('rotated key')
+    assert tokenmanager.getTokenManager(config, fakeFetchToken, cachePath=tmp_path, autoRefresh=False) is not manager
+    inline = dict(config, private_key='inline key')
+    assert tokenmanager.credentialsFingerprint(inline) != tokenmanager.credentialsFingerprint(dict(inline, private_key='other key'))
+    assert rotatedSecret.key == manager.key  # the tokens cached on disk are still shared